@@ -0,0 +1,115 @@
+# agregats.py
+import math
+
+import numpy as np
+
+
+class AgregatsStatistiques:
+    """Effectif, somme et somme des carrés par classe et par matière, tenus à jour
+
+    Par classe : moyennes générales des étudiants ; par matière : moyennes des
+    matières. Ajouter ou retirer un étudiant coûte O(nombre de ses matières) ;
+    moyenne et écart-type se lisent ensuite sans parcourir les données.
+    """
+
+    def __init__(self):
+        self.inscrits = {}  # classe -> nombre d'étudiants, avec ou sans moyenne
+        self.par_classe = {}  # classe -> [effectif, somme, somme des carrés]
+        self.par_matiere = {}  # matiere -> [effectif, somme, somme des carrés]
+
+    @staticmethod
+    def _cle_classe(classe):
+        # Même clé que ColonnesCohorte pour une classe absente
+        return classe if isinstance(classe, str) else ""
+
+    @staticmethod
+    def _modifier(table, cle, valeur, signe):
+        if valeur is None or valeur != valeur:
+            return
+        agregat = table.get(cle)
+        if agregat is None:
+            agregat = table[cle] = [0, 0.0, 0.0]
+        agregat[0] += signe
+        agregat[1] += signe * valeur
+        agregat[2] += signe * valeur * valeur
+        if agregat[0] == 0:
+            # Repartir de zéro plutôt que de garder des résidus d'arrondi
+            del table[cle]
+
+    def ajouter(self, classe, moyenne, moyennes_matieres, signe=1):
+        """Compte un étudiant : sa classe, sa moyenne générale (None sans
+        moyenne) et {matiere: moyenne}"""
+        classe = self._cle_classe(classe)
+        self.inscrits[classe] = self.inscrits.get(classe, 0) + signe
+        if not self.inscrits[classe]:
+            del self.inscrits[classe]
+        self._modifier(self.par_classe, classe, moyenne, signe)
+        for matiere, valeur in moyennes_matieres.items():
+            self._modifier(self.par_matiere, matiere, valeur, signe)
+
+    def retirer(self, classe, moyenne, moyennes_matieres):
+        """Retire un étudiant compté avec les mêmes valeurs"""
+        self.ajouter(classe, moyenne, moyennes_matieres, signe=-1)
+
+    def copier(self):
+        copie = AgregatsStatistiques()
+        copie.inscrits = dict(self.inscrits)
+        copie.par_classe = {cle: list(agregat) for cle, agregat in self.par_classe.items()}
+        copie.par_matiere = {cle: list(agregat) for cle, agregat in self.par_matiere.items()}
+        return copie
+
+    @staticmethod
+    def depuis_colonnes(colonnes):
+        """Agrégats recalculés en entier à partir d'une ColonnesCohorte"""
+        agregats = AgregatsStatistiques()
+        inscrits = np.bincount(colonnes.codes_classe, minlength=len(colonnes.classes))
+        agregats.inscrits = {classe: int(inscrits[i]) for i, classe in enumerate(colonnes.classes) if inscrits[i]}
+        for table, noms, codes, valeurs in (
+            (agregats.par_classe, colonnes.classes, colonnes.codes_classe, colonnes.moyennes),
+            (agregats.par_matiere, colonnes.matieres, colonnes.matiere_entrees, colonnes.valeurs_entrees),
+        ):
+            presentes = ~np.isnan(valeurs)
+            codes, valeurs = codes[presentes], valeurs[presentes]
+            effectifs = np.bincount(codes, minlength=len(noms))
+            sommes = np.bincount(codes, weights=valeurs, minlength=len(noms))
+            carres = np.bincount(codes, weights=valeurs * valeurs, minlength=len(noms))
+            for i, nom in enumerate(noms):
+                if effectifs[i]:
+                    table[nom] = [int(effectifs[i]), float(sommes[i]), float(carres[i])]
+        return agregats
+
+    def resume(self, groupe="classe"):
+        """Effectif, moyenne et écart-type (de la population) par classe ou par matière"""
+        table = self.par_classe if groupe == "classe" else self.par_matiere
+        resume = {}
+        for cle, (effectif, somme, carres) in table.items():
+            moyenne = somme / effectif
+            resume[cle] = {
+                "effectif": effectif,
+                "moyenne": round(moyenne, 2),
+                "ecart_type": round(math.sqrt(max(carres / effectif - moyenne * moyenne, 0.0)), 2),
+            }
+        return resume
+
+    def ecarts(self, reference, tolerance=1e-6):
+        """Différences avec des agrégats de référence (recalcul complet)
+
+        Retourne la liste des (groupe, clé, attendu, obtenu) qui diffèrent ;
+        les sommes sont comparées avec une tolérance relative.
+        """
+        differences = [
+            ("inscrits", classe, reference.inscrits.get(classe), self.inscrits.get(classe))
+            for classe in set(self.inscrits) | set(reference.inscrits)
+            if self.inscrits.get(classe) != reference.inscrits.get(classe)
+        ]
+        for groupe, table, attendue in (
+            ("classe", self.par_classe, reference.par_classe),
+            ("matiere", self.par_matiere, reference.par_matiere),
+        ):
+            for cle in set(table) | set(attendue):
+                obtenu, attendu = table.get(cle), attendue.get(cle)
+                if obtenu is None or attendu is None or obtenu[0] != attendu[0] or not all(
+                    math.isclose(o, a, rel_tol=tolerance, abs_tol=tolerance) for o, a in zip(obtenu[1:], attendu[1:])
+                ):
+                    differences.append((groupe, cle, attendu, obtenu))
+        return differences
@@ -1,9 +1,17 @@
 # authentification.py
 import hashlib
+import hmac
 import json
 import os
 
 class Authentification:
+    # Permissions de chaque rôle
+    PERMISSIONS = {
+        "admin": ["lire", "ecrire", "supprimer", "exporter", "importer"],
+        "teacher": ["lire", "ecrire"],
+        "user": ["lire"]
+    }
+    
     def __init__(self, fichier_utilisateurs="utilisateurs.json"):
         self.fichier_utilisateurs = fichier_utilisateurs
         self.utilisateur_courant = None
@@ -66,6 +74,24 @@ class Authentification:
         self.utilisateur_courant = None
         return True, "Déconnexion réussie."
     
+    def verifier_identifiants(self, username, mot_de_passe):
+        """Retourne le rôle de l'utilisateur si les identifiants sont bons, sinon None
+
+        Contrairement à authentifier, ne change pas l'utilisateur courant :
+        utilisable par des requêtes HTTP traitées en parallèle.
+        """
+        utilisateur = self.utilisateurs.get(username)
+        if utilisateur is None or not mot_de_passe:
+            return None
+        if not hmac.compare_digest(utilisateur["mot_de_passe"], self._hasher_mot_de_passe(mot_de_passe)):
+            return None
+        return utilisateur["role"]
+    
+    @classmethod
+    def role_a_permission(cls, role, permission_requise):
+        """Vérifie si un rôle a une permission spécifique"""
+        return permission_requise in cls.PERMISSIONS.get(role, [])
+    
     def est_authentifie(self):
         """Vérifie si un utilisateur est authentifié"""
         return self.utilisateur_courant is not None
@@ -75,15 +101,4 @@ class Authentification:
         if not self.est_authentifie():
             return False
             
-        # Définir les permissions par rôle
-        permissions = {
-            "admin": ["lire", "ecrire", "supprimer", "exporter", "importer"],
-            "teacher": ["lire", "ecrire"],
-            "user": ["lire"]
-        }
-        
-        role = self.utilisateur_courant["role"]
-        if role in permissions:
-            return permission_requise in permissions[role]
-            
-        return False
\ No newline at end of file
+        return self.role_a_permission(self.utilisateur_courant["role"], permission_requise)
\ No newline at end of file
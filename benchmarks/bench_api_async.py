@@ -0,0 +1,145 @@
+# bench_api_async.py
+"""Charge HTTP locale : API synchrone (gunicorn, fils) contre API asyncio (hypercorn)
+
+Chaque serveur tourne dans un seul processus. Le client ouvre --connexions
+connexions HTTP/1.1 persistantes, qui enchaînent les requêtes sur les points
+d'accès choisis pendant --duree secondes. On compte les réponses et les
+erreurs, et on mesure la latence (p50, p99).
+
+Sans Redis ni MongoDB, les requêtes ne font que du calcul en mémoire.
+REDIS_URL, MONGODB_URI et MONGODB_PERSISTANCE sont transmis aux serveurs :
+avec eux, /health et /api/test-redis passent par le réseau.
+
+Usage : python benchmarks/bench_api_async.py [--connexions 10,100,500] [--duree 5] [--fils 8]
+        [--points-acces /health,/api/students?limit=20]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+POINTS_ACCES = "/health,/api/students?limit=20,/api/students/stats,/api/students/search?nom=diop"
+
+
+def port_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def demarrer(serveur, port, fils):
+    if serveur == "sync":
+        commande = ["gunicorn", "--bind", f"127.0.0.1:{port}", "--workers", "1", "--threads", str(fils),
+                    "--worker-class", "gthread", "main:app"]
+    else:
+        commande = ["hypercorn", "--bind", f"127.0.0.1:{port}", "--workers", "1", "main_async:app"]
+    processus = subprocess.Popen(commande, cwd=RACINE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    limite = time.time() + 60
+    while time.time() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return processus
+        except OSError:
+            time.sleep(0.2)
+    processus.kill()
+    raise RuntimeError(f"Le serveur {serveur} ne démarre pas")
+
+
+async def lire_reponse(lecteur):
+    """Lit une réponse HTTP/1.1 ; retourne son code de statut"""
+    statut = int((await lecteur.readline()).split()[1])
+    longueur, morceaux = 0, False
+    while True:
+        ligne = await lecteur.readline()
+        if ligne in (b"\r\n", b""):
+            break
+        nom, _, valeur = ligne.decode("latin-1").partition(":")
+        nom = nom.strip().lower()
+        if nom == "content-length":
+            longueur = int(valeur)
+        elif nom == "transfer-encoding" and "chunked" in valeur:
+            morceaux = True
+    if not morceaux:
+        await lecteur.readexactly(longueur)
+        return statut
+    while True:
+        taille = int((await lecteur.readline()).split(b";")[0], 16)
+        await lecteur.readexactly(taille + 2)
+        if not taille:
+            return statut
+
+
+async def client(port, chemins, fin, latences, erreurs, decalage):
+    lecteur = ecrivain = None
+    i = decalage
+    while time.perf_counter() < fin:
+        if ecrivain is None:
+            try:
+                lecteur, ecrivain = await asyncio.open_connection("127.0.0.1", port)
+            except OSError:
+                erreurs.append("connexion")
+                await asyncio.sleep(0.05)
+                continue
+        chemin = chemins[i % len(chemins)]
+        i += 1
+        debut = time.perf_counter()
+        try:
+            ecrivain.write(f"GET {chemin} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode())
+            statut = await asyncio.wait_for(lire_reponse(lecteur), 30)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError, IndexError):
+            erreurs.append("réponse")
+            ecrivain.close()
+            lecteur = ecrivain = None
+            continue
+        latences.append(time.perf_counter() - debut)
+        if statut >= 500:
+            erreurs.append(statut)
+    if ecrivain is not None:
+        ecrivain.close()
+
+
+async def charger(port, chemins, connexions, duree):
+    latences, erreurs = [], []
+    fin = time.perf_counter() + duree
+    await asyncio.gather(*(client(port, chemins, fin, latences, erreurs, i) for i in range(connexions)))
+    return latences, erreurs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connexions", default="10,100,500")
+    parser.add_argument("--duree", type=float, default=5)
+    parser.add_argument("--fils", type=int, default=8, help="fils du worker gunicorn synchrone")
+    parser.add_argument("--points-acces", default=POINTS_ACCES)
+    args = parser.parse_args()
+    chemins = args.points_acces.split(",")
+
+    print(f"{'serveur':>8} {'connexions':>11} {'requêtes/s':>11} {'p50 (ms)':>9} {'p99 (ms)':>9} {'erreurs':>8}")
+    for serveur in ("sync", "async"):
+        port = port_libre()
+        processus = demarrer(serveur, port, args.fils)
+        try:
+            # Première requête : initialisation de l'application
+            asyncio.run(charger(port, chemins[:1], 1, 0.5))
+            for connexions in (int(c) for c in args.connexions.split(",")):
+                latences, erreurs = asyncio.run(charger(port, chemins, connexions, args.duree))
+                latences = sorted(latence * 1000 for latence in latences)
+                if not latences:
+                    print(f"{serveur:>8} {connexions:>11} {'-':>11} {'-':>9} {'-':>9} {len(erreurs):>8}")
+                    continue
+                p99 = latences[min(len(latences) - 1, int(len(latences) * 0.99))]
+                print(f"{serveur:>8} {connexions:>11} {len(latences) / args.duree:>11.0f} "
+                      f"{statistics.median(latences):>9.1f} {p99:>9.1f} {len(erreurs):>8}")
+        finally:
+            processus.terminate()
+            processus.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# bench_bulk.py
+"""Débit de l'ajout en masse NDJSON (POST /api/students/bulk) selon la taille des lots
+
+Le corps est envoyé par morceaux de 64 Ko, comme le lit la route, à une
+IngestionNdjson sur des données vides ; le rapport est consommé au fil de
+l'eau. On mesure les lignes traitées par seconde. Avec --route, la même
+mesure passe par la route Flask (client de test), avec un utilisateur
+admin ajouté en mémoire ; les données de l'application sont vidées avant
+chaque envoi, sans quoi tous les numéros seraient déjà présents.
+
+Usage : python benchmarks/bench_bulk.py [--etudiants 50000] [--tailles-lot 500,5000,20000] [--erreurs-seules] [--route]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.donnees_synthetiques import generer_csv
+
+TAILLE_MORCEAU = 64 * 1024
+
+
+def generer_ndjson(nb_etudiants):
+    """Corps NDJSON de nb_etudiants lignes (environ 10% invalides)"""
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as dossier:
+        df = pd.read_csv(generer_csv(os.path.join(dossier, "eleves.csv"), nb_etudiants))
+    df = df.astype(object).where(df.notna(), None)
+    return "".join(json.dumps(ligne, ensure_ascii=False) + "\n" for ligne in df.to_dict("records")).encode()
+
+
+def morceaux(corps):
+    for debut in range(0, len(corps), TAILLE_MORCEAU):
+        yield corps[debut:debut + TAILLE_MORCEAU]
+
+
+def mesurer_ingestion(corps, taille_lot, erreurs_seules):
+    from donnees_partagees import DonneesPartagees
+    from ingestion import IngestionNdjson
+
+    donnees = DonneesPartagees()
+    ingestion = IngestionNdjson(donnees, taille_lot=taille_lot, erreurs_seules=erreurs_seules)
+    debut = time.perf_counter()
+    octets_rapport = sum(len(morceau) for morceau in ingestion.traiter(morceaux(corps)))
+    duree = time.perf_counter() - debut
+    assert len(donnees.instantane().etudiants) == ingestion.valides
+    return duree, octets_rapport
+
+
+def mesurer_route(corps, taille_lot, erreurs_seules):
+    import base64
+    import io
+    os.environ["BULK_TAILLE_LOT"] = str(taille_lot)
+    from gestion_etudiants import GestionEtudiants
+    from main import app, get_app_instance
+
+    application = get_app_instance()
+    authentification = application.authentification
+    authentification.utilisateurs["bench"] = {"mot_de_passe": authentification._hasher_mot_de_passe("bench"),
+                                             "role": "admin"}
+    application.donnees.remplacer(GestionEtudiants())
+    client = app.test_client()
+    debut = time.perf_counter()
+    reponse = client.post("/api/students/bulk" + ("?report=errors" if erreurs_seules else ""),
+                          input_stream=io.BytesIO(corps), content_type="application/x-ndjson",
+                          headers={"Authorization": "Basic " + base64.b64encode(b"bench:bench").decode()})
+    octets_rapport = len(reponse.get_data())
+    return time.perf_counter() - debut, octets_rapport
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--etudiants", type=int, default=50000)
+    parser.add_argument("--tailles-lot", default="500,5000,20000")
+    parser.add_argument("--erreurs-seules", action="store_true", help="rapport des seules lignes rejetées")
+    parser.add_argument("--route", action="store_true", help="passer par la route Flask")
+    args = parser.parse_args()
+
+    corps = generer_ndjson(args.etudiants)
+    mesurer = mesurer_route if args.route else mesurer_ingestion
+    print(f"{args.etudiants} lignes, {len(corps) / 1e6:.1f} Mo de NDJSON")
+    print(f"{'taille lot':>10} {'durée (s)':>10} {'lignes/s':>10} {'rapport (Ko)':>13}")
+    for taille_lot in (int(t) for t in args.tailles_lot.split(",")):
+        duree, octets_rapport = mesurer(corps, taille_lot, args.erreurs_seules)
+        print(f"{taille_lot:>10} {duree:>10.2f} {args.etudiants / duree:>10.0f} {octets_rapport / 1024:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# bench_bulletins.py
+"""Durée de la génération des bulletins de tous les étudiants valides
+
+Compare un appel à generer_rapport_individuel par étudiant à la génération
+par lots (generer_bulletins) avec 1 puis plusieurs processus.
+
+Usage : python benchmarks/bench_bulletins.py [--tailles 1000,10000] [--processus 1,2,4] [--taille-lot 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.donnees_synthetiques import generer_csv
+from gestion_etudiants import GestionEtudiants
+from rapport_pdf import RapportPDF, nom_fichier_bulletin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="1000,10000")
+    parser.add_argument("--processus", default=f"1,{os.cpu_count() or 1}")
+    parser.add_argument("--taille-lot", type=int, default=50)
+    args = parser.parse_args()
+    processus = [int(p) for p in args.processus.split(",")]
+
+    print(f"{'étudiants':>10} {'un par un (s)':>14} " + " ".join(f"{f'{p} proc. (s)':>12}" for p in processus))
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(t) for t in args.tailles.split(",")):
+            gestion = GestionEtudiants()
+            gestion.charger_donnees_csv(generer_csv(os.path.join(dossier, "eleves.csv"), taille),
+                                        en_bloc=True, magasin_notes=True)
+            gestion.valider_donnees()
+            rapport = RapportPDF(gestion)
+
+            sortie = os.path.join(dossier, "un_par_un")
+            os.makedirs(sortie, exist_ok=True)
+            debut = time.perf_counter()
+            for etudiant in gestion.etudiants_valides:
+                rapport.generer_rapport_individuel(etudiant, os.path.join(sortie, nom_fichier_bulletin(etudiant)))
+            duree_serie = time.perf_counter() - debut
+
+            durees = []
+            for nb_processus in processus:
+                debut = time.perf_counter()
+                rapport.generer_bulletins(os.path.join(dossier, f"lots_{nb_processus}"), nb_processus=nb_processus,
+                                          taille_lot=args.taille_lot)
+                durees.append(time.perf_counter() - debut)
+            print(f"{taille:>10} {duree_serie:>14.2f} " + " ".join(f"{duree:>12.2f}" for duree in durees))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# bench_chargement_csv.py
+"""Compare le chargement CSV ligne par ligne (iterrows) et le chargement en bloc
+
+Usage : python benchmarks/bench_chargement_csv.py [--tailles 10000,100000,1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gestion_etudiants import GestionEtudiants
+from benchmarks.donnees_synthetiques import generer_csv
+
+
+def mesurer(chemin_fichier, en_bloc):
+    gestion = GestionEtudiants()
+    debut = time.perf_counter()
+    if not gestion.charger_donnees_csv(chemin_fichier, en_bloc=en_bloc):
+        raise RuntimeError("Échec du chargement")
+    return time.perf_counter() - debut, len(gestion.etudiants)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'lignes':>10} {'iterrows (s)':>14} {'en bloc (s)':>12} {'gain':>7}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(t) for t in args.tailles.split(",")):
+            chemin = generer_csv(os.path.join(dossier, f"eleves_{taille}.csv"), taille)
+            duree_lignes, nb_lignes = mesurer(chemin, en_bloc=False)
+            duree_bloc, nb_bloc = mesurer(chemin, en_bloc=True)
+            assert nb_lignes == nb_bloc == taille
+            print(f"{taille:>10} {duree_lignes:>14.3f} {duree_bloc:>12.3f} {duree_lignes / duree_bloc:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# bench_concurrence.py
+"""Lectures concurrentes pendant des imports : cohérence et débit
+
+Des fils lecteurs prennent l'instantané des données en boucle et vérifient
+qu'il est cohérent, pendant qu'un écrivain alterne deux imports de tailles
+différentes et des remplacements d'étudiants. Un instantané est incohérent
+si son nombre d'étudiants n'est celui d'aucun des deux fichiers (import à
+moitié chargé), si valides et invalides ne font pas le total ou si l'index
+des moyennes ne couvre pas exactement les valides.
+
+--sur-place reproduit l'ancien import (réinitialiser puis recharger le même
+GestionEtudiants) pour comparaison : les lecteurs y voient des états
+intermédiaires. En copie sur écriture, le script échoue s'il en voit un.
+
+Usage : python benchmarks/bench_concurrence.py [--etudiants 2000] [--fils 1,2,4,8] [--duree 3] [--sur-place]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.donnees_synthetiques import generer_csv
+from donnees_partagees import DonneesPartagees
+from entite.etudiant import Etudiant
+from export_import import ExportImport
+from gestion_etudiants import GestionEtudiants
+
+
+def verifier(gestion, tailles):
+    """Liste des incohérences d'un instantané (vide s'il est cohérent)"""
+    etudiants, valides, invalides = gestion.etudiants, gestion.etudiants_valides, gestion.etudiants_invalides
+    problemes = []
+    if len(etudiants) not in tailles:
+        problemes.append(f"{len(etudiants)} étudiants (attendu : {' ou '.join(map(str, tailles))})")
+    if len(valides) + len(invalides) != len(etudiants):
+        problemes.append(f"{len(valides)} valides + {len(invalides)} invalides != {len(etudiants)}")
+    if len(gestion.trier_par_moyenne()) != len(valides):
+        problemes.append(f"index des moyennes : {len(gestion.trier_par_moyenne())} pour {len(valides)} valides")
+    return problemes
+
+
+def ecrire_sur_place(gestion, chemins, arret):
+    # L'import d'avant la copie sur écriture
+    while not arret.is_set():
+        for chemin in chemins:
+            gestion.reinitialiser()
+            gestion.charger_donnees_csv(chemin)
+            gestion.valider_donnees()
+
+
+def ecrire_par_copie(partagees, chemins, arret):
+    export_import = ExportImport(partagees)
+
+    def remplacer_premier(gestion):
+        ancien = gestion.etudiants_valides[0]
+        nouveau = Etudiant.from_dict(ancien.to_dict())
+        nouveau.moyenne_generale = (ancien.moyenne_generale or 0) + 0.5
+        gestion.remplacer_etudiant(ancien, nouveau)
+
+    while not arret.is_set():
+        for chemin in chemins:
+            export_import.importer_csv(chemin)
+            for _ in range(5):
+                partagees.modifier(remplacer_premier)
+
+
+def mesurer(nb_fils, duree, lire, tailles, ecrire):
+    arret = threading.Event()
+    lectures = [0] * nb_fils
+    incoherences = []
+
+    def lecteur(numero):
+        while not arret.is_set():
+            problemes = verifier(lire(), tailles)
+            if problemes:
+                incoherences.append(problemes)
+            lectures[numero] += 1
+
+    fils = [threading.Thread(target=lecteur, args=(i,)) for i in range(nb_fils)]
+    fils.append(threading.Thread(target=ecrire, args=(arret,)))
+    for f in fils:
+        f.start()
+    time.sleep(duree)
+    arret.set()
+    for f in fils:
+        f.join()
+    return sum(lectures), incoherences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--etudiants", type=int, default=2000)
+    parser.add_argument("--fils", default="1,2,4,8")
+    parser.add_argument("--duree", type=float, default=3)
+    parser.add_argument("--sur-place", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        # Deux fichiers de tailles différentes : un import partiel se voit au total
+        chemins = [generer_csv(os.path.join(dossier, "a.csv"), args.etudiants, graine=1),
+                   generer_csv(os.path.join(dossier, "b.csv"), args.etudiants // 2, graine=2)]
+        tailles = (args.etudiants, args.etudiants // 2)
+        gestion = GestionEtudiants()
+        gestion.charger_donnees_csv(chemins[0])
+        gestion.valider_donnees()
+
+        if args.sur_place:
+            lire = lambda: gestion
+            ecrire = lambda arret: ecrire_sur_place(gestion, chemins, arret)
+        else:
+            partagees = DonneesPartagees(gestion)
+            lire = partagees.instantane
+            ecrire = lambda arret: ecrire_par_copie(partagees, chemins, arret)
+
+        print(f"mode : {'sur place' if args.sur_place else 'copie sur écriture'}")
+        print(f"{'fils':>5} {'lectures':>10} {'lectures/s':>11} {'incohérentes':>13}")
+        total_incoherences = 0
+        for nb_fils in (int(f) for f in args.fils.split(",")):
+            lectures, incoherences = mesurer(nb_fils, args.duree, lire, tailles, ecrire)
+            total_incoherences += len(incoherences)
+            print(f"{nb_fils:>5} {lectures:>10} {lectures / args.duree:>11.0f} {len(incoherences):>13}")
+            if incoherences:
+                print(f"      ex. : {'; '.join(incoherences[0])}")
+        if not args.sur_place:
+            print(f"{partagees.publications} instantanés publiés par l'écrivain")
+            if total_incoherences:
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
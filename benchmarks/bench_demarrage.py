@@ -0,0 +1,86 @@
+# bench_demarrage.py
+"""Temps de démarrage et mémoire résidente d'un worker de l'API
+
+Chaque mesure se fait dans un processus neuf, comme un worker gunicorn :
+- import de main (chargement des modules)
+- première requête (/health, qui initialise l'application)
+- prechauffer() (pandas, matplotlib, fpdf et premier rendu)
+avec la mémoire résidente (RSS) après chaque étape. Les valeurs affichées
+sont les médianes des répétitions.
+
+Usage : python benchmarks/bench_demarrage.py [--repetitions 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Exécuté dans chaque processus mesuré
+MESURE = """
+import json, resource, sys, time
+
+def rss_mo():
+    try:
+        with open('/proc/self/status') as statut:
+            for ligne in statut:
+                if ligne.startswith('VmRSS:'):
+                    return int(ligne.split()[1]) / 1024
+    except OSError:
+        pass
+    # Ailleurs que sous Linux : pic de mémoire résidente
+    pic = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pic / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+debut = time.perf_counter()
+import main
+import_s = time.perf_counter() - debut
+rss_import = rss_mo()
+
+debut = time.perf_counter()
+main.app.test_client().get('/health')
+requete_s = time.perf_counter() - debut
+rss_requete = rss_mo()
+
+debut = time.perf_counter()
+main.prechauffer()
+prechauffage_s = time.perf_counter() - debut
+
+print(json.dumps({
+    "import_ms": import_s * 1000, "rss_import": rss_import,
+    "requete_ms": requete_s * 1000, "rss_requete": rss_requete,
+    "prechauffage_ms": prechauffage_s * 1000, "rss_prechauffe": rss_mo(),
+}))
+"""
+
+COLONNES = (
+    ("import_ms", "import (ms)"),
+    ("rss_import", "RSS import (Mo)"),
+    ("requete_ms", "1re requête (ms)"),
+    ("rss_requete", "RSS requête (Mo)"),
+    ("prechauffage_ms", "préchauffage (ms)"),
+    ("rss_prechauffe", "RSS préchauffé (Mo)"),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args()
+
+    mesures = []
+    for _ in range(args.repetitions):
+        sortie = subprocess.run([sys.executable, "-c", MESURE], cwd=RACINE, capture_output=True, text=True,
+                                check=True)
+        # Les messages de l'application (connexions...) précèdent la mesure
+        mesures.append(json.loads(sortie.stdout.strip().splitlines()[-1]))
+
+    print(" ".join(f"{titre:>20}" for _, titre in COLONNES))
+    print(" ".join(f"{statistics.median(m[cle] for m in mesures):>20.1f}" for cle, _ in COLONNES))
+
+
+if __name__ == "__main__":
+    main()
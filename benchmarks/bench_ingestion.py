@@ -0,0 +1,82 @@
+# bench_ingestion.py
+"""Mesure la mémoire maximale de l'ingestion par morceaux selon la taille du fichier
+
+Chaque mesure tourne dans un processus séparé pour lire son pic de RSS.
+Les lignes valides et invalides sont écrites dans des fichiers.
+
+Usage : python benchmarks/bench_ingestion.py [--tailles 100000,1000000] [--taille-morceau 50000]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from benchmarks.donnees_synthetiques import generer_csv
+
+
+def executer(chemin_fichier, dossier, taille_morceau, complet):
+    """Ingestion dans le processus courant ; affiche durée et pic de RSS"""
+    from ingestion import PipelineIngestion, SortieFichier, SortieErreurs
+    from service import Service
+    import pandas as pd
+
+    debut = time.perf_counter()
+    if complet:
+        service = Service()
+        service.valider_donnees(pd.read_csv(chemin_fichier))
+        for sortie, lignes in ((SortieFichier(os.path.join(dossier, "valides.csv")), service.lignes_valides),
+                               (SortieErreurs(os.path.join(dossier, "erreurs.csv")), service.lignes_invalides)):
+            sortie.ecrire(lignes)
+            sortie.fermer()
+    else:
+        PipelineIngestion(
+            sorties_valides=[SortieFichier(os.path.join(dossier, "valides.csv"))],
+            sorties_invalides=[SortieErreurs(os.path.join(dossier, "erreurs.csv"))],
+            taille_morceau=taille_morceau,
+        ).executer(chemin_fichier)
+    duree = time.perf_counter() - debut
+    pic_ko = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{duree} {pic_ko}")
+
+
+def mesurer(chemin_fichier, dossier, taille_morceau, complet):
+    sortie = subprocess.run(
+        [sys.executable, __file__, "--executer", chemin_fichier, "--dossier", dossier,
+         "--taille-morceau", str(taille_morceau)] + (["--complet"] if complet else []),
+        check=True, capture_output=True, text=True, cwd=RACINE,
+    ).stdout.split()
+    return float(sortie[0]), int(sortie[1]) / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="100000,500000,1000000")
+    parser.add_argument("--taille-morceau", type=int, default=50000)
+    parser.add_argument("--executer")
+    parser.add_argument("--dossier")
+    parser.add_argument("--complet", action="store_true")
+    args = parser.parse_args()
+
+    if args.executer:
+        executer(args.executer, args.dossier, args.taille_morceau, args.complet)
+        return
+
+    print(f"{'lignes':>10} {'fichier (Mo)':>13} {'complet: s / pic Mo':>22} {'morceaux: s / pic Mo':>23}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(t) for t in args.tailles.split(",")):
+            chemin = generer_csv(os.path.join(dossier, f"eleves_{taille}.csv"), taille)
+            taille_fichier = os.path.getsize(chemin) / 1024 / 1024
+            duree_complet, pic_complet = mesurer(chemin, dossier, args.taille_morceau, complet=True)
+            duree_morceaux, pic_morceaux = mesurer(chemin, dossier, args.taille_morceau, complet=False)
+            print(f"{taille:>10} {taille_fichier:>13.1f} {duree_complet:>10.2f} / {pic_complet:>8.0f} "
+                  f"{duree_morceaux:>11.2f} / {pic_morceaux:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
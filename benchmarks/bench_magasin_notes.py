@@ -0,0 +1,53 @@
+# bench_magasin_notes.py
+"""Compare les notes en dictionnaires et le magasin de notes en colonnes
+
+Mesure la mémoire par étudiant après chargement et le temps de recalcul de
+toutes les moyennes.
+
+Usage : python benchmarks/bench_magasin_notes.py [--tailles 10000,100000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gestion_etudiants import GestionEtudiants
+from benchmarks.donnees_synthetiques import generer_csv
+
+
+def mesurer(chemin_fichier, magasin_notes):
+    tracemalloc.start()
+    gestion = GestionEtudiants()
+    gestion.charger_donnees_csv(chemin_fichier, en_bloc=True, magasin_notes=magasin_notes)
+    memoire, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    debut = time.perf_counter()
+    gestion.recalculer_moyennes()
+    gestion.moyennes_par_matiere()
+    duree = time.perf_counter() - debut
+    return memoire / len(gestion.etudiants), duree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'lignes':>10} {'octets/étudiant':>26} {'recalcul des moyennes (ms)':>30}")
+    print(f"{'':>10} {'dict':>12} {'magasin':>13} {'dict':>14} {'magasin':>15}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(t) for t in args.tailles.split(",")):
+            chemin = generer_csv(os.path.join(dossier, f"eleves_{taille}.csv"), taille)
+            memoire_dict, duree_dict = mesurer(chemin, magasin_notes=False)
+            memoire_magasin, duree_magasin = mesurer(chemin, magasin_notes=True)
+            print(f"{taille:>10} {memoire_dict:>12.0f} {memoire_magasin:>13.0f} "
+                  f"{duree_dict * 1000:>14.1f} {duree_magasin * 1000:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
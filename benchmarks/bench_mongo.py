@@ -0,0 +1,69 @@
+# bench_mongo.py
+"""Durée de l'enregistrement des étudiants dans MongoDB avec DepotMongo
+
+Compare les écritures par lots (bulk_write non ordonné) à une écriture
+par document. Nécessite un serveur MongoDB (MONGODB_URI, localhost par défaut) ;
+la base de mesure est supprimée à la fin.
+
+Usage : python benchmarks/bench_mongo.py [--tailles 10000,100000,1000000] [--taille-lot 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.donnees_synthetiques import generer_csv
+from connexion.db_connexion import obtenir_client
+from depot_mongo import DepotMongo
+from gestion_etudiants import GestionEtudiants
+
+BASE = "bench_gestion_etudiants"
+# Au-delà, l'insertion document par document prend trop de temps
+TAILLE_MAX_UNITAIRE = 20000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="10000,100000,1000000")
+    parser.add_argument("--taille-lot", type=int, default=5000)
+    args = parser.parse_args()
+
+    client = obtenir_client()
+    print(f"{'étudiants':>10} {'par lots (s)':>13} {'relecture (s)':>14} {'unitaire (s)':>13}")
+    try:
+        with tempfile.TemporaryDirectory() as dossier:
+            for taille in (int(t) for t in args.tailles.split(",")):
+                client.drop_database(BASE)
+                gestion = GestionEtudiants()
+                gestion.charger_donnees_csv(generer_csv(os.path.join(dossier, "eleves.csv"), taille),
+                                            en_bloc=True, magasin_notes=True)
+                gestion.valider_donnees()
+
+                depot = DepotMongo(client[BASE], taille_lot=args.taille_lot)
+                depot.creer_index()
+                debut = time.perf_counter()
+                depot.sauvegarder(gestion)
+                duree_lots = time.perf_counter() - debut
+
+                debut = time.perf_counter()
+                depot.charger(GestionEtudiants())
+                duree_relecture = time.perf_counter() - debut
+
+                unitaire = "-"
+                if taille <= TAILLE_MAX_UNITAIRE:
+                    depot = DepotMongo(client[BASE], nom_collection="unitaire", taille_lot=1)
+                    depot.creer_index()
+                    debut = time.perf_counter()
+                    depot.sauvegarder(gestion)
+                    unitaire = f"{time.perf_counter() - debut:.2f}"
+
+                print(f"{taille:>10} {duree_lots:>13.2f} {duree_relecture:>14.2f} {unitaire:>13}")
+    finally:
+        client.drop_database(BASE)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# bench_rapport_classe.py
+"""Latence de generer_rapport_classe, seule puis sous charge concurrente
+
+Chaque classe des données synthétiques fait l'objet d'un rapport ; la
+mesure est répétée avec plusieurs fils qui génèrent des rapports en même
+temps. Les rapports en échec sont comptés.
+
+Usage : python benchmarks/bench_rapport_classe.py [--etudiants 2000] [--repetitions 5] [--fils 1,4]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.donnees_synthetiques import generer_csv
+from gestion_etudiants import GestionEtudiants
+from rapport_pdf import RapportPDF
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--etudiants", type=int, default=2000)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--fils", default="1,4")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as dossier:
+        gestion = GestionEtudiants()
+        gestion.charger_donnees_csv(generer_csv(os.path.join(dossier, "eleves.csv"), args.etudiants),
+                                    en_bloc=True, magasin_notes=True)
+        gestion.valider_donnees()
+        rapport = RapportPDF(gestion)
+        classes = sorted({etudiant.classe for etudiant in gestion.etudiants_valides})
+        travaux = [(classe, i) for i in range(args.repetitions) for classe in classes]
+
+        def generer(travail):
+            classe, i = travail
+            debut = time.perf_counter()
+            succes, _ = rapport.generer_rapport_classe(classe, os.path.join(dossier, f"{classe}_{i}.pdf"))
+            return time.perf_counter() - debut, succes
+
+        print(f"{'fils':>5} {'rapports':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'débit (/s)':>11} {'échecs':>7}")
+        for nb_fils in (int(f) for f in args.fils.split(",")):
+            debut = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=nb_fils) as executor:
+                resultats = list(executor.map(generer, travaux))
+            duree = time.perf_counter() - debut
+            latences = sorted(latence * 1000 for latence, _ in resultats)
+            p95 = latences[min(len(latences) - 1, int(len(latences) * 0.95))]
+            echecs = sum(1 for _, succes in resultats if not succes)
+            print(f"{nb_fils:>5} {len(latences):>9} {statistics.median(latences):>9.1f} {p95:>9.1f} "
+                  f"{len(latences) / duree:>11.1f} {echecs:>7}")
+
+
+if __name__ == "__main__":
+    main()
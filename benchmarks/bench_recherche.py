@@ -0,0 +1,73 @@
+# bench_recherche.py
+"""Latence des recherches par nom, classe et numéro selon le nombre d'étudiants
+
+Compare les index de GestionEtudiants à un parcours complet de la liste
+(l'ancienne implémentation de rechercher_par_nom).
+
+Usage : python benchmarks/bench_recherche.py [--tailles 1000,10000,100000,1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entite.etudiant import Etudiant
+from gestion_etudiants import GestionEtudiants
+from benchmarks.donnees_synthetiques import ALPHABET, CLASSES
+
+NB_REQUETES = 200
+
+
+def creer_gestion(taille, rng):
+    gestion = GestionEtudiants()
+    gestion.ajouter_etudiants(
+        (
+            Etudiant(
+                code=f"E{i}",
+                numero="".join(rng.choice(ALPHABET) for _ in range(7)),
+                nom=f"Nom{rng.randrange(max(taille // 10, 1))}",
+                prenom="Prenom",
+                classe=rng.choice(CLASSES),
+            )
+            for i in range(taille)
+        ),
+        valide=True,
+    )
+    return gestion
+
+
+def parcours_complet(gestion, nom):
+    return [e for e in gestion.etudiants_valides if e.nom.lower() == nom.lower()]
+
+
+def latence_us(fonction, requetes):
+    debut = time.perf_counter()
+    for requete in requetes:
+        fonction(requete)
+    return (time.perf_counter() - debut) / len(requetes) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="1000,10000,100000,1000000")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'étudiants':>10} {'nom (µs)':>10} {'classe (µs)':>12} {'numéro (µs)':>12} {'parcours (µs)':>14}")
+    for taille in (int(t) for t in args.tailles.split(",")):
+        gestion = creer_gestion(taille, rng)
+        etudiants = [rng.choice(gestion.etudiants_valides) for _ in range(NB_REQUETES)]
+        noms = [e.nom.upper() for e in etudiants]
+        numeros = [e.numero for e in etudiants]
+        classes = [e.classe for e in etudiants]
+        print(f"{taille:>10} {latence_us(gestion.rechercher_par_nom, noms):>10.2f} "
+              f"{latence_us(gestion.rechercher_par_classe, classes):>12.2f} "
+              f"{latence_us(gestion.rechercher_par_numero, numeros):>12.2f} "
+              f"{latence_us(lambda nom: parcours_complet(gestion, nom), noms[:20]):>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
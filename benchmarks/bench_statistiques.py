@@ -0,0 +1,48 @@
+# bench_statistiques.py
+"""Durée des statistiques détaillées par classe et par matière selon le nombre d'étudiants
+
+La première mesure inclut la construction des colonnes de la cohorte (une
+fois par version des données) ; les suivantes ne font que les passes
+vectorisées.
+
+Usage : python benchmarks/bench_statistiques.py [--tailles 100000,1000000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.donnees_synthetiques import generer_csv
+from gestion_etudiants import GestionEtudiants
+from statistiques import GROUPES
+
+
+def mesurer(fonction):
+    debut = time.perf_counter()
+    fonction()
+    return time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="100000,1000000")
+    args = parser.parse_args()
+
+    print(f"{'étudiants':>10} {'colonnes (s)':>13} " + " ".join(f"{groupe + ' (ms)':>20}" for groupe in GROUPES))
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(t) for t in args.tailles.split(",")):
+            gestion = GestionEtudiants()
+            gestion.charger_donnees_csv(generer_csv(os.path.join(dossier, "eleves.csv"), taille),
+                                        en_bloc=True, magasin_notes=True)
+            gestion.valider_donnees()
+
+            premiere = mesurer(lambda: gestion.statistiques_detaillees("classe"))
+            durees = [mesurer(lambda: gestion.statistiques_detaillees(groupe)) * 1000 for groupe in GROUPES]
+            print(f"{taille:>10} {premiere:>13.2f} " + " ".join(f"{duree:>20.1f}" for duree in durees))
+
+
+if __name__ == "__main__":
+    main()
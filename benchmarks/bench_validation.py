@@ -0,0 +1,60 @@
+# bench_validation.py
+"""Compare les modes de validation de Service.valider_donnees
+
+Ligne par ligne, par lot, puis par lot dans un pool de 1 à N processus.
+
+Usage : python benchmarks/bench_validation.py [--tailles 10000,100000,1000000]
+                                              [--processus 1,2,4,8] [--taille-morceau 50000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from service import Service
+from benchmarks.donnees_synthetiques import generer_csv
+
+
+def mesurer(df, **options):
+    service = Service()
+    debut = time.perf_counter()
+    service.valider_donnees(df.copy(), **options)
+    return time.perf_counter() - debut, len(service.lignes_valides)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tailles", default="10000,100000,1000000")
+    parser.add_argument("--processus", default=f"1,2,4,{os.cpu_count() or 1}")
+    parser.add_argument("--taille-morceau", type=int, default=50000)
+    args = parser.parse_args()
+    nb_processus = sorted({int(n) for n in args.processus.split(",")})
+
+    tailles_df = {}
+    print(f"{'lignes':>10} {'ligne par ligne (s)':>20} {'par lot (s)':>12} {'gain':>7}")
+    with tempfile.TemporaryDirectory() as dossier:
+        for taille in (int(t) for t in args.tailles.split(",")):
+            df = pd.read_csv(generer_csv(os.path.join(dossier, f"eleves_{taille}.csv"), taille))
+            duree_lignes, valides_lignes = mesurer(df, par_lot=False)
+            duree_lot, valides_lot = mesurer(df)
+            assert valides_lignes == valides_lot
+            print(f"{taille:>10} {duree_lignes:>20.3f} {duree_lot:>12.3f} {duree_lignes / duree_lot:>6.1f}x")
+            tailles_df[taille] = df
+
+    print(f"\nValidation par lot en parallèle (morceaux de {args.taille_morceau} lignes)")
+    print(f"{'lignes':>10} {'processus':>10} {'durée (s)':>10} {'accélération':>13}")
+    for taille, df in tailles_df.items():
+        reference = None
+        for n in nb_processus:
+            duree, _ = mesurer(df, nb_processus=n, taille_morceau=args.taille_morceau)
+            reference = reference or duree
+            print(f"{taille:>10} {n:>10} {duree:>10.3f} {reference / duree:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
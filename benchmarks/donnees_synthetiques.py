@@ -0,0 +1,42 @@
+# donnees_synthetiques.py
+"""Génère des fichiers CSV au format de donnees_eleves.csv pour les benchmarks"""
+import csv
+import random
+
+NOMS = ["Diop", "Fall", "Sall", "Ndiaye", "Diallo", "Baal", "Sow", "Faye", "Gueye", "Kane"]
+PRENOMS = ["Amadou", "Fatou", "Omar", "Sidy", "Nourou", "Thierno", "Awa", "Rama", "Kine", "Modou"]
+CLASSES = ["3emA", "3emB", "4emA", "4emB", "5emA", "5emB", "6emA", "6emB"]
+MATIERES = ["Math", "Francais", "Anglais", "PC", "SVT", "HG"]
+ENTETE = ["CODE", "Numero", "Nom", "Prenom", "Date de naissance", "Classe", "Note"]
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def generer_ligne(rng, index):
+    """Génère une ligne d'élève (environ 10% de lignes invalides)"""
+    numero = "".join(rng.choice(ALPHABET) for _ in range(7))
+    if index % 10 == 9:
+        numero = numero[:5]
+    notes = []
+    for matiere in MATIERES:
+        devoirs = "|".join(str(rng.randint(0, 20)) for _ in range(rng.randint(1, 3)))
+        notes.append(f"{matiere}[{devoirs}:{rng.randint(0, 20)}]")
+    return [
+        f"AAD{index % 1000:03d}",
+        numero,
+        rng.choice(NOMS),
+        rng.choice(PRENOMS),
+        f"{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/{rng.randint(0, 12):02d}",
+        rng.choice(CLASSES),
+        "#".join(notes),
+    ]
+
+
+def generer_csv(chemin_fichier, nb_lignes, graine=42):
+    """Écrit un fichier CSV de nb_lignes élèves"""
+    rng = random.Random(graine)
+    with open(chemin_fichier, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(ENTETE)
+        for index in range(nb_lignes):
+            writer.writerow(generer_ligne(rng, index))
+    return chemin_fichier
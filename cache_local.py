@@ -0,0 +1,87 @@
+# cache_local.py
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheLocal:
+    """Cache LRU en mémoire du processus, borné en nombre d'entrées et en octets
+
+    Chaque entrée a sa propre date d'expiration. Les compteurs (succès,
+    échecs, évictions, expirations) servent à dimensionner le cache.
+    """
+
+    def __init__(self, taille_max=1000, octets_max=32 * 1024 * 1024, ttl=30):
+        self.taille_max = taille_max
+        self.octets_max = octets_max
+        self.ttl = ttl
+        self._entrees = OrderedDict()  # cle -> (valeur, taille, expiration)
+        self._octets = 0
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def obtenir(self, cle):
+        """(True, valeur) si la clé est présente et non expirée, sinon (False, None)"""
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None and entree[2] <= time.monotonic():
+                self._retirer(cle)
+                self.expirations += 1
+                entree = None
+            if entree is None:
+                self.echecs += 1
+                return False, None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return True, entree[0]
+
+    def enregistrer(self, cle, valeur, taille, ttl=None):
+        """Ajoute une entrée de taille octets, expirant après ttl secondes
+
+        La durée de vie est bornée par self.ttl ; une entrée plus grosse que
+        tout le cache n'est pas conservée.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._verrou:
+            self._retirer(cle)
+            if taille > self.octets_max or ttl <= 0:
+                return
+            self._entrees[cle] = (valeur, taille, time.monotonic() + ttl)
+            self._octets += taille
+            while len(self._entrees) > self.taille_max or self._octets > self.octets_max:
+                _, (_, taille_ancienne, _) = self._entrees.popitem(last=False)
+                self._octets -= taille_ancienne
+                self.evictions += 1
+
+    def retirer(self, cle):
+        with self._verrou:
+            self._retirer(cle)
+
+    def _retirer(self, cle):
+        entree = self._entrees.pop(cle, None)
+        if entree is not None:
+            self._octets -= entree[1]
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._octets = 0
+
+    def statistiques(self):
+        """Compteurs et occupation du cache"""
+        with self._verrou:
+            demandes = self.succes + self.echecs
+            return {
+                "entrees": len(self._entrees),
+                "octets": self._octets,
+                "taille_max": self.taille_max,
+                "octets_max": self.octets_max,
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "taux_succes": round(self.succes / demandes, 4) if demandes else None,
+            }
@@ -0,0 +1,208 @@
+# cache_rapports.py
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+def cle_contenu(*donnees):
+    """Empreinte (blake2b) des données d'entrée d'un rapport
+
+    Les données sont encodées en JSON, clés triées : deux entrées égales
+    donnent la même clé quel que soit l'ordre des dictionnaires.
+    """
+    encodees = json.dumps(donnees, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(encodees.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class StockageDisque:
+    """Rapports stockés dans un dossier local, un fichier par clé
+
+    L'écriture passe par un fichier temporaire renommé : plusieurs processus
+    peuvent partager le dossier. Au-delà de octets_max, les fichiers les
+    moins récemment lus sont supprimés (date de modification, mise à jour
+    à chaque lecture).
+    """
+
+    def __init__(self, dossier, octets_max=256 * 1024 * 1024):
+        self.dossier = dossier
+        self.octets_max = octets_max
+        os.makedirs(dossier, exist_ok=True)
+        self._verrou = threading.Lock()
+        self._octets = self._occupation()
+        self.evictions = 0
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, f"{cle}.pdf")
+
+    def _occupation(self):
+        return sum(entree.stat().st_size for entree in os.scandir(self.dossier) if entree.name.endswith(".pdf"))
+
+    def lire(self, cle):
+        chemin = self._chemin(cle)
+        try:
+            with open(chemin, 'rb') as fichier:
+                contenu = fichier.read()
+            os.utime(chemin)
+            return contenu
+        except FileNotFoundError:
+            return None
+
+    def ecrire(self, cle, contenu):
+        if len(contenu) > self.octets_max:
+            return
+        chemin = self._chemin(cle)
+        if os.path.exists(chemin):
+            # Même clé, même contenu
+            return
+        temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporaire, 'wb') as fichier:
+            fichier.write(contenu)
+        os.replace(temporaire, chemin)
+        with self._verrou:
+            self._octets += len(contenu)
+            if self._octets > self.octets_max:
+                self._evincer()
+
+    def _evincer(self):
+        # Les autres processus écrivent aussi dans le dossier : on repart de
+        # son contenu réel, du plus ancien au plus récent
+        entrees = []
+        for entree in os.scandir(self.dossier):
+            if entree.name.endswith(".pdf"):
+                try:
+                    statut = entree.stat()
+                except FileNotFoundError:
+                    continue
+                entrees.append((statut.st_mtime, statut.st_size, entree.path))
+        entrees.sort()
+        self._octets = sum(taille for _, taille, _ in entrees)
+        # Descendre sous 90 % de la limite pour ne pas évincer à chaque écriture
+        cible = self.octets_max * 0.9
+        for _, taille, chemin in entrees:
+            if self._octets <= cible:
+                break
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+            self._octets -= taille
+            self.evictions += 1
+
+    def vider(self):
+        with self._verrou:
+            for entree in os.scandir(self.dossier):
+                if entree.name.endswith(".pdf"):
+                    os.remove(entree.path)
+            self._octets = 0
+
+    def statistiques(self):
+        return {"type": "disque", "octets": self._octets, "octets_max": self.octets_max,
+                "evictions": self.evictions}
+
+
+class StockageRedis:
+    """Rapports stockés dans Redis, bornés à octets_max au total
+
+    Chaque rapport est une clé ; un ensemble trié garde la date de dernière
+    lecture de chaque clé et un hachage sa taille. Au-delà de octets_max, les
+    rapports les moins récemment lus sont supprimés. La borne est
+    approximative quand plusieurs processus écrivent en même temps.
+    """
+
+    def __init__(self, redis_client, octets_max=64 * 1024 * 1024, prefixe="gestion_etudiants:rapports:"):
+        # Le client doit rendre des octets (decode_responses=False)
+        self.redis = redis_client
+        self.octets_max = octets_max
+        self.prefixe = prefixe
+        self.cle_acces = f"{prefixe}acces"
+        self.cle_tailles = f"{prefixe}tailles"
+        self.cle_octets = f"{prefixe}octets"
+        self.evictions = 0
+
+    def lire(self, cle):
+        contenu = self.redis.get(f"{self.prefixe}{cle}")
+        if contenu is not None:
+            self.redis.zadd(self.cle_acces, {cle: time.time()})
+        return contenu
+
+    def ecrire(self, cle, contenu):
+        if len(contenu) > self.octets_max:
+            return
+        # Même clé, même contenu : seul le premier écrivain compte la taille
+        if not self.redis.set(f"{self.prefixe}{cle}", contenu, nx=True):
+            return
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.zadd(self.cle_acces, {cle: time.time()})
+        pipe.hset(self.cle_tailles, cle, len(contenu))
+        pipe.incrby(self.cle_octets, len(contenu))
+        octets = pipe.execute()[-1]
+        if octets > self.octets_max:
+            self._evincer(octets)
+
+    def _evincer(self, octets, taille_lot=20):
+        # Descendre sous 90 % de la limite pour ne pas évincer à chaque écriture
+        cible = self.octets_max * 0.9
+        while octets > cible:
+            anciennes = [cle for cle, _ in self.redis.zpopmin(self.cle_acces, taille_lot)]
+            if not anciennes:
+                break
+            tailles = self.redis.hmget(self.cle_tailles, anciennes)
+            liberes = sum(int(taille or 0) for taille in tailles)
+            pipe = self.redis.pipeline(transaction=True)
+            pipe.unlink(*(self.prefixe.encode() + cle for cle in anciennes))
+            pipe.hdel(self.cle_tailles, *anciennes)
+            pipe.decrby(self.cle_octets, liberes)
+            octets = pipe.execute()[-1]
+            self.evictions += len(anciennes)
+
+    def vider(self):
+        cles = [self.prefixe.encode() + cle for cle in self.redis.zrange(self.cle_acces, 0, -1)]
+        self.redis.delete(self.cle_acces, self.cle_tailles, self.cle_octets, *cles)
+
+    def statistiques(self):
+        return {"type": "redis", "octets": int(self.redis.get(self.cle_octets) or 0), "octets_max": self.octets_max,
+                "evictions": self.evictions}
+
+
+class CacheRapports:
+    """Cache des PDF générés, adressés par le contenu de leurs données d'entrée
+
+    La clé (cle_contenu) couvre les données du rapport et la version des
+    modèles : tant qu'elles ne changent pas, les octets stockés sont rendus
+    sans recomposer le PDF. Une erreur du stockage n'empêche pas la
+    génération.
+    """
+
+    def __init__(self, stockage):
+        self.stockage = stockage
+        self.succes = 0
+        self.echecs = 0
+
+    def obtenir_ou_generer(self, cle, generer):
+        """Octets du rapport de clé cle, générés par generer() s'ils ne sont pas en cache"""
+        try:
+            contenu = self.stockage.lire(cle)
+        except Exception as e:
+            print(f"Erreur lors de la lecture du cache des rapports: {str(e)}")
+            contenu = None
+        if contenu is not None:
+            self.succes += 1
+            return contenu
+        self.echecs += 1
+        contenu = generer()
+        try:
+            self.stockage.ecrire(cle, contenu)
+        except Exception as e:
+            print(f"Erreur lors de l'écriture dans le cache des rapports: {str(e)}")
+        return contenu
+
+    def statistiques(self):
+        demandes = self.succes + self.echecs
+        return {
+            **self.stockage.statistiques(),
+            "succes": self.succes,
+            "echecs": self.echecs,
+            "taux_succes": round(self.succes / demandes, 4) if demandes else None,
+        }
@@ -1,30 +1,92 @@
 # cache_redis.py
 import json
-import pickle
+import os
+from serialisation import Serialiseur
 
 class CacheRedis:
-    def __init__(self, redis_client):
+    def __init__(self, redis_client, cache_local=None, serialiseur=None):
+        # Le client doit rendre des octets (decode_responses=False) : les
+        # valeurs sérialisées sont binaires
         self.redis = redis_client
+        self.serialiseur = serialiseur or Serialiseur()
         self.prefix = "gestion_etudiants:"
         self.ttl = 3600  # 1 heure par défaut
+        # Cache de premier niveau (CacheLocal) optionnel, dans le processus
+        self.cache_local = cache_local
+        self.canal_invalidation = f"{self.prefix}invalidation"
+        self._ecoute = None
+        self._ecoute_pid = None
+        self._ecouter_invalidations()
     
     def set_ttl(self, ttl):
         """Définit le TTL (Time-To-Live) pour les clés en cache"""
         self.ttl = ttl
     
-    def mettre_en_cache(self, cle, valeur):
-        """Met une valeur en cache"""
+    def _serialiser(self, valeur):
+        return self.serialiseur.serialiser(valeur)
+    
+    def _deserialiser(self, valeur):
+        return self.serialiseur.deserialiser(valeur)
+    
+    @staticmethod
+    def _taille(valeur):
+        return len(valeur) if isinstance(valeur, bytes) else len(str(valeur).encode('utf-8'))
+    
+    def _origine(self):
+        # Le pid distingue aussi les processus issus d'un fork
+        return f"{os.getpid()}:{id(self)}"
+    
+    def _ecouter_invalidations(self):
+        """Abonne le processus aux invalidations publiées par les autres
+
+        Le fil d'écoute ne survit pas à un fork : il est relancé dès que le
+        pid change.
+        """
+        if self.cache_local is None or self._ecoute_pid == os.getpid():
+            return
+        self._ecoute_pid = os.getpid()
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.canal_invalidation: self._recevoir_invalidation})
+            self._ecoute = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as e:
+            print(f"Erreur lors de l'abonnement aux invalidations: {str(e)}")
+    
+    def _recevoir_invalidation(self, message):
+        try:
+            donnees = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if donnees.get("origine") == self._origine():
+            return
+        if donnees.get("cles") is None:
+            self.cache_local.vider()
+        else:
+            for cle in donnees["cles"]:
+                self.cache_local.retirer(cle)
+    
+    def _publier_invalidation(self, cles_completes):
+        """Demande aux autres processus d'oublier ces clés (None : toutes)"""
+        if self.cache_local is None:
+            return
+        try:
+            self.redis.publish(self.canal_invalidation, json.dumps({
+                "origine": self._origine(), "cles": cles_completes
+            }))
+        except Exception as e:
+            print(f"Erreur lors de la publication d'une invalidation: {str(e)}")
+    
+    def mettre_en_cache(self, cle, valeur, ttl=None):
+        """Met une valeur en cache (ttl en secondes, self.ttl par défaut)"""
         try:
             # Créer une clé préfixée
             cle_complete = f"{self.prefix}{cle}"
+            valeur_serialisee = self._serialiser(valeur)
+            self.redis.set(cle_complete, valeur_serialisee, ex=ttl or self.ttl)
             
-            # Si la valeur est complexe, la sérialiser
-            if isinstance(valeur, (dict, list, set, tuple)) or hasattr(valeur, "__dict__"):
-                valeur_serialisee = pickle.dumps(valeur)
-                self.redis.set(cle_complete, valeur_serialisee, ex=self.ttl)
-            else:
-                self.redis.set(cle_complete, str(valeur), ex=self.ttl)
-                
+            if self.cache_local is not None:
+                self.cache_local.enregistrer(cle_complete, valeur, self._taille(valeur_serialisee), ttl or self.ttl)
+                self._publier_invalidation([cle_complete])
             return True
         except Exception as e:
             print(f"Erreur lors de la mise en cache: {str(e)}")
@@ -36,39 +98,188 @@ class CacheRedis:
             # Créer une clé préfixée
             cle_complete = f"{self.prefix}{cle}"
             
+            # Premier niveau : la mémoire du processus
+            if self.cache_local is not None:
+                self._ecouter_invalidations()
+                present, valeur = self.cache_local.obtenir(cle_complete)
+                if present:
+                    return valeur
+            
             # Récupérer du cache
-            valeur = self.redis.get(cle_complete)
+            valeur_serialisee = self.redis.get(cle_complete)
             
-            if valeur is None:
+            if valeur_serialisee is None:
                 return None
-                
-            # Essayer de désérialiser la valeur
-            try:
-                return pickle.loads(valeur)
-            except:
-                # Si la désérialisation échoue, retourner la valeur telle quelle
-                return valeur.decode('utf-8') if isinstance(valeur, bytes) else valeur
+            valeur = self._deserialiser(valeur_serialisee)
+            if self.cache_local is not None:
+                self.cache_local.enregistrer(cle_complete, valeur, self._taille(valeur_serialisee))
+            return valeur
                 
         except Exception as e:
             print(f"Erreur lors de la récupération du cache: {str(e)}")
             return None
     
+    def mettre_en_cache_multi(self, valeurs, ttl=None):
+        """Met en cache un dictionnaire {cle: valeur} en un seul aller-retour
+
+        MSET ne sait pas fixer de durée de vie : les SET EX sont envoyés
+        ensemble dans un pipeline (sans transaction).
+        """
+        try:
+            pipeline = self.redis.pipeline(transaction=False)
+            cles_completes = []
+            for cle, valeur in valeurs.items():
+                cle_complete = f"{self.prefix}{cle}"
+                valeur_serialisee = self._serialiser(valeur)
+                pipeline.set(cle_complete, valeur_serialisee, ex=ttl or self.ttl)
+                if self.cache_local is not None:
+                    self.cache_local.enregistrer(cle_complete, valeur, self._taille(valeur_serialisee), ttl or self.ttl)
+                cles_completes.append(cle_complete)
+            pipeline.execute()
+            self._publier_invalidation(cles_completes)
+            return True
+        except Exception as e:
+            print(f"Erreur lors de la mise en cache multiple: {str(e)}")
+            return False
+    
+    def recuperer_multi(self, cles):
+        """Récupère plusieurs valeurs avec un seul MGET
+
+        Retourne {cle: valeur} pour les seules clés présentes dans le cache.
+        """
+        resultats = {}
+        manquantes = list(cles)
+        try:
+            if self.cache_local is not None:
+                self._ecouter_invalidations()
+                restantes = []
+                for cle in manquantes:
+                    present, valeur = self.cache_local.obtenir(f"{self.prefix}{cle}")
+                    if present:
+                        resultats[cle] = valeur
+                    else:
+                        restantes.append(cle)
+                manquantes = restantes
+            if not manquantes:
+                return resultats
+            
+            cles_completes = [f"{self.prefix}{cle}" for cle in manquantes]
+            for cle, cle_complete, valeur_serialisee in zip(manquantes, cles_completes, self.redis.mget(cles_completes)):
+                if valeur_serialisee is None:
+                    continue
+                resultats[cle] = self._deserialiser(valeur_serialisee)
+                if self.cache_local is not None:
+                    self.cache_local.enregistrer(cle_complete, resultats[cle], self._taille(valeur_serialisee))
+            return resultats
+        except Exception as e:
+            print(f"Erreur lors de la récupération multiple du cache: {str(e)}")
+            return resultats
+    
+    def recuperer_ou_calculer(self, cle, calculer, ttl=None):
+        """Lecture au travers du cache
+
+        Retourne la valeur en cache ; si elle est absente, l'obtient avec
+        calculer(), la met en cache pour ttl secondes et la retourne.
+        """
+        valeur = self.recuperer_du_cache(cle)
+        if valeur is None:
+            valeur = calculer()
+            if valeur is not None:
+                self.mettre_en_cache(cle, valeur, ttl=ttl)
+        return valeur
+    
     def supprimer_du_cache(self, cle):
         """Supprime une valeur du cache"""
         try:
             cle_complete = f"{self.prefix}{cle}"
             self.redis.delete(cle_complete)
+            if self.cache_local is not None:
+                self.cache_local.retirer(cle_complete)
+                self._publier_invalidation([cle_complete])
             return True
         except Exception as e:
             print(f"Erreur lors de la suppression du cache: {str(e)}")
             return False
     
-    def vider_cache(self):
-        """Vide tout le cache lié à l'application"""
+    def vider_cache(self, taille_lot=500):
+        """Vide tout le cache lié à l'application
+
+        Les clés sont parcourues avec SCAN (et non KEYS, qui bloque le serveur)
+        et supprimées par lots de taille_lot avec UNLINK, qui libère la mémoire
+        en arrière-plan : un lot coûte un aller-retour.
+        """
         try:
-            for cle in self.redis.keys(f"{self.prefix}*"):
-                self.redis.delete(cle)
+            lot = []
+            for cle in self.redis.scan_iter(match=f"{self.prefix}*", count=taille_lot):
+                lot.append(cle)
+                if len(lot) >= taille_lot:
+                    self.redis.unlink(*lot)
+                    lot = []
+            if lot:
+                self.redis.unlink(*lot)
+            if self.cache_local is not None:
+                self.cache_local.vider()
+                self._publier_invalidation(None)
             return True
         except Exception as e:
             print(f"Erreur lors du vidage du cache: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+    
+    def statistiques(self):
+        """Compteurs du cache de premier niveau (None s'il est désactivé)"""
+        return self.cache_local.statistiques() if self.cache_local is not None else None
+    
+    def fermer(self):
+        """Arrête l'écoute des invalidations"""
+        if self._ecoute is not None:
+            self._ecoute.stop()
+            self._ecoute = None
+            self._ecoute_pid = None
+
+
+class CacheRedisAsync:
+    """Lecture et écriture du cache avec un client redis.asyncio, pour main_async
+
+    Mêmes clés et même sérialisation que CacheRedis : les workers synchrones
+    et asynchrones partagent les entrées. Pas de cache de premier niveau : les
+    réponses sont déjà gardées dans le processus (CacheReponses).
+    """
+
+    def __init__(self, redis_client, serialiseur=None):
+        # Le client doit rendre des octets (decode_responses=False)
+        self.redis = redis_client
+        self.serialiseur = serialiseur or Serialiseur()
+        self.prefix = "gestion_etudiants:"
+        self.ttl = 3600  # 1 heure par défaut
+
+    async def mettre_en_cache(self, cle, valeur, ttl=None):
+        """Met une valeur en cache (ttl en secondes, self.ttl par défaut)"""
+        try:
+            await self.redis.set(f"{self.prefix}{cle}", self.serialiseur.serialiser(valeur), ex=ttl or self.ttl)
+            return True
+        except Exception as e:
+            print(f"Erreur lors de la mise en cache: {str(e)}")
+            return False
+
+    async def recuperer_du_cache(self, cle):
+        """Récupère une valeur du cache"""
+        try:
+            valeur_serialisee = await self.redis.get(f"{self.prefix}{cle}")
+            if valeur_serialisee is None:
+                return None
+            return self.serialiseur.deserialiser(valeur_serialisee)
+        except Exception as e:
+            print(f"Erreur lors de la récupération du cache: {str(e)}")
+            return None
+
+    async def recuperer_ou_calculer(self, cle, calculer, ttl=None):
+        """Lecture au travers du cache, calculer() étant une coroutine (voir CacheRedis)"""
+        valeur = await self.recuperer_du_cache(cle)
+        if valeur is None:
+            valeur = await calculer()
+            if valeur is not None:
+                await self.mettre_en_cache(cle, valeur, ttl=ttl)
+        return valeur
+
+    async def fermer(self):
+        await self.redis.aclose()
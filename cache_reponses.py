@@ -0,0 +1,53 @@
+# cache_reponses.py
+import hashlib
+import threading
+from collections import OrderedDict
+
+class CacheReponses:
+    """Cache des réponses JSON déjà encodées, avec leur ETag
+
+    La clé inclut la version des données : toute modification de
+    GestionEtudiants rend les anciennes entrées inaccessibles, et elles
+    finissent évincées (LRU, au plus taille_max entrées et octets_max
+    octets). Un corps de plus de octets_entree_max octets n'est pas gardé :
+    quelques grosses listes ne doivent pas occuper tout le cache.
+    """
+    def __init__(self, taille_max=256, octets_max=64 * 1024 * 1024, octets_entree_max=4 * 1024 * 1024):
+        self.taille_max = taille_max
+        self.octets_max = octets_max
+        self.octets_entree_max = octets_entree_max
+        self._entrees = OrderedDict()
+        self._octets = 0
+        self._verrou = threading.Lock()
+    
+    def obtenir(self, cle):
+        """Retourne (corps, etag) ou None si la réponse n'est pas en cache"""
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                self._entrees.move_to_end(cle)
+            return entree
+    
+    def enregistrer(self, cle, corps):
+        """Met en cache le corps encodé d'une réponse et retourne (corps, etag)
+
+        Le couple est retourné même si le corps est trop gros pour être gardé.
+        """
+        entree = (corps, hashlib.sha1(corps).hexdigest())
+        if len(corps) > min(self.octets_entree_max, self.octets_max):
+            return entree
+        with self._verrou:
+            ancienne = self._entrees.pop(cle, None)
+            if ancienne is not None:
+                self._octets -= len(ancienne[0])
+            self._entrees[cle] = entree
+            self._octets += len(corps)
+            while len(self._entrees) > self.taille_max or self._octets > self.octets_max:
+                _, (corps_ancien, _) = self._entrees.popitem(last=False)
+                self._octets -= len(corps_ancien)
+        return entree
+    
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self._octets = 0
@@ -1,6 +1,55 @@
 # Créez un fichier nommé db_connexion.py
-import pymongo
-from pymongo import MongoClient
+import os
+import threading
+
+# Clients MongoDB du processus, un par chaîne de connexion
+_clients = {}
+_verrou_clients = threading.Lock()
+
+def obtenir_client(connection_string=None):
+    """Client MongoDB partagé du processus (il gère lui-même son pool)
+
+    La chaîne de connexion absente est lue dans MONGODB_URI ; la taille du
+    pool dans MONGO_MAX_POOL et le délai de sélection du serveur (ms) dans
+    MONGO_TIMEOUT_SELECTION. MongoClient n'est pas sûr après un fork : le
+    client est propre à chaque processus et recréé dans un worker.
+    """
+    # pymongo n'est chargé qu'à la première connexion
+    from pymongo import MongoClient
+    
+    connection_string = connection_string or os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/')
+    cle = (os.getpid(), connection_string)
+    with _verrou_clients:
+        if cle not in _clients:
+            _clients[cle] = MongoClient(
+                connection_string,
+                maxPoolSize=int(os.environ.get('MONGO_MAX_POOL', 100)),
+                serverSelectionTimeoutMS=int(os.environ.get('MONGO_TIMEOUT_SELECTION', 5000)),
+            )
+        return _clients[cle]
+
+def obtenir_client_async(connection_string=None):
+    """Client motor (pilote asyncio) configuré comme obtenir_client
+
+    motor n'est chargé qu'au premier appel. Le client s'attache à la boucle
+    asyncio qui l'utilise en premier : il est créé par l'application
+    asynchrone au démarrage et gardé par elle.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+    
+    return AsyncIOMotorClient(
+        connection_string or os.environ.get('MONGODB_URI', 'mongodb://localhost:27017/'),
+        maxPoolSize=int(os.environ.get('MONGO_MAX_POOL', 100)),
+        serverSelectionTimeoutMS=int(os.environ.get('MONGO_TIMEOUT_SELECTION', 5000)),
+    )
+
+def fermer_clients():
+    """Ferme les clients partagés du processus"""
+    with _verrou_clients:
+        for (pid, _), client in list(_clients.items()):
+            if pid == os.getpid():
+                client.close()
+        _clients.clear()
 
 class DbConnexion:
     def __init__(self, connection_string=None, db_name="gestion-etudiant"):
@@ -11,8 +60,8 @@ class DbConnexion:
     
     def toConnecte(self):
         try:
-            # Connexion à MongoDB Atlas avec la chaîne de connexion
-            self.client = MongoClient(self.connection_string)
+            # Connexion à MongoDB Atlas avec la chaîne de connexion (client partagé)
+            self.client = obtenir_client(self.connection_string)
             # Créer/accéder à la base de données "gestion-etudiant"
             self.db = self.client[self.db_name]
             print(f"Connexion réussie à la base de données '{self.db_name}'")
@@ -22,6 +71,9 @@ class DbConnexion:
             return None
     
     def fermer_connexion(self):
+        # Le client est partagé : il reste ouvert pour les autres utilisateurs
+        # (fermer_clients() le ferme à l'arrêt)
         if self.client:
-            self.client.close()
+            self.client = None
+            self.db = None
             print("Connexion fermée")
\ No newline at end of file
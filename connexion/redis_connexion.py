@@ -1,23 +1,99 @@
-import redis
+import os
+import threading
+
+# Pools de connexions du processus, un par configuration
+_pools = {}
+_verrou_pools = threading.Lock()
+
+def _options_pool(host=None, port=None, db=None, password=None, decode_responses=False):
+    """URL et options d'un pool Redis, complétées par l'environnement (voir obtenir_pool)"""
+    url = host or os.environ.get('REDIS_URL', 'localhost')
+    options = {
+        "db": int(db if db is not None else os.environ.get('REDIS_DB', 0)),
+        "password": password or os.environ.get('REDIS_PASSWORD') or None,
+        "decode_responses": decode_responses,
+        "max_connections": int(os.environ.get('REDIS_MAX_CONNEXIONS', 50)),
+        "timeout": float(os.environ.get('REDIS_ATTENTE_POOL', 5)),
+        "socket_timeout": float(os.environ.get('REDIS_TIMEOUT', 5)),
+        "socket_connect_timeout": float(os.environ.get('REDIS_TIMEOUT_CONNEXION', 2)),
+        "health_check_interval": int(os.environ.get('REDIS_INTERVALLE_SANTE', 30)),
+    }
+    if "://" not in url:
+        options["host"] = url
+        options["port"] = int(port or os.environ.get('REDIS_PORT', 6379))
+    return url, options
+
+def obtenir_pool(host=None, port=None, db=None, password=None, decode_responses=False):
+    """Pool de connexions partagé par tous les clients Redis du processus
+
+    Les paramètres absents sont lus dans l'environnement : REDIS_URL (nom
+    d'hôte ou URL redis://), REDIS_PORT, REDIS_DB, REDIS_PASSWORD, et pour le
+    pool REDIS_MAX_CONNEXIONS, REDIS_TIMEOUT, REDIS_TIMEOUT_CONNEXION,
+    REDIS_INTERVALLE_SANTE et REDIS_ATTENTE_POOL. Quand toutes les connexions
+    sont prises, un client attend qu'une se libère (REDIS_ATTENTE_POOL
+    secondes au plus).
+
+    Le pool peut être créé avant le fork des workers : redis-py contrôle le
+    pid et ouvre de nouvelles connexions dans le processus fils.
+    """
+    url, options = _options_pool(host, port, db, password, decode_responses)
+    
+    # redis n'est chargé qu'à la création du premier pool
+    import redis
+    
+    cle = (url, tuple(sorted(options.items())))
+    with _verrou_pools:
+        if cle not in _pools:
+            if "://" in url:
+                _pools[cle] = redis.BlockingConnectionPool.from_url(url, **options)
+            else:
+                _pools[cle] = redis.BlockingConnectionPool(**options)
+        return _pools[cle]
+
+def client_redis(decode_responses=False):
+    """Client Redis sur le pool partagé configuré par l'environnement"""
+    import redis
+    
+    return redis.Redis(connection_pool=obtenir_pool(decode_responses=decode_responses))
+
+def client_redis_async(decode_responses=False):
+    """Client redis.asyncio configuré par l'environnement, comme client_redis
+
+    Son pool ne sert qu'à la boucle asyncio qui l'utilise : le client est
+    créé par l'application asynchrone au démarrage et gardé par elle.
+    """
+    import redis.asyncio as redis_async
+    
+    url, options = _options_pool(decode_responses=decode_responses)
+    if "://" in url:
+        return redis_async.Redis(connection_pool=redis_async.BlockingConnectionPool.from_url(url, **options))
+    return redis_async.Redis(connection_pool=redis_async.BlockingConnectionPool(**options))
 
 class RedisConnexion:
-    def __init__(self, host="localhost", port=6379, db=0, password=None):
-        self.host = host
-        self.port = port
+    def __init__(self, host=None, port=None, db=None, password=None):
+        # Les paramètres absents sont lus dans l'environnement (voir obtenir_pool)
+        self.host = host or os.environ.get('REDIS_URL', 'localhost')
+        self.port = port or int(os.environ.get('REDIS_PORT', 6379))
         self.db = db
         self.password = password
         self.client = None
     
-    def connect(self):
+    def connect(self, decode_responses=True):
+        """Connecte le client ; decode_responses=False pour lire des valeurs binaires
+
+        Le client emprunte ses connexions au pool partagé du processus.
+        """
         try:
+            import redis
+            
             # Connexion à Redis
-            self.client = redis.Redis(
+            self.client = redis.Redis(connection_pool=obtenir_pool(
                 host=self.host,
                 port=self.port,
                 db=self.db,
                 password=self.password,
-                decode_responses=True  # Pour convertir les réponses binaires en chaînes de caractères
-            )
+                decode_responses=decode_responses  # Pour convertir les réponses binaires en chaînes de caractères
+            ))
             
             # Vérifier la connexion avec un ping
             if self.client.ping():
@@ -57,7 +133,7 @@ class RedisConnexion:
             return False
     
     def fermer_connexion(self):
-        """Ferme la connexion Redis."""
+        """Ferme la connexion Redis (les connexions retournent au pool partagé)."""
         if self.client:
             self.client.close()
             print("Connexion Redis fermée")
\ No newline at end of file
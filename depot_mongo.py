@@ -0,0 +1,257 @@
+# depot_mongo.py
+from bson import ObjectId
+from pymongo import ASCENDING, InsertOne, ReturnDocument, UpdateOne
+
+from entite.etudiant import Etudiant
+
+
+class DepotMongo:
+    """Persistance des étudiants d'un GestionEtudiants dans une collection MongoDB
+
+    Un document par numéro (index unique) : les écritures sont des upserts
+    sur le numéro, envoyés par lots de taille_lot avec bulk_write non
+    ordonné, soit un aller-retour par lot et non par étudiant. Les étudiants
+    sans numéro sont insérés, chacun dans son propre document.
+
+    Les statistiques sont calculées par le serveur (pipelines d'agrégation)
+    sur les seuls champs utiles.
+
+    Plusieurs processus (workers) peuvent partager la collection : chaque
+    écriture d'un GestionEtudiants avance un compteur, la génération, rangé
+    dans une collection à part. Un processus qui y lit une autre génération
+    que celle de ses données sait qu'elles ne reflètent plus le dépôt.
+    """
+
+    def __init__(self, db, nom_collection="etudiants", taille_lot=5000):
+        self.db = db
+        self.nom_collection = nom_collection
+        self.collection = db[nom_collection]
+        self.generations = db[f"{nom_collection}_generation"]
+        self.taille_lot = taille_lot
+
+    def creer_index(self, collection=None):
+        """Index sur le numéro (unique parmi les documents qui en ont un), la classe et le nom"""
+        collection = self.collection if collection is None else collection
+        index = collection.index_information().get("numero")
+        if index is not None and not index.get("unique"):
+            # Index non unique laissé par une version précédente
+            collection.drop_index("numero")
+        collection.create_index(
+            [("numero", ASCENDING)], unique=True, name="numero",
+            partialFilterExpression={"numero": {"$type": "string"}}
+        )
+        collection.create_index([("classe", ASCENDING)], name="classe")
+        collection.create_index([("nom", ASCENDING)], name="nom")
+
+    @staticmethod
+    def _texte(valeur):
+        # Cellules vides (NaN) -> None, autres valeurs non textuelles -> str
+        if valeur is None or valeur != valeur:
+            return None
+        return valeur if isinstance(valeur, str) else str(valeur)
+
+    @staticmethod
+    def document(etudiant, valide=None):
+        """Document MongoDB d'un étudiant
+
+        moyennes_matieres est stocké pour que le serveur agrège les moyennes
+        par matière sans recalculer les notes.
+        """
+        return {
+            "code": DepotMongo._texte(etudiant.code),
+            "numero": DepotMongo._texte(etudiant.numero),
+            "nom": DepotMongo._texte(etudiant.nom),
+            "prenom": DepotMongo._texte(etudiant.prenom),
+            "date_naissance": DepotMongo._texte(etudiant.date_naissance),
+            "classe": DepotMongo._texte(etudiant.classe),
+            "notes": etudiant.notes or {},
+            "moyennes_matieres": etudiant.moyennes_matieres(),
+            "moyenne_generale": etudiant.moyenne_generale,
+            "valide": valide,
+        }
+
+    @staticmethod
+    def _operation(document):
+        if document["numero"] is None:
+            return InsertOne(document)
+        return UpdateOne({"numero": document["numero"]}, {"$set": document}, upsert=True)
+
+    def enregistrer_etudiants(self, etudiants, valide=None, collection=None, importation=None):
+        """Insère ou met à jour les étudiants ; retourne le nombre de documents écrits
+
+        importation, s'il est donné, est enregistré dans chaque document :
+        annuler_importation supprime ensuite les documents de cet import.
+        """
+        collection = self.collection if collection is None else collection
+        ecrits = 0
+        lot = []
+        for etudiant in etudiants:
+            document = self.document(etudiant, valide)
+            if importation is not None:
+                document["importation"] = importation
+            lot.append(self._operation(document))
+            if len(lot) >= self.taille_lot:
+                ecrits += self._ecrire(collection, lot)
+                lot = []
+        if lot:
+            ecrits += self._ecrire(collection, lot)
+        return ecrits
+
+    @staticmethod
+    def _ecrire(collection, operations):
+        resultat = collection.bulk_write(operations, ordered=False)
+        return resultat.inserted_count + resultat.upserted_count + resultat.modified_count
+
+    def sauvegarder(self, gestion_etudiants, remplacer=False):
+        """Enregistre tous les étudiants, avec leur statut valide / invalide
+
+        Sans remplacer, ils s'ajoutent aux documents déjà présents (ou les
+        mettent à jour, à numéro égal). Avec remplacer=True, ils sont écrits
+        dans une collection temporaire qui prend ensuite la place de la
+        collection (rename avec dropTarget) : les lecteurs voient l'ancien ou
+        le nouveau contenu, jamais un mélange des deux. Une écriture d'un
+        autre processus pendant la sauvegarde est écrasée, comme les autres
+        documents.
+        """
+        if not remplacer:
+            return self._enregistrer_groupes(gestion_etudiants, self.collection)
+        temporaire = self.db[f"{self.nom_collection}_remplacement_{ObjectId()}"]
+        try:
+            # Les index sont créés d'abord : ils suivent la collection au
+            # renommage, qui fonctionne aussi quand il n'y a aucun étudiant
+            self.creer_index(temporaire)
+            ecrits = self._enregistrer_groupes(gestion_etudiants, temporaire)
+            temporaire.rename(self.nom_collection, dropTarget=True)
+        except Exception:
+            temporaire.drop()
+            raise
+        return ecrits
+
+    def _enregistrer_groupes(self, gestion_etudiants, collection):
+        # Les valides en dernier : à numéro égal, c'est leur document qui reste
+        valides = {id(etudiant) for etudiant in gestion_etudiants.etudiants_valides}
+        invalides = {id(etudiant) for etudiant in gestion_etudiants.etudiants_invalides}
+        ecrits = 0
+        for statut, groupe in (
+            (None, [e for e in gestion_etudiants.etudiants if id(e) not in valides and id(e) not in invalides]),
+            (False, gestion_etudiants.etudiants_invalides),
+            (True, gestion_etudiants.etudiants_valides),
+        ):
+            ecrits += self.enregistrer_etudiants(groupe, valide=statut, collection=collection)
+        return ecrits
+
+    def annuler_importation(self, importation):
+        """Supprime les documents écrits par un import ; retourne leur nombre"""
+        return self.collection.delete_many({"importation": importation}).deleted_count
+
+    def charger(self, gestion_etudiants, filtre=None):
+        """Ajoute au GestionEtudiants les étudiants de la collection ; retourne leur nombre"""
+        nombre = 0
+        curseur = self.collection.find(filtre or {}, projection={"_id": 0}, batch_size=self.taille_lot)
+        for document in curseur:
+            etudiant = Etudiant(
+                code=document.get("code"),
+                numero=document.get("numero"),
+                nom=document.get("nom"),
+                prenom=document.get("prenom"),
+                date_naissance=document.get("date_naissance"),
+                classe=document.get("classe"),
+                notes=document.get("notes")
+            )
+            etudiant.moyenne_generale = document.get("moyenne_generale")
+            gestion_etudiants.ajouter_etudiant(etudiant, valide=document.get("valide"))
+            nombre += 1
+        return nombre
+
+    def numeros_presents(self, numeros):
+        """Parmi les numéros donnés, ceux que portent déjà des documents"""
+        numeros = [numero for numero in dict.fromkeys(numeros) if numero is not None]
+        presents = set()
+        for debut in range(0, len(numeros), self.taille_lot):
+            presents.update(self.collection.distinct(
+                "numero", {"numero": {"$in": numeros[debut:debut + self.taille_lot]}}))
+        return presents
+
+    def generation(self):
+        """Génération courante de la collection (0 si elle n'a jamais été écrite)"""
+        document = self.generations.find_one({"_id": "generation"})
+        return document["valeur"] if document else 0
+
+    def avancer_generation(self):
+        """Signale une écriture dans la collection ; retourne la nouvelle génération"""
+        document = self.generations.find_one_and_update(
+            {"_id": "generation"}, {"$inc": {"valeur": 1}},
+            upsert=True, return_document=ReturnDocument.AFTER)
+        return document["valeur"]
+
+    def supprimer_tout(self):
+        """Vide la collection ; retourne le nombre de documents supprimés"""
+        return self.collection.delete_many({}).deleted_count
+
+    def compter(self, filtre=None):
+        return self.collection.count_documents(filtre or {})
+
+    # Effectifs par statut (valide) : voir statistiques
+    PIPELINE_STATUTS = [
+        {"$project": {"_id": 0, "valide": 1}},
+        {"$group": {"_id": "$valide", "nombre": {"$sum": 1}}},
+    ]
+
+    @staticmethod
+    def _statistiques(resultats):
+        comptes = {resultat["_id"]: resultat["nombre"] for resultat in resultats}
+        return {
+            "total": sum(comptes.values()),
+            "valides": comptes.get(True, 0),
+            "invalides": comptes.get(False, 0)
+        }
+
+    def statistiques(self):
+        """Nombre total d'étudiants, de valides et d'invalides"""
+        return self._statistiques(self.collection.aggregate(self.PIPELINE_STATUTS))
+
+    def statistiques_par_classe(self):
+        """Effectif et moyenne générale des étudiants valides de chaque classe"""
+        return {
+            resultat["_id"]: {
+                "effectif": resultat["effectif"],
+                "moyenne": None if resultat["moyenne"] is None else round(resultat["moyenne"], 2)
+            }
+            for resultat in self.collection.aggregate([
+                {"$match": {"valide": True}},
+                {"$project": {"_id": 0, "classe": 1, "moyenne_generale": 1}},
+                {"$group": {"_id": "$classe", "effectif": {"$sum": 1}, "moyenne": {"$avg": "$moyenne_generale"}}},
+            ])
+        }
+
+    def moyennes_par_matiere(self):
+        """Moyenne de la cohorte pour chaque matière"""
+        return {
+            resultat["_id"]: round(resultat["somme"] / resultat["effectif"], 2)
+            for resultat in self.collection.aggregate([
+                {"$project": {"_id": 0, "matieres": {"$objectToArray": "$moyennes_matieres"}}},
+                {"$unwind": "$matieres"},
+                {"$group": {"_id": "$matieres.k", "somme": {"$sum": "$matieres.v"}, "effectif": {"$sum": 1}}},
+            ])
+        }
+
+
+class DepotMongoAsync:
+    """Lectures du dépôt avec le pilote asyncio (motor), pour main_async
+
+    Même collection que DepotMongo, qui reste seul chargé des écritures.
+    """
+
+    def __init__(self, db, nom_collection="etudiants"):
+        self.collection = db[nom_collection]
+        self.generations = db[f"{nom_collection}_generation"]
+
+    async def generation(self):
+        """Génération courante de la collection (voir DepotMongo.generation)"""
+        document = await self.generations.find_one({"_id": "generation"})
+        return document["valeur"] if document else 0
+
+    async def statistiques(self):
+        """Nombre total d'étudiants, de valides et d'invalides (voir DepotMongo)"""
+        curseur = self.collection.aggregate(DepotMongo.PIPELINE_STATUTS)
+        return DepotMongo._statistiques(await curseur.to_list(length=None))
@@ -0,0 +1,97 @@
+# donnees_partagees.py
+import threading
+import time
+
+from gestion_etudiants import GestionEtudiants
+
+
+class DonneesPartagees:
+    """Données des étudiants partagées entre fils, par copie sur écriture
+
+    Les lecteurs prennent l'instantané courant (un GestionEtudiants) sans
+    verrou : une fois publié, il n'est plus jamais modifié, ils peuvent donc
+    le parcourir aussi longtemps qu'ils veulent sans voir de données à moitié
+    chargées. Un écrivain prépare un nouveau GestionEtudiants (copie de
+    l'instantané ou chargement complet) puis le publie par une seule
+    affectation. Les écrivains passent l'un après l'autre.
+
+    Les lectures ne prennent aucun verrou, mais les écritures coûtent : chaque
+    modification copie les listes et les index de tous les étudiants, en
+    O(n) quel que soit le nombre d'étudiants touchés. Les changements sont à
+    regrouper dans une seule modification (IngestionNdjson en fait une par
+    lot), pas à publier un par un.
+    """
+
+    def __init__(self, gestion_etudiants=None):
+        self._instantane = gestion_etudiants if gestion_etudiants is not None else GestionEtudiants()
+        self._verrou = threading.Lock()
+        self.publications = 0
+        self._verifie_a = None
+
+    def instantane(self):
+        """Le GestionEtudiants courant, à ne pas modifier"""
+        return self._instantane
+
+    def modifier(self, modification):
+        """Applique modification(gestion) à une copie de l'instantané et la publie
+
+        Retourne le résultat de modification. Si elle lève une exception, rien
+        n'est publié. Les étudiants sont partagés avec l'instantané courant :
+        modification doit les remplacer (remplacer_etudiant), pas les modifier
+        sur place. Coût en O(n) par appel (copier), même pour un seul étudiant.
+        """
+        with self._verrou:
+            copie = self._instantane.copier()
+            resultat = modification(copie)
+            self._publier(copie)
+            return resultat
+
+    def remplacer(self, nouvelle):
+        """Publie un GestionEtudiants construit à part (import, rechargement)
+
+        Le dépôt MongoDB de l'instantané courant lui est associé s'il n'en a
+        pas ; il ne reflète plus les données jusqu'à la prochaine sauvegarde.
+        """
+        with self._verrou:
+            if nouvelle.depot is None and self._instantane.depot is not None:
+                nouvelle.utiliser_depot(self._instantane.depot)
+            self._publier(nouvelle)
+
+    def actualiser(self, intervalle=0):
+        """Recharge les données depuis le dépôt si un autre processus y a écrit
+
+        Le dépôt n'est interrogé qu'une fois toutes les intervalle secondes.
+        Le rechargement se fait hors des lecteurs, qui gardent l'instantané
+        courant jusqu'à la publication ; si un écrivain est en cours, il est
+        remis à la vérification suivante. Retourne vrai si un nouvel
+        instantané a été publié.
+        """
+        maintenant = time.monotonic()
+        if self._verifie_a is not None and maintenant - self._verifie_a < intervalle:
+            return False
+        self._verifie_a = maintenant
+        if not self._instantane.depot_modifie_ailleurs():
+            return False
+        if not self._verrou.acquire(blocking=False):
+            self._verifie_a = None
+            return False
+        try:
+            courant = self._instantane
+            # Un écrivain de ce processus a pu publier les données du dépôt entre-temps
+            if not courant.depot_modifie_ailleurs():
+                return False
+            nouvelle = GestionEtudiants()
+            nouvelle.utiliser_depot(courant.depot)
+            nouvelle.charger_depuis_depot()
+            self._publier(nouvelle)
+            return True
+        finally:
+            self._verrou.release()
+
+    def _publier(self, nouvelle):
+        # Les caches de réponses sont indexés par version : elle ne doit
+        # jamais revenir en arrière d'un instantané au suivant
+        if nouvelle is not self._instantane:
+            nouvelle.version = max(nouvelle.version, self._instantane.version + 1)
+        self._instantane = nouvelle
+        self.publications += 1
@@ -1,17 +1,66 @@
 # etudiant.py
 class Etudiant:
-    def __init__(self, code=None, numero=None, nom=None, prenom=None, date_naissance=None, classe=None, notes=None):
+    def __init__(self, code=None, numero=None, nom=None, prenom=None, date_naissance=None, classe=None, notes=None,
+                 magasin=None, position=None):
         self.code = code
         self.numero = numero
         self.nom = nom
         self.prenom = prenom
         self.date_naissance = date_naissance
         self.classe = classe
-        self.notes = notes if notes else {}
-        self.moyenne_generale = None
+        # Avec un magasin, l'étudiant est une vue sur la ligne `position` du MagasinNotes
+        self._magasin = magasin
+        self._position = position
+        self._notes = None
+        self._moyenne_generale = None
+        if magasin is None:
+            self.notes = notes
+    
+    @staticmethod
+    def vue(magasin, position, **champs):
+        """Crée un étudiant adossé à un MagasinNotes"""
+        return Etudiant(magasin=magasin, position=position, **champs)
+    
+    @property
+    def notes(self):
+        if self._magasin is not None:
+            return self._magasin.notes_etudiant(self._position)
+        return self._notes
+    
+    @notes.setter
+    def notes(self, notes):
+        # Affecter des notes détache l'étudiant de son magasin
+        if self._magasin is not None:
+            self._moyenne_generale = self.moyenne_generale
+            self._magasin = None
+            self._position = None
+        self._notes = notes if notes else {}
+    
+    @property
+    def moyenne_generale(self):
+        if self._magasin is not None:
+            return self._magasin.moyenne_generale(self._position)
+        return self._moyenne_generale
+    
+    @moyenne_generale.setter
+    def moyenne_generale(self, moyenne):
+        if self._magasin is not None:
+            self._magasin.definir_moyenne_generale(self._position, moyenne)
+        else:
+            self._moyenne_generale = moyenne
+    
+    def __getstate__(self):
+        """Sérialise une vue comme un étudiant autonome, sans son magasin"""
+        etat = self.__dict__.copy()
+        if self._magasin is not None:
+            etat.update(_notes=self.notes, _moyenne_generale=self.moyenne_generale, _magasin=None, _position=None)
+        return etat
     
     def calculer_moyenne_matiere(self, matiere):
         """Calcule la moyenne d'une matière spécifique"""
+        if self._magasin is not None:
+            return self._magasin.moyenne_matiere(self._position, matiere)
+        
         if matiere not in self.notes:
             return 0
             
@@ -23,8 +72,20 @@ class Etudiant:
         diviseur = len(notes_matiere["notes_devoirs"]) + 1
         return round(somme / diviseur, 2)
     
+    def moyennes_matieres(self):
+        """Moyenne de chaque matière de l'étudiant : {matiere: moyenne}"""
+        if self._magasin is not None:
+            return self._magasin.moyennes_etudiant(self._position)
+        return {matiere: self.calculer_moyenne_matiere(matiere) for matiere in (self.notes or {})}
+    
     def calculer_moyenne_generale(self):
         """Calcule la moyenne générale de l'étudiant"""
+        if self._magasin is not None:
+            if not self._magasin.a_des_notes(self._position):
+                return 0
+            self.moyenne_generale = self._magasin.calculer_moyenne_generale(self._position)
+            return self.moyenne_generale
+        
         if not self.notes:
             return 0
             
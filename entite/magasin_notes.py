@@ -0,0 +1,220 @@
+# magasin_notes.py
+import re
+
+import numpy as np
+
+# Les matières retenues par GestionEtudiants._parser_notes, trouvées d'un
+# seul findall : chaque morceau entre '#', blancs de tête ignorés, commence
+# par Matiere[devoirs:examen] (le ']' fermant est le premier rencontré)
+MOTIF_ENTREES = re.compile(r'(?:^|#)\s*(\w+)\[([^#:\]\n]*):([^#\]\n]*)\]')
+
+
+def arrondir(valeurs):
+    """np.round(valeurs, 2) avec le résultat exact de round() sur les cas limites
+
+    np.round passe par valeurs * 100 et peut différer de round() lorsque la
+    valeur est très proche d'un demi-centième : ces rares cas sont arrondis
+    un par un par round().
+    """
+    arrondies = np.round(valeurs, 2)
+    centiemes = valeurs * 100
+    for i in np.flatnonzero(np.abs(centiemes - np.floor(centiemes) - 0.5) < 1e-6):
+        arrondies[i] = round(float(valeurs[i]), 2)
+    return arrondies
+
+class MagasinNotes:
+    """Stockage en colonnes des notes d'une cohorte d'étudiants
+
+    Les notes sont rangées dans des tableaux NumPy plats :
+    - etudiant_offsets : les matières de l'étudiant i occupent les entrées
+      [etudiant_offsets[i], etudiant_offsets[i + 1])
+    - matiere_ids / notes_examen : une entrée par couple (étudiant, matière)
+    - devoirs_offsets / notes_devoirs : les devoirs de l'entrée j occupent
+      notes_devoirs[devoirs_offsets[j]:devoirs_offsets[j + 1]]
+    """
+
+    def __init__(self, matieres, etudiant_offsets, matiere_ids, notes_examen, devoirs_offsets, notes_devoirs):
+        self.matieres = list(matieres)
+        self.ids_matieres = {matiere: i for i, matiere in enumerate(self.matieres)}
+        self.etudiant_offsets = etudiant_offsets
+        self.matiere_ids = matiere_ids
+        self.notes_examen = notes_examen
+        self.devoirs_offsets = devoirs_offsets
+        self.notes_devoirs = notes_devoirs
+        self.moyennes_matieres = None
+        self.moyennes = None
+        self.recalculer()
+
+    def __len__(self):
+        return len(self.etudiant_offsets) - 1
+
+    @staticmethod
+    def depuis_colonne(notes):
+        """Construit le magasin à partir de la colonne "Note" d'un DataFrame
+
+        Reproduit GestionEtudiants._parser_notes : les matières mal formées ou
+        sans ':' sont ignorées, une note non numérique lève ValueError et, pour
+        une matière répétée, la dernière occurrence l'emporte.
+        """
+        import pandas as pd
+
+        # Un findall par cellule plutôt que les méthodes .str de pandas, qui
+        # coûtent plusieurs microsecondes par matière (extract, split expand=True)
+        cellules = pd.Series(notes).tolist()
+        nb_etudiants = len(cellules)
+        entrees, nb_par_etudiant = [], []
+        for cellule in cellules:
+            trouvees = MOTIF_ENTREES.findall(cellule) if isinstance(cellule, str) else []
+            entrees.extend(trouvees)
+            nb_par_etudiant.append(len(trouvees))
+        if not entrees:
+            return MagasinNotes.vide(nb_etudiants)
+
+        noms, devoirs, examens = zip(*entrees)
+        if any(':' in examen for examen in examens):
+            raise ValueError("too many values to unpack (expected 2)")
+        notes_examen = MagasinNotes._en_flottants(examens)
+        nb_devoirs = np.array([d.count('|') for d in devoirs], dtype=np.int64) + 1
+        notes_devoirs = MagasinNotes._en_flottants('|'.join(devoirs).split('|'))
+
+        # Matière répétée : valeur de la dernière occurrence, rang de la première
+        positions = np.repeat(np.arange(nb_etudiants, dtype=np.int64), nb_par_etudiant)
+        cles = pd.DataFrame({"etudiant": positions, "matiere": noms})
+        rangs = cles.groupby(["etudiant", "matiere"], sort=False).ngroup().to_numpy()
+        gardees = ~cles.duplicated(keep='last').to_numpy()
+        ordre = np.argsort(rangs[gardees], kind='stable')
+        selection = np.flatnonzero(gardees)[ordre]
+
+        debuts_devoirs = np.concatenate(([0], np.cumsum(nb_devoirs)))
+        longueurs = nb_devoirs[selection]
+        devoirs_offsets = np.concatenate(([0], np.cumsum(longueurs))).astype(np.int64)
+        index_devoirs = np.repeat(debuts_devoirs[selection] - devoirs_offsets[:-1], longueurs) + np.arange(devoirs_offsets[-1])
+
+        matiere_ids, noms_matieres = pd.factorize(cles["matiere"].to_numpy()[selection])
+        nb_par_etudiant = np.bincount(positions[selection], minlength=nb_etudiants)
+
+        return MagasinNotes(
+            matieres=noms_matieres.tolist(),
+            etudiant_offsets=np.concatenate(([0], np.cumsum(nb_par_etudiant))).astype(np.int64),
+            matiere_ids=matiere_ids.astype(np.int32),
+            notes_examen=notes_examen[selection],
+            devoirs_offsets=devoirs_offsets,
+            notes_devoirs=notes_devoirs[index_devoirs]
+        )
+
+    @staticmethod
+    def vide(nb_etudiants):
+        """Magasin de nb_etudiants étudiants sans aucune note"""
+        return MagasinNotes(
+            matieres=[],
+            etudiant_offsets=np.zeros(nb_etudiants + 1, dtype=np.int64),
+            matiere_ids=np.zeros(0, dtype=np.int32),
+            notes_examen=np.zeros(0),
+            devoirs_offsets=np.zeros(1, dtype=np.int64),
+            notes_devoirs=np.zeros(0)
+        )
+
+    @staticmethod
+    def _en_flottants(valeurs):
+        """Convertit des chaînes en float64 avec la sémantique de float()"""
+        return np.asarray(np.array(valeurs, dtype=object), dtype=np.float64)
+
+    def recalculer(self):
+        """Recalcule en quelques passes vectorisées les moyennes de toute la cohorte"""
+        nb_entrees = len(self.matiere_ids)
+        nb_devoirs = np.diff(self.devoirs_offsets)
+        entree_par_devoir = np.repeat(np.arange(nb_entrees), nb_devoirs)
+        somme = np.bincount(entree_par_devoir, weights=self.notes_devoirs, minlength=nb_entrees)
+        self.moyennes_matieres = arrondir((somme + self.notes_examen) / (nb_devoirs + 1))
+
+        nb_matieres = np.diff(self.etudiant_offsets)
+        etudiant_par_entree = np.repeat(np.arange(len(self)), nb_matieres)
+        somme = np.bincount(etudiant_par_entree, weights=self.moyennes_matieres, minlength=len(self))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # NaN pour un étudiant sans notes : sa moyenne reste None
+            self.moyennes = arrondir(somme / nb_matieres)
+        return self.moyennes
+
+    def entrees(self, positions):
+        """Indices des entrées (étudiant, matière) des étudiants aux positions données, dans l'ordre"""
+        positions = np.asarray(positions, dtype=np.int64)
+        debuts = self.etudiant_offsets[positions]
+        longueurs = self.etudiant_offsets[positions + 1] - debuts
+        cumul = np.concatenate(([0], np.cumsum(longueurs)))
+        return np.repeat(debuts - cumul[:-1], longueurs) + np.arange(cumul[-1])
+
+    def sommes_par_matiere(self, positions=None):
+        """Somme des moyennes et effectif de chaque matière : {matiere: (somme, effectif)}
+
+        Avec positions, seuls les étudiants à ces positions sont comptés.
+        """
+        nb_matieres = len(self.matieres)
+        matiere_ids, moyennes_matieres = self.matiere_ids, self.moyennes_matieres
+        if positions is not None:
+            entrees = self.entrees(positions)
+            matiere_ids, moyennes_matieres = matiere_ids[entrees], moyennes_matieres[entrees]
+        effectifs = np.bincount(matiere_ids, minlength=nb_matieres)
+        sommes = np.bincount(matiere_ids, weights=moyennes_matieres, minlength=nb_matieres)
+        return {
+            matiere: (float(sommes[i]), int(effectifs[i]))
+            for i, matiere in enumerate(self.matieres) if effectifs[i]
+        }
+
+    def moyenne_cohorte_par_matiere(self):
+        """Moyenne de la cohorte pour chaque matière"""
+        return {
+            matiere: round(somme / effectif, 2)
+            for matiere, (somme, effectif) in self.sommes_par_matiere().items()
+        }
+
+    def moyenne_generale(self, position):
+        """Moyenne générale de l'étudiant à la position donnée (None sans notes)"""
+        moyenne = self.moyennes[position]
+        return None if np.isnan(moyenne) else float(moyenne)
+
+    def calculer_moyenne_generale(self, position):
+        """Recalcule la moyenne générale d'un seul étudiant"""
+        debut, fin = self.etudiant_offsets[position], self.etudiant_offsets[position + 1]
+        somme_moyennes = sum(self.moyennes_matieres[debut:fin].tolist())
+        return round(somme_moyennes / (fin - debut), 2)
+
+    def definir_moyenne_generale(self, position, moyenne):
+        self.moyennes[position] = np.nan if moyenne is None else moyenne
+
+    def moyenne_matiere(self, position, matiere):
+        """Moyenne d'une matière pour un étudiant (0 si la matière est absente)"""
+        id_matiere = self.ids_matieres.get(matiere)
+        debut, fin = self.etudiant_offsets[position], self.etudiant_offsets[position + 1]
+        for entree in range(debut, fin):
+            if self.matiere_ids[entree] == id_matiere:
+                return float(self.moyennes_matieres[entree])
+        return 0
+
+    def moyennes_etudiant(self, position):
+        """Moyenne de chaque matière d'un étudiant : {matiere: moyenne}"""
+        debut, fin = self.etudiant_offsets[position], self.etudiant_offsets[position + 1]
+        return {
+            self.matieres[id_matiere]: moyenne
+            for id_matiere, moyenne in zip(self.matiere_ids[debut:fin].tolist(), self.moyennes_matieres[debut:fin].tolist())
+        }
+    
+    def a_des_notes(self, position):
+        return self.etudiant_offsets[position + 1] > self.etudiant_offsets[position]
+
+    def notes_etudiant(self, position):
+        """Reconstruit le dictionnaire de notes d'un étudiant"""
+        notes = {}
+        for entree in range(self.etudiant_offsets[position], self.etudiant_offsets[position + 1]):
+            debut, fin = self.devoirs_offsets[entree], self.devoirs_offsets[entree + 1]
+            notes[self.matieres[self.matiere_ids[entree]]] = {
+                "notes_devoirs": self.notes_devoirs[debut:fin].tolist(),
+                "note_examen": float(self.notes_examen[entree])
+            }
+        return notes
+
+    def taille_memoire(self):
+        """Taille en octets des tableaux du magasin"""
+        return sum(tableau.nbytes for tableau in (
+            self.etudiant_offsets, self.matiere_ids, self.notes_examen,
+            self.devoirs_offsets, self.notes_devoirs, self.moyennes_matieres, self.moyennes
+        ))
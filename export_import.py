@@ -1,20 +1,25 @@
 # export_import.py
-import pandas as pd
 import json
 import csv
 import os
 from entite.etudiant import Etudiant
+from gestion_etudiants import GestionEtudiants
 
 class ExportImport:
     def __init__(self, gestion_etudiants):
+        # GestionEtudiants, ou DonneesPartagees quand les données sont lues par
+        # d'autres fils : un import est alors publié d'un seul coup
         self.gestion_etudiants = gestion_etudiants
     
     def exporter_csv(self, chemin_fichier):
         """Exporte les données des étudiants au format CSV"""
+        # pandas n'est chargé qu'au premier export
+        import pandas as pd
+        
         try:
             # Préparer les données
             donnees = []
-            for etudiant in self.gestion_etudiants.etudiants_valides:
+            for etudiant in self.gestion_etudiants.instantane().etudiants_valides:
                 notes_str = self._formater_notes_pour_export(etudiant.notes)
                 
                 donnees.append({
@@ -41,7 +46,7 @@ class ExportImport:
         try:
             # Préparer les données
             donnees = []
-            for etudiant in self.gestion_etudiants.etudiants_valides:
+            for etudiant in self.gestion_etudiants.instantane().etudiants_valides:
                 donnees.append(etudiant.to_dict())
             
             # Enregistrer en JSON
@@ -54,17 +59,20 @@ class ExportImport:
             return False, f"Erreur lors de l'exportation: {str(e)}"
     
     def importer_csv(self, chemin_fichier):
-        """Importe les données des étudiants depuis un fichier CSV"""
+        """Importe les données des étudiants depuis un fichier CSV
+
+        Les données sont chargées à part puis remplacent les données actuelles
+        d'un seul coup : en cas d'erreur, elles restent inchangées.
+        """
         try:
-            # Réinitialiser les données actuelles
-            self.gestion_etudiants.etudiants = []
-            
             # Charger le nouveau fichier
-            resultat = self.gestion_etudiants.charger_donnees_csv(chemin_fichier)
+            nouvelles = GestionEtudiants()
+            resultat = nouvelles.charger_donnees_csv(chemin_fichier)
             
             if resultat:
-                # Valider les données importées
-                self.gestion_etudiants.valider_donnees()
+                # Valider les données importées, puis les publier
+                nouvelles.valider_donnees()
+                self.gestion_etudiants.remplacer(nouvelles)
                 return True, f"Données importées avec succès depuis {chemin_fichier}"
             else:
                 return False, "Erreur lors de l'importation des données"
@@ -73,22 +81,21 @@ class ExportImport:
             return False, f"Erreur lors de l'importation: {str(e)}"
     
     def importer_json(self, chemin_fichier):
-        """Importe les données des étudiants depuis un fichier JSON"""
+        """Importe les données des étudiants depuis un fichier JSON (voir importer_csv)"""
         try:
-            # Réinitialiser les données actuelles
-            self.gestion_etudiants.etudiants = []
-            
             # Charger le fichier JSON
             with open(chemin_fichier, 'r') as f:
                 donnees = json.load(f)
             
             # Convertir en objets Etudiant
+            nouvelles = GestionEtudiants()
             for donnee in donnees:
                 etudiant = Etudiant.from_dict(donnee)
-                self.gestion_etudiants.etudiants.append(etudiant)
+                nouvelles.ajouter_etudiant(etudiant)
             
-            # Valider les données
-            self.gestion_etudiants.valider_donnees()
+            # Valider les données, puis les publier
+            nouvelles.valider_donnees()
+            self.gestion_etudiants.remplacer(nouvelles)
             
             return True, f"Données importées avec succès depuis {chemin_fichier}"
             
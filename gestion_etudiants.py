@@ -1,22 +1,63 @@
 # gestion_etudiants.py
-import pandas as pd
+import copy
+import hashlib
+import pickle
 import re
+import uuid
 from datetime import datetime
 from entite.etudiant import Etudiant
+from entite.magasin_notes import MagasinNotes
+from index_ordonne import IndexOrdonne
+from statistiques import ColonnesCohorte, PERCENTILES_DEFAUT
+from agregats import AgregatsStatistiques
+
+# Motif d'une matière dans la colonne "Note" : Matiere[devoirs:examen]
+MOTIF_MATIERE = re.compile(r'(\w+)\[(.*?)\]')
 
 class GestionEtudiants:
     def __init__(self):
         self.etudiants = []
         self.etudiants_valides = []
         self.etudiants_invalides = []
+        # Magasins de notes en colonnes créés par les chargements en bloc
+        self.magasins_notes = []
+        # Incrémentée à chaque modification des données (clé des caches de réponses)
+        self.version = 0
+        self._empreinte = None
+        # Dépôt MongoDB optionnel (DepotMongo), version des données qu'il
+        # contient et génération du dépôt que reflètent les données
+        self.depot = None
+        self._version_depot = None
+        self._generation_depot = None
+        # Colonnes des statistiques détaillées, reconstruites à chaque version
+        self._colonnes = None
+        # Index des étudiants valides. Le rang d'un étudiant suit l'ordre de
+        # etudiants_valides ; les index de hachage (clé en minuscules -> étudiants)
+        # et les index ordonnés sur la moyenne et le nom le respectent à clé égale.
+        self._reconstruire_index()
     
-    def charger_donnees_csv(self, chemin_fichier):
-        """Charge les données depuis un fichier CSV"""
+    def charger_donnees_csv(self, chemin_fichier, en_bloc=False, magasin_notes=False):
+        """Charge les données depuis un fichier CSV
+
+        Avec en_bloc=True, les étudiants sont construits directement à partir
+        des colonnes du DataFrame, sans passer par iterrows(). Avec
+        magasin_notes=True (qui implique en_bloc), les notes sont rangées dans
+        un MagasinNotes et chaque étudiant n'en est qu'une vue.
+        """
+        # pandas n'est chargé qu'au premier chargement d'un CSV
+        import pandas as pd
+        
         try:
             df = pd.read_csv(chemin_fichier)
+            if magasin_notes:
+                self.ajouter_etudiants(self._creer_etudiants_depuis_colonnes(df, magasin_notes=True))
+                return True
+            if en_bloc:
+                self.ajouter_etudiants(self._creer_etudiants_depuis_colonnes(df))
+                return True
             for _, row in df.iterrows():
                 etudiant = self._creer_etudiant_depuis_ligne(row)
-                self.etudiants.append(etudiant)
+                self.ajouter_etudiant(etudiant)
             return True
         except Exception as e:
             print(f"Erreur lors du chargement des données: {str(e)}")
@@ -41,9 +82,84 @@ class GestionEtudiants:
         
         return etudiant
     
-    def _parser_notes(self, notes_str):
+    def _creer_etudiants_depuis_colonnes(self, df, magasin_notes=False):
+        """Crée les objets étudiants à partir des colonnes entières du DataFrame"""
+        nb_lignes = len(df)
+        
+        def colonne(nom):
+            # Une colonne absente se comporte comme row.get() : None partout
+            if nom in df.columns:
+                return df[nom].tolist()
+            return [None] * nb_lignes
+        
+        if magasin_notes:
+            notes = df['Note'] if 'Note' in df.columns else [None] * nb_lignes
+            magasin = MagasinNotes.depuis_colonne(notes)
+            self.magasins_notes.append(magasin)
+            return [
+                Etudiant.vue(magasin, position, code=code, numero=numero, nom=nom, prenom=prenom,
+                             date_naissance=date_naissance, classe=classe)
+                for position, (code, numero, nom, prenom, date_naissance, classe) in enumerate(zip(
+                    colonne('CODE'), colonne('Numero'), colonne('Nom'), colonne('Prenom'),
+                    colonne('Date de naissance'), colonne('Classe')
+                ))
+            ]
+        
+        if 'Note' in df.columns:
+            notes = [self._parser_notes(n) for n in df['Note'].tolist()]
+        else:
+            notes = [{}] * nb_lignes
+        
+        etudiants = []
+        for code, numero, nom, prenom, date_naissance, classe, notes_etudiant in zip(
+            colonne('CODE'), colonne('Numero'), colonne('Nom'), colonne('Prenom'),
+            colonne('Date de naissance'), colonne('Classe'), notes
+        ):
+            etudiant = Etudiant(
+                code=code,
+                numero=numero,
+                nom=nom,
+                prenom=prenom,
+                date_naissance=date_naissance,
+                classe=classe,
+                notes=notes_etudiant
+            )
+            etudiant.calculer_moyenne_generale()
+            etudiants.append(etudiant)
+        
+        return etudiants
+    
+    def _creer_etudiants_lisibles(self, df, magasin_notes=False):
+        """_creer_etudiants_depuis_colonnes pour les seules lignes dont les notes se lisent
+
+        Retourne (etudiants, rejetees) : rejetees liste les positions des lignes
+        dont la colonne "Note" fait échouer _parser_notes (note non numérique,
+        plusieurs ':'). Elles ne sont cherchées une à une que si le lot échoue.
+        """
+        try:
+            return self._creer_etudiants_depuis_colonnes(df, magasin_notes=magasin_notes), []
+        except ValueError:
+            pass
+        notes = df['Note'].tolist() if 'Note' in df.columns else []
+        rejetees = []
+        for position, note in enumerate(notes):
+            try:
+                self._parser_notes(note)
+            except ValueError:
+                rejetees.append(position)
+        gardees = [True] * len(df)
+        for position in rejetees:
+            gardees[position] = False
+        df = df[gardees].reset_index(drop=True)
+        return self._creer_etudiants_depuis_colonnes(df, magasin_notes=magasin_notes), rejetees
+    
+    @staticmethod
+    def _parser_notes(notes_str):
         """Parse la chaîne de notes en structure de données"""
         notes_dict = {}
+        # Cellule vide dans le CSV (NaN) : aucune note
+        if not isinstance(notes_str, str):
+            return notes_dict
         matieres = notes_str.split('#')
         
         for matiere in matieres:
@@ -51,7 +167,7 @@ class GestionEtudiants:
             if not matiere:
                 continue
                 
-            match = re.match(r'(\w+)\[(.*?)\]', matiere)
+            match = MOTIF_MATIERE.match(matiere)
             if match:
                 nom_matiere = match.group(1)
                 valeurs = match.group(2)
@@ -69,8 +185,326 @@ class GestionEtudiants:
         
         return notes_dict
     
+    def recalculer_moyennes(self):
+        """Recalcule les moyennes générales de tous les étudiants
+
+        Les étudiants adossés à un magasin de notes sont recalculés en
+        quelques passes vectorisées, les autres un par un.
+        """
+        self.version += 1
+        self._elaguer_magasins()
+        for magasin in self.magasins_notes:
+            magasin.recalculer()
+        for etudiant in self.etudiants:
+            if etudiant._magasin is None:
+                etudiant.calculer_moyenne_generale()
+        self._reconstruire_index()
+    
+    def moyennes_par_matiere(self):
+        """Moyenne de la cohorte pour chaque matière"""
+        resultat = self._agreger_dans_depot("moyennes_par_matiere")
+        if resultat is not None:
+            return resultat
+        
+        # Seuls les étudiants présents comptent : un magasin peut contenir des
+        # lignes d'étudiants remplacés ou détachés depuis (voir _elaguer_magasins)
+        par_magasin = {}  # id(magasin) -> (magasin, positions)
+        autonomes = []
+        for etudiant in self.etudiants:
+            if etudiant._magasin is None:
+                autonomes.append(etudiant)
+            else:
+                par_magasin.setdefault(id(etudiant._magasin), (etudiant._magasin, []))[1].append(etudiant._position)
+        
+        sommes = {}
+        effectifs = {}
+        for magasin, positions in par_magasin.values():
+            if positions == list(range(len(magasin))):
+                positions = None
+            for matiere, (somme, effectif) in magasin.sommes_par_matiere(positions).items():
+                sommes[matiere] = sommes.get(matiere, 0) + somme
+                effectifs[matiere] = effectifs.get(matiere, 0) + effectif
+        for etudiant in autonomes:
+            for matiere in etudiant.notes:
+                sommes[matiere] = sommes.get(matiere, 0) + etudiant.calculer_moyenne_matiere(matiere)
+                effectifs[matiere] = effectifs.get(matiere, 0) + 1
+        return {matiere: round(sommes[matiere] / effectifs[matiere], 2) for matiere in sommes}
+    
+    def statistiques_par_classe(self):
+        """Effectif et moyenne générale des étudiants valides de chaque classe"""
+        resultat = self._agreger_dans_depot("statistiques_par_classe")
+        if resultat is not None:
+            return resultat
+        
+        # Lecture des agrégats tenus à jour, sans parcourir les étudiants
+        agregats = self.agregats()
+        moyennes = agregats.resume("classe")
+        return {
+            classe: {"effectif": effectif, "moyenne": moyennes[classe]["moyenne"] if classe in moyennes else None}
+            for classe, effectif in agregats.inscrits.items()
+        }
+    
+    def statistiques_detaillees(self, groupe="classe", percentiles=PERCENTILES_DEFAUT, seuil_reussite=10,
+                                largeur_histogramme=2):
+        """Moyenne, médiane, écart-type, percentiles, taux de réussite et
+        histogramme des étudiants valides, par classe, par matière ou par
+        classe et matière (voir ColonnesCohorte.statistiques)
+
+        Les colonnes NumPy de la cohorte sont construites une fois par version
+        des données ; chaque appel ne coûte ensuite que des passes vectorisées.
+        """
+        return self._colonnes_cohorte().statistiques(
+            groupe, percentiles=percentiles, seuil_reussite=seuil_reussite, largeur_histogramme=largeur_histogramme
+        )
+    
+    def _colonnes_cohorte(self):
+        if self._colonnes is None or self._colonnes[0] != self.version:
+            self._colonnes = (self.version, ColonnesCohorte.depuis_etudiants(self.etudiants_valides))
+        return self._colonnes[1]
+    
+    def agregats(self):
+        """Agrégats des étudiants valides (AgregatsStatistiques), tenus à jour
+
+        Calculés en entier au premier appel après un changement en bloc
+        (validation, rechargement, recalcul des moyennes), puis mis à jour
+        à chaque ajout, modification ou changement de statut d'un étudiant.
+        """
+        if self._agregats is None:
+            self._agregats = AgregatsStatistiques.depuis_colonnes(self._colonnes_cohorte())
+        return self._agregats
+    
+    def verifier_agregats(self):
+        """Compare les agrégats tenus à jour à un recalcul complet
+
+        Retourne la liste des écarts (vide si les agrégats sont cohérents).
+        """
+        if self._agregats is None:
+            return []
+        reference = AgregatsStatistiques()
+        for etudiant in self.etudiants_valides:
+            reference.ajouter(etudiant.classe, etudiant.moyenne_generale, etudiant.moyennes_matieres())
+        return self._agregats.ecarts(reference)
+    
+    def utiliser_depot(self, depot):
+        """Associe un dépôt MongoDB (DepotMongo) aux données"""
+        self.depot = depot
+        self._version_depot = None
+        self._generation_depot = None
+    
+    def sauvegarder(self):
+        """Remplace le contenu du dépôt par les données
+
+        Le dépôt garde un document par numéro : si des étudiants partagent un
+        numéro, il ne reflète pas exactement les données, et les statistiques
+        restent calculées en mémoire.
+        """
+        self.depot.sauvegarder(self, remplacer=True)
+        self._version_depot = self.version if self.depot.compter() == len(self.etudiants) else None
+        self._generation_depot = self.depot.avancer_generation()
+    
+    def charger_depuis_depot(self):
+        """Remplace les données par celles du dépôt"""
+        # Lue avant le chargement : une écriture pendant celui-ci sera vue plus tard
+        generation = self.depot.generation()
+        self.reinitialiser()
+        self.depot.charger(self)
+        self._version_depot = self.version
+        self._generation_depot = generation
+    
+    def ajouter_et_enregistrer(self, etudiants, valide=None):
+        """Ajoute des étudiants (voir ajouter_etudiants) et les insère dans le dépôt s'il y en a un
+
+        Seuls ces étudiants sont écrits : un dépôt qui reflétait les données
+        les reflète encore après, sauf si un autre processus y a écrit entre-temps.
+        Les documents sont marqués d'un identifiant d'import : si un lot
+        échoue, ceux déjà écrits sont supprimés et l'exception est propagée,
+        sans rien ajouter aux données.
+        """
+        etudiants = list(etudiants)
+        if self.depot is None:
+            self.ajouter_etudiants(etudiants, valide=valide)
+            return
+        synchronise = self.depot_synchronise()
+        importation = uuid.uuid4().hex
+        try:
+            self.depot.enregistrer_etudiants(etudiants, valide=valide, importation=importation)
+        except Exception:
+            try:
+                self.depot.annuler_importation(importation)
+            except Exception as e:
+                print(f"Erreur d'annulation de l'import {importation}: {e}")
+            raise
+        self.ajouter_etudiants(etudiants, valide=valide)
+        generation = self.depot.avancer_generation()
+        if self._generation_depot is not None and generation == self._generation_depot + 1:
+            self._generation_depot = generation
+            if synchronise:
+                self._version_depot = self.version
+    
+    def depot_synchronise(self, generation=None):
+        """Vrai si le dépôt contient exactement la version courante des données
+
+        Faux aussi si un autre processus a écrit dans le dépôt depuis : sa
+        génération est lue dans le dépôt, sauf si elle est fournie
+        (lecture asynchrone dans main_async).
+        """
+        if self.depot is None or self._version_depot != self.version:
+            return False
+        if generation is None:
+            generation = self.depot.generation()
+        return generation == self._generation_depot
+    
+    def depot_modifie_ailleurs(self):
+        """Vrai si un autre processus a écrit dans le dépôt depuis que les données en ont été lues
+
+        Interroge le dépôt ; faux sans dépôt ou pour des données qui n'en
+        viennent pas (ni chargées ni sauvegardées).
+        """
+        if self.depot is None or self._generation_depot is None:
+            return False
+        return self.depot.generation() != self._generation_depot
+    
+    def _agreger_dans_depot(self, statistique):
+        """Calcule la statistique par agrégation dans MongoDB
+
+        Seulement si le dépôt contient la version courante des données ; sinon,
+        ou en cas d'erreur MongoDB, retourne None et le calcul se fait en mémoire.
+        """
+        try:
+            if not self.depot_synchronise():
+                return None
+            return getattr(self.depot, statistique)()
+        except Exception as e:
+            print(f"Erreur d'agrégation MongoDB ({statistique}): {e}")
+            return None
+    
+    def empreinte(self):
+        """Empreinte du contenu des données
+
+        Deux processus qui ont chargé les mêmes données obtiennent la même
+        empreinte : elle sert de génération aux clés de cache partagées (Redis).
+        Elle est calculée au plus une fois par version.
+        """
+        if self._empreinte is not None and self._empreinte[0] == self.version:
+            return self._empreinte[1]
+        
+        hachage = hashlib.blake2b(digest_size=16)
+        for magasin in self.magasins_notes:
+            hachage.update(pickle.dumps(magasin.matieres))
+            for tableau in (magasin.etudiant_offsets, magasin.matiere_ids, magasin.notes_examen,
+                            magasin.devoirs_offsets, magasin.notes_devoirs):
+                hachage.update(tableau.tobytes())
+        hachage.update(pickle.dumps([
+            (e.code, e.numero, e.nom, e.prenom, e.date_naissance, e.classe, e.moyenne_generale,
+             e._notes if e._magasin is None else e._position)
+            for e in self.etudiants
+        ]))
+        # Le partage valides / invalides, par les seuls identifiants
+        for liste in (self.etudiants_valides, self.etudiants_invalides):
+            hachage.update(pickle.dumps([(e.code, e.numero) for e in liste]))
+        self._empreinte = (self.version, hachage.hexdigest())
+        return self._empreinte[1]
+    
+    def ajouter_etudiant(self, etudiant, valide=None):
+        """Ajoute un étudiant
+
+        valide=True ou False le range aussi directement parmi les étudiants
+        valides ou invalides ; avec None, il le sera au prochain valider_donnees.
+        """
+        self.version += 1
+        self.etudiants.append(etudiant)
+        if valide:
+            self.etudiants_valides.append(etudiant)
+            self._indexer(etudiant)
+        elif valide is not None:
+            self.etudiants_invalides.append(etudiant)
+    
+    def ajouter_etudiants(self, etudiants, valide=None):
+        """Ajoute plusieurs étudiants (voir ajouter_etudiant)
+
+        Avec valide=True, ils sont indexés ensemble (_indexer_plusieurs).
+        """
+        if not valide:
+            for etudiant in etudiants:
+                self.ajouter_etudiant(etudiant, valide=valide)
+            return
+        etudiants = list(etudiants)
+        self.version += 1
+        self.etudiants.extend(etudiants)
+        self.etudiants_valides.extend(etudiants)
+        self._indexer_plusieurs(etudiants)
+    
+    def remplacer_etudiant(self, ancien, nouveau):
+        """Remplace un étudiant par un autre, à la même place dans chaque liste"""
+        self.version += 1
+        for liste in (self.etudiants, self.etudiants_valides, self.etudiants_invalides):
+            for position, etudiant in enumerate(liste):
+                if etudiant is ancien:
+                    liste[position] = nouveau
+                    break
+        if id(ancien) in self._entrees_index:
+            rang = self._desindexer(ancien)
+            self._indexer(nouveau, rang)
+        if ancien._magasin is not None and nouveau._magasin is not ancien._magasin:
+            self._elaguer_magasins()
+    
+    def _elaguer_magasins(self):
+        """Oublie les magasins de notes dont plus aucun étudiant n'est une vue"""
+        utilises = {id(etudiant._magasin) for etudiant in self.etudiants if etudiant._magasin is not None}
+        self.magasins_notes = [magasin for magasin in self.magasins_notes if id(magasin) in utilises]
+    
+    def reinitialiser(self):
+        """Supprime tous les étudiants et leurs index"""
+        self.version += 1
+        self.etudiants = []
+        self.etudiants_valides = []
+        self.etudiants_invalides = []
+        self.magasins_notes = []
+        self._reconstruire_index()
+    
+    def copier(self):
+        """Copie modifiable des données, pour la copie sur écriture (DonneesPartagees)
+
+        Les listes, les index et les agrégats sont copiés ; les étudiants et les
+        magasins de notes sont partagés avec l'original et ne doivent pas être
+        modifiés sur place (remplacer_etudiant plutôt qu'actualiser_etudiant).
+        """
+        copie = copy.copy(self)
+        copie.etudiants = list(self.etudiants)
+        copie.etudiants_valides = list(self.etudiants_valides)
+        copie.etudiants_invalides = list(self.etudiants_invalides)
+        copie.magasins_notes = list(self.magasins_notes)
+        copie._index_nom = {cle: list(groupe) for cle, groupe in self._index_nom.items()}
+        copie._index_classe = {cle: list(groupe) for cle, groupe in self._index_classe.items()}
+        copie._index_numero = {cle: list(groupe) for cle, groupe in self._index_numero.items()}
+        copie._index_moyenne = self._index_moyenne.copier()
+        copie._index_tri_nom = self._index_tri_nom.copier()
+        copie._index_moyenne_classe = {cle: index.copier() for cle, index in self._index_moyenne_classe.items()}
+        copie._entrees_index = dict(self._entrees_index)
+        agregats = self._agregats
+        copie._agregats = agregats.copier() if agregats is not None else None
+        return copie
+    
+    def instantane(self):
+        """Les données elles-mêmes (même interface que DonneesPartagees)"""
+        return self
+    
+    def remplacer(self, nouvelle):
+        """Reprend sur place les données d'un autre GestionEtudiants
+
+        Même interface que DonneesPartagees.remplacer ; la version continue de
+        croître et le dépôt reste associé.
+        """
+        version, depot = self.version, self.depot
+        self.__dict__.update(nouvelle.__dict__)
+        self.version = max(nouvelle.version, version + 1)
+        if self.depot is None:
+            self.depot = depot
+            self._version_depot = None
+    
     def valider_donnees(self):
         """Valide les données des étudiants"""
+        self.version += 1
         self.etudiants_valides = []
         self.etudiants_invalides = []
         
@@ -79,6 +513,150 @@ class GestionEtudiants:
                 self.etudiants_valides.append(etudiant)
             else:
                 self.etudiants_invalides.append(etudiant)
+        
+        self._reconstruire_index()
+    
+    def changer_statut(self, etudiant, valide):
+        """Fait passer un étudiant dans les valides (valide=True) ou les invalides"""
+        depart, arrivee = self.etudiants_invalides, self.etudiants_valides
+        if not valide:
+            depart, arrivee = arrivee, depart
+        for position, autre in enumerate(depart):
+            if autre is etudiant:
+                del depart[position]
+                break
+        else:
+            if any(autre is etudiant for autre in arrivee):
+                return
+        self.version += 1
+        arrivee.append(etudiant)
+        if valide:
+            self._indexer(etudiant)
+        elif id(etudiant) in self._entrees_index:
+            self._desindexer(etudiant)
+    
+    def actualiser_etudiant(self, etudiant):
+        """Met à jour les index et les agrégats après une modification d'un étudiant
+
+        Des notes modifiées sur place doivent être réaffectées (etudiant.notes =
+        ...) : l'ancien dictionnaire sert à retirer l'ancienne contribution.
+        """
+        self.version += 1
+        entree = self._entrees_index.get(id(etudiant))
+        if entree is not None:
+            self._indexer(etudiant, self._desindexer(etudiant))
+            # Des notes réaffectées ont détaché l'étudiant de son magasin
+            if entree[5] is not None and etudiant._magasin is None:
+                self._elaguer_magasins()
+    
+    @staticmethod
+    def _cle(valeur):
+        """Clé d'index : la valeur en minuscules, None si ce n'est pas une chaîne"""
+        return valeur.lower() if isinstance(valeur, str) else None
+    
+    def _indexer(self, etudiant, rang=None, ordonnes=None):
+        """Ajoute un étudiant valide aux index
+
+        Si ordonnes est une liste, les entrées des index ordonnés y sont
+        ajoutées au lieu d'être insérées (voir _indexer_plusieurs).
+        """
+        if rang is None:
+            rang = self._prochain_rang
+            self._prochain_rang += 1
+        # Clés mémorisées pour pouvoir retirer l'étudiant même s'il a changé depuis
+        cles = (self._cle(etudiant.nom), self._cle(etudiant.classe), self._cle(etudiant.numero))
+        moyenne_generale = etudiant.moyenne_generale
+        moyenne = moyenne_generale or 0
+        # Et de quoi retrouver sa contribution aux agrégats : classe, moyenne et
+        # notes (sa ligne du magasin, ou son dictionnaire de notes)
+        source = etudiant._position if etudiant._magasin is not None else etudiant._notes
+        entree = (rang, cles, moyenne, etudiant.classe, moyenne_generale, etudiant._magasin, source)
+        self._entrees_index[id(etudiant)] = entree
+        if self._agregats is not None:
+            self._agregats.ajouter(*self._contribution(entree))
+        
+        for index, cle in zip((self._index_nom, self._index_classe, self._index_numero), cles):
+            if cle is None:
+                continue
+            groupe = index.setdefault(cle, [])
+            # Garder chaque groupe dans l'ordre des rangs (ordre de etudiants_valides)
+            position = len(groupe)
+            while position > 0 and self._entrees_index[id(groupe[position - 1])][0] > rang:
+                position -= 1
+            groupe.insert(position, etudiant)
+        
+        if ordonnes is not None:
+            ordonnes.append((moyenne, cles[0] or '', cles[1], rang, etudiant))
+            return rang
+        self._index_moyenne.ajouter(moyenne, rang, etudiant)
+        self._index_tri_nom.ajouter(cles[0] or '', rang, etudiant)
+        if cles[1] is not None:
+            self._index_moyenne_classe.setdefault(cles[1], IndexOrdonne()).ajouter(moyenne, rang, etudiant)
+        return rang
+    
+    def _indexer_plusieurs(self, etudiants):
+        """Ajoute des étudiants valides aux index, les index ordonnés en une fusion chacun"""
+        ordonnes = []
+        for etudiant in etudiants:
+            self._indexer(etudiant, ordonnes=ordonnes)
+        self._index_moyenne.ajouter_plusieurs((moyenne, rang, e) for moyenne, _, _, rang, e in ordonnes)
+        self._index_tri_nom.ajouter_plusieurs((nom, rang, e) for _, nom, _, rang, e in ordonnes)
+        par_classe = {}
+        for moyenne, _, classe, rang, etudiant in ordonnes:
+            if classe is not None:
+                par_classe.setdefault(classe, []).append((moyenne, rang, etudiant))
+        for classe, elements in par_classe.items():
+            self._index_moyenne_classe.setdefault(classe, IndexOrdonne()).ajouter_plusieurs(elements)
+    
+    def _desindexer(self, etudiant):
+        """Retire un étudiant des index et retourne son rang"""
+        entree = self._entrees_index.pop(id(etudiant))
+        rang, cles, moyenne = entree[:3]
+        if self._agregats is not None:
+            self._agregats.retirer(*self._contribution(entree))
+        for index, cle in zip((self._index_nom, self._index_classe, self._index_numero), cles):
+            groupe = index.get(cle)
+            if groupe is None:
+                continue
+            for position, autre in enumerate(groupe):
+                if autre is etudiant:
+                    del groupe[position]
+                    break
+            if not groupe:
+                del index[cle]
+        
+        self._index_moyenne.retirer(moyenne, rang)
+        self._index_tri_nom.retirer(cles[0] or '', rang)
+        if cles[1] is not None:
+            index_classe = self._index_moyenne_classe[cles[1]]
+            index_classe.retirer(moyenne, rang)
+            if not len(index_classe):
+                del self._index_moyenne_classe[cles[1]]
+        return rang
+    
+    @staticmethod
+    def _contribution(entree):
+        """(classe, moyenne, {matiere: moyenne}) d'un étudiant tel qu'il a été indexé"""
+        classe, moyenne, magasin, source = entree[3:]
+        if magasin is not None:
+            return classe, moyenne, magasin.moyennes_etudiant(source)
+        return classe, moyenne, Etudiant(notes=source).moyennes_matieres()
+    
+    def _reconstruire_index(self):
+        """Reconstruit les index à partir de etudiants_valides
+
+        Les agrégats seront recalculés en entier à la prochaine lecture.
+        """
+        self._agregats = None
+        self._index_nom = {}
+        self._index_classe = {}
+        self._index_numero = {}
+        self._index_moyenne = IndexOrdonne()
+        self._index_tri_nom = IndexOrdonne()
+        self._index_moyenne_classe = {}
+        self._entrees_index = {}
+        self._prochain_rang = 0
+        self._indexer_plusieurs(self.etudiants_valides)
     
     def _est_etudiant_valide(self, etudiant):
         """Vérifie si les données d'un étudiant sont valides"""
@@ -86,12 +664,17 @@ class GestionEtudiants:
         if not (etudiant.code and etudiant.numero and etudiant.nom and etudiant.prenom):
             return False
             
-        # Vérification du format de date
-        try:
-            if etudiant.date_naissance:
-                datetime.strptime(etudiant.date_naissance, '%d/%m/%y')
-        except ValueError:
-            return False
+        # Vérification du format de date : jj/mm/aa du CSV d'origine, ou
+        # jj/mm/aaaa tel que l'écrit Validator.formater_date à l'ingestion
+        if etudiant.date_naissance:
+            for format_date in ('%d/%m/%y', '%d/%m/%Y'):
+                try:
+                    datetime.strptime(etudiant.date_naissance, format_date)
+                    break
+                except ValueError:
+                    pass
+            else:
+                return False
             
         # Vérification que chaque matière a au moins une note
         if not etudiant.notes:
@@ -101,38 +684,50 @@ class GestionEtudiants:
     
     def rechercher_par_nom(self, nom):
         """Recherche des étudiants par nom"""
-        resultats = []
-        for etudiant in self.etudiants_valides:
-            if etudiant.nom.lower() == nom.lower():
-                resultats.append(etudiant)
-        return resultats
-    
-    def trier_par_moyenne(self, ordre="descendant"):
-        """Trie les étudiants par moyenne générale"""
-        return sorted(
-            self.etudiants_valides, 
-            key=lambda e: e.moyenne_generale or 0, 
-            reverse=(ordre.lower() == "descendant")
-        )
+        return list(self._index_nom.get(nom.lower(), ()))
+    
+    def rechercher_par_numero(self, numero):
+        """Recherche des étudiants par numéro (sans tenir compte de la casse)"""
+        return list(self._index_numero.get(numero.lower(), ()))
+    
+    def trier_par_moyenne(self, ordre="descendant", debut=0, limite=None, classe=None):
+        """Trie les étudiants par moyenne générale
+
+        Lit l'index ordonné sur la moyenne (celui de la classe si elle est
+        donnée) : debut et limite permettent de paginer sans trier toute la liste.
+        """
+        index = self._index_moyenne
+        if classe is not None:
+            index = self._index_moyenne_classe.get(classe.lower(), IndexOrdonne())
+        return index.parcourir(descendant=(ordre.lower() == "descendant"), debut=debut, limite=limite)
     
-    def trier_par_nom(self, ordre="ascendant"):
+    def trier_par_nom(self, ordre="ascendant", debut=0, limite=None):
         """Trie les étudiants par nom"""
-        return sorted(
-            self.etudiants_valides, 
-            key=lambda e: e.nom.lower(), 
-            reverse=(ordre.lower() == "descendant")
+        return self._index_tri_nom.parcourir(descendant=(ordre.lower() == "descendant"), debut=debut, limite=limite)
+    
+    def meilleurs(self, k, classe=None):
+        """Les k meilleures moyennes générales (de la classe si elle est donnée)"""
+        return self.trier_par_moyenne("descendant", limite=k, classe=classe)
+    
+    def rechercher_par_moyenne(self, minimum=None, maximum=None, ordre="ascendant", debut=0, limite=None):
+        """Étudiants dont la moyenne générale est comprise entre minimum et maximum (inclus)"""
+        return self._index_moyenne.intervalle(
+            minimum, maximum, descendant=(ordre.lower() == "descendant"), debut=debut, limite=limite
         )
     
     def rechercher_par_classe(self, classe):
         """Recherche des étudiants par classe"""
-        resultats = []
-        for etudiant in self.etudiants_valides:
-            if etudiant.classe and etudiant.classe.lower() == classe.lower():
-                resultats.append(etudiant)
-        return resultats
+        return list(self._index_classe.get(classe.lower(), ()))
     
-    def obtenir_statistiques(self):
-        """Obtient des statistiques sur les données"""
+    def obtenir_statistiques(self, depot=True):
+        """Obtient des statistiques sur les données
+
+        depot=False les calcule en mémoire même si le dépôt est à jour.
+        """
+        resultat = self._agreger_dans_depot("statistiques") if depot else None
+        if resultat is not None:
+            return resultat
+        
         return {
             "total": len(self.etudiants),
             "valides": len(self.etudiants_valides),
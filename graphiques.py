@@ -0,0 +1,76 @@
+# graphiques.py
+import threading
+import zlib
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+TAILLE_FIGURE = (10, 6)
+RESOLUTION = 100
+
+# Figures réutilisées, une par fil d'exécution : les objets matplotlib ne
+# doivent pas être partagés entre fils
+_modeles = threading.local()
+
+
+def _modele_moyennes():
+    """Figure et axes du graphique des moyennes du fil courant, créés au premier appel"""
+    modele = getattr(_modeles, "moyennes", None)
+    if modele is None:
+        figure = Figure(figsize=TAILLE_FIGURE, dpi=RESOLUTION)
+        FigureCanvasAgg(figure)
+        modele = _modeles.moyennes = (figure, figure.add_subplot())
+    return modele
+
+
+def graphique_moyennes(noms, moyennes):
+    """Diagramme en barres des moyennes, rendu en mémoire par Agg
+
+    N'utilise pas pyplot ni son état global : peut être appelé depuis
+    plusieurs fils ou processus à la fois. Retourne une image pour
+    inserer_image.
+    """
+    figure, axes = _modele_moyennes()
+    axes.clear()
+    axes.bar(noms, moyennes, color='skyblue')
+    axes.set_xlabel('Étudiants')
+    axes.set_ylabel('Moyenne générale')
+    axes.set_title('Moyennes générales des étudiants')
+    for etiquette in axes.get_xticklabels():
+        etiquette.set_rotation(45)
+        etiquette.set_horizontalalignment('right')
+    figure.tight_layout()
+    figure.canvas.draw()
+    return image_rgb(figure.canvas)
+
+
+def image_rgb(canvas):
+    """Pixels RGB d'un canvas Agg dessiné, au format des images de FPDF
+
+    La couche alpha est ignorée (fond opaque) : FPDF n'a ni PNG à décoder
+    ni masque de transparence à extraire.
+    """
+    rgba = np.asarray(canvas.buffer_rgba())
+    hauteur, largeur = rgba.shape[:2]
+    return {
+        'w': largeur,
+        'h': hauteur,
+        'cs': 'DeviceRGB',
+        'bpc': 8,
+        'f': 'FlateDecode',
+        'data': zlib.compress(np.ascontiguousarray(rgba[:, :, :3]).tobytes()),
+    }
+
+
+def inserer_image(pdf, image, nom, x=None, y=None, w=0, h=0):
+    """Place sur la page courante du FPDF une image produite en mémoire
+
+    FPDF 1.7.2 ne lit les images que depuis un fichier : l'image est inscrite
+    directement dans sa table des images, sous un nom qui n'est pas un
+    chemin.
+    """
+    if nom not in pdf.images:
+        # Copie : FPDF retire les données de l'image une fois le PDF écrit
+        pdf.images[nom] = dict(image, i=len(pdf.images) + 1)
+    pdf.image(nom, x=x, y=y, w=w, h=h)
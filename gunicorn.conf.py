@@ -0,0 +1,16 @@
+# gunicorn.conf.py
+# Lu automatiquement par gunicorn depuis le dossier de lancement ; les
+# options de la ligne de commande (Dockerfile) s'y ajoutent.
+import os
+
+
+def post_worker_init(worker):
+    """Préchauffe chaque worker après le fork, avant sa première requête
+
+    Avec PRECHAUFFAGE=1, le worker charge pandas, matplotlib et fpdf et
+    initialise l'application (main.prechauffer) : le démarrage est plus
+    long, mais aucune requête ne paie ces chargements.
+    """
+    if os.environ.get('PRECHAUFFAGE', '0') == '1':
+        from main import prechauffer
+        prechauffer()
@@ -0,0 +1,84 @@
+# index_ordonne.py
+from bisect import bisect_left, bisect_right
+
+
+class IndexOrdonne:
+    """Éléments triés par (clé, rang), maintenus avec bisect
+
+    Le rang départage les clés égales : à clé égale, les éléments restent dans
+    l'ordre de leur rang, dans les deux sens de parcours (comme sorted() avec
+    ou sans reverse=True).
+    """
+
+    def __init__(self):
+        self._cles = []
+        self._elements = []
+
+    def __len__(self):
+        return len(self._cles)
+
+    def copier(self):
+        copie = IndexOrdonne()
+        copie._cles = list(self._cles)
+        copie._elements = list(self._elements)
+        return copie
+
+    def ajouter(self, cle, rang, element):
+        position = bisect_right(self._cles, (cle, rang))
+        self._cles.insert(position, (cle, rang))
+        self._elements.insert(position, element)
+
+    def ajouter_plusieurs(self, elements, seuil_fusion=256):
+        """Ajoute des (cle, rang, element)
+
+        À partir de seuil_fusion éléments, ils sont triés puis fusionnés avec
+        l'index en un seul tri, au lieu d'une insertion (O(n)) chacun.
+        """
+        elements = list(elements)
+        if len(elements) < seuil_fusion:
+            for cle, rang, element in elements:
+                self.ajouter(cle, rang, element)
+            return
+        # (cle, rang) est unique : les éléments eux-mêmes ne sont jamais comparés
+        fusion = sorted([*zip(self._cles, self._elements), *(((cle, rang), element) for cle, rang, element in elements)])
+        self._cles = [cle for cle, _ in fusion]
+        self._elements = [element for _, element in fusion]
+
+    def retirer(self, cle, rang):
+        position = bisect_left(self._cles, (cle, rang))
+        if position < len(self._cles) and self._cles[position] == (cle, rang):
+            del self._cles[position]
+            del self._elements[position]
+
+    def parcourir(self, descendant=False, debut=0, limite=None):
+        """Éléments dans l'ordre de la clé, à partir du debut-ième, au plus limite"""
+        return self._extraire(0, len(self._cles), descendant, debut, limite)
+
+    def intervalle(self, minimum=None, maximum=None, descendant=False, debut=0, limite=None):
+        """Éléments dont la clé est comprise entre minimum et maximum (inclus)"""
+        bas = 0 if minimum is None else bisect_left(self._cles, (minimum,))
+        haut = len(self._cles) if maximum is None else bisect_right(self._cles, (maximum, float('inf')))
+        return self._extraire(bas, haut, descendant, debut, limite)
+
+    def _extraire(self, bas, haut, descendant, debut, limite):
+        if not descendant:
+            fin = haut if limite is None else min(haut, bas + debut + limite)
+            return self._elements[bas + debut:fin]
+
+        # Parcours descendant par groupes de clés égales, chacun dans l'ordre des rangs
+        resultats = []
+        fin = haut
+        while fin > bas and (limite is None or len(resultats) < limite):
+            cle = self._cles[fin - 1][0]
+            commencement = bisect_left(self._cles, (cle,), bas, fin)
+            taille = fin - commencement
+            if debut >= taille:
+                debut -= taille
+            else:
+                groupe = self._elements[commencement + debut:fin]
+                debut = 0
+                if limite is not None:
+                    groupe = groupe[:limite - len(resultats)]
+                resultats.extend(groupe)
+            fin = commencement
+        return resultats
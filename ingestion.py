@@ -0,0 +1,347 @@
+# ingestion.py
+import csv
+import json
+
+import numpy as np
+import pandas as pd
+from gestion_etudiants import GestionEtudiants
+from service import Service
+from validation.validator import Validator
+
+
+class Sortie:
+    """Destination des lignes produites par PipelineIngestion"""
+
+    def ecrire(self, lignes):
+        """Reçoit les lignes (dictionnaires) d'un morceau
+
+        Peut retourner les lignes qu'elle refuse, {position: erreurs} :
+        PipelineIngestion les envoie alors aux sorties des lignes invalides.
+        """
+        raise NotImplementedError
+
+    def fermer(self):
+        """Appelée une fois le fichier entièrement traité"""
+        pass
+
+
+class SortieMemoire(Sortie):
+    """Ajoute les lignes valides aux étudiants d'un GestionEtudiants"""
+
+    def __init__(self, gestion_etudiants, magasin_notes=True):
+        self.gestion_etudiants = gestion_etudiants
+        self.magasin_notes = magasin_notes
+
+    def ecrire(self, lignes):
+        """Ajoute les étudiants ; retourne les lignes dont les notes ne se lisent pas"""
+        if not lignes:
+            return {}
+        etudiants, rejetees = self.gestion_etudiants._creer_etudiants_lisibles(
+            pd.DataFrame(lignes), magasin_notes=self.magasin_notes
+        )
+        # Les lignes ont déjà passé le Validator : elles sont directement valides
+        self.gestion_etudiants.ajouter_etudiants(etudiants, valide=True)
+        return {position: ['Notes invalides'] for position in rejetees}
+
+
+class SortieMongo(Sortie):
+    """Insère les lignes dans une collection MongoDB par lots"""
+
+    def __init__(self, collection, taille_lot=1000):
+        self.collection = collection
+        self.taille_lot = taille_lot
+
+    def ecrire(self, lignes):
+        for debut in range(0, len(lignes), self.taille_lot):
+            # insert_many ajoute un _id aux documents : on lui passe des copies
+            documents = [dict(ligne) for ligne in lignes[debut:debut + self.taille_lot]]
+            self.collection.insert_many(documents, ordered=False)
+
+
+class SortieFichier(Sortie):
+    """Écrit les lignes dans un fichier CSV ou NDJSON au fil de l'eau"""
+
+    def __init__(self, chemin_fichier, format_fichier="csv"):
+        self.chemin_fichier = chemin_fichier
+        self.format_fichier = format_fichier
+        # Ouvert à la première écriture : rien ne reste ouvert si le pipeline ne tourne pas
+        self.fichier = None
+        self.writer = None
+
+    def _preparer(self, ligne):
+        return ligne
+
+    def ecrire(self, lignes):
+        if self.fichier is None:
+            self.fichier = open(self.chemin_fichier, 'w', newline='', encoding='utf-8')
+        for ligne in lignes:
+            ligne = self._preparer(ligne)
+            if self.format_fichier == "ndjson":
+                # Les cellules vides (NaN) deviennent null pour rester du JSON valide
+                ligne = {cle: None if valeur != valeur else valeur for cle, valeur in ligne.items()}
+                self.fichier.write(json.dumps(ligne, ensure_ascii=False, default=str) + "\n")
+                continue
+            if self.writer is None:
+                self.writer = csv.DictWriter(self.fichier, fieldnames=list(ligne.keys()), extrasaction='ignore')
+                self.writer.writeheader()
+            self.writer.writerow(ligne)
+
+    def fermer(self):
+        if self.fichier is None:
+            # Aucune ligne : le fichier est tout de même créé, vide
+            open(self.chemin_fichier, 'w').close()
+            return
+        self.fichier.close()
+        self.fichier = None
+
+
+class SortieErreurs(SortieFichier):
+    """Fichier des lignes invalides, avec la liste de leurs erreurs"""
+
+    def _preparer(self, ligne):
+        if self.format_fichier == "csv" and isinstance(ligne.get('erreurs'), list):
+            ligne = dict(ligne, erreurs="; ".join(ligne['erreurs']))
+        return ligne
+
+
+class PipelineIngestion:
+    """Lit un CSV par morceaux, valide chaque morceau et l'envoie aux sorties
+
+    Un seul morceau est en mémoire à la fois : la mémoire utilisée dépend de
+    taille_morceau et non de la taille du fichier (hors sorties en mémoire).
+
+    Les lignes valides qu'une sortie refuse (notes illisibles pour
+    SortieMemoire) passent aux lignes invalides ; les sorties valides
+    suivantes ne les reçoivent pas.
+    """
+
+    def __init__(self, sorties_valides=None, sorties_invalides=None, taille_morceau=50000):
+        self.sorties_valides = sorties_valides or []
+        self.sorties_invalides = sorties_invalides or []
+        self.taille_morceau = taille_morceau
+
+    def executer(self, chemin_fichier):
+        """Traite le fichier et retourne les compteurs de l'ingestion"""
+        statistiques = {"morceaux": 0, "lignes": 0, "valides": 0, "invalides": 0}
+        try:
+            for morceau in pd.read_csv(chemin_fichier, chunksize=self.taille_morceau):
+                morceau.columns = [col.strip() for col in morceau.columns]
+                lignes_valides, lignes_invalides = Service.separer_lignes(morceau)
+
+                for sortie in self.sorties_valides:
+                    refusees = sortie.ecrire(lignes_valides)
+                    if refusees:
+                        lignes_invalides = lignes_invalides + [
+                            dict(lignes_valides[position], erreurs=erreurs) for position, erreurs in refusees.items()
+                        ]
+                        lignes_valides = [ligne for position, ligne in enumerate(lignes_valides) if position not in refusees]
+                for sortie in self.sorties_invalides:
+                    sortie.ecrire(lignes_invalides)
+
+                statistiques["morceaux"] += 1
+                statistiques["lignes"] += len(morceau)
+                statistiques["valides"] += len(lignes_valides)
+                statistiques["invalides"] += len(lignes_invalides)
+        finally:
+            for sortie in self.sorties_valides + self.sorties_invalides:
+                sortie.fermer()
+        return statistiques
+
+
+class IngestionNdjson:
+    """Ajoute aux données partagées les étudiants d'un flux NDJSON, validés par lots
+
+    Un objet JSON par ligne, avec les colonnes du CSV (CODE, Numero, Nom,
+    Prenom, Date de naissance, Classe, Note). Les lignes sont validées par
+    lots de taille_lot (Validator.analyser_lot) au fil de la lecture. Le
+    rapport est produit lot par lot, en NDJSON : une ligne par ligne reçue
+    (seulement les rejetées avec erreurs_seules=True), puis un résumé.
+
+    Les étudiants valides sont publiés en une seule fois à la fin du flux
+    (DonneesPartagees.modifier) : les lecteurs les voient tous ou aucun, et
+    un flux interrompu n'ajoute rien. Seuls les étudiants construits, pas
+    les lignes reçues, restent en mémoire jusque-là. Avec un dépôt MongoDB,
+    ils y sont insérés avant la publication (ajouter_et_enregistrer).
+
+    Un numéro déjà présent dans les données, ou plus haut dans le flux, est
+    rejeté : renvoyer le même fichier n'ajoute rien. Les numéros sont
+    vérifiés à nouveau à la publication, contre les données et le dépôt du
+    moment ; ceux qu'une autre requête a ajoutés entre-temps sont écartés et
+    leurs lignes listées dans le résumé (duplicates).
+
+    Au-delà de octets_max octets reçus, le reste du flux est ignoré et rien
+    n'est publié : le résumé porte l'erreur.
+    """
+
+    def __init__(self, donnees, taille_lot=5000, erreurs_seules=False, octets_max=None):
+        self.donnees = donnees
+        self.taille_lot = taille_lot
+        self.erreurs_seules = erreurs_seules
+        self.octets_max = octets_max
+        # Construit les étudiants et garde leurs magasins de notes jusqu'à la publication
+        self._fabrique = GestionEtudiants()
+        self._etudiants = []
+        self._lignes_etudiants = []  # numéro de ligne de chaque étudiant construit
+        # Numéros (en minuscules) des données, de la version _version_numeros, et du flux
+        self._numeros_donnees = set()
+        self._version_numeros = None
+        self._numeros_flux = set()
+        self._lot = []  # (numéro de ligne, enregistrement)
+        self._reste = b""  # début de la ligne coupée par le dernier morceau
+        self._rapport = []
+        self.lignes = 0
+        self.valides = 0
+        self.invalides = 0
+        self.octets = 0
+        self.erreur = None  # flux refusé en cours de route
+
+    def lire(self, ligne):
+        """Ajoute une ligne du flux (texte ou octets) ; vrai quand le lot est plein"""
+        ligne = ligne.strip()
+        if not ligne:
+            return False
+        self.lignes += 1
+        try:
+            enregistrement = json.loads(ligne)
+            if not isinstance(enregistrement, dict):
+                raise ValueError("objet attendu")
+        except ValueError as e:
+            self._rejeter(self.lignes, [f"JSON invalide: {e}"])
+            return False
+        self._lot.append((self.lignes, enregistrement))
+        return len(self._lot) >= self.taille_lot
+
+    def lire_morceau(self, morceau):
+        """Ajoute un morceau d'octets du flux, coupé n'importe où ; vrai quand le lot est plein
+
+        Le lot peut dépasser taille_lot des lignes d'un morceau. Un morceau
+        qui fait dépasser octets_max est ignoré, ainsi que les suivants.
+        """
+        self.octets += len(morceau)
+        if self.octets_max is not None and self.octets > self.octets_max:
+            self.erreur = f"Corps trop volumineux (plus de {self.octets_max} octets)"
+        if self.erreur is not None:
+            return False
+        lignes = (self._reste + morceau).split(b"\n")
+        self._reste = lignes.pop()
+        for ligne in lignes:
+            self.lire(ligne)
+        return len(self._lot) >= self.taille_lot
+
+    @staticmethod
+    def _cle(numero):
+        # Les numéros se comparent sans tenir compte de la casse (rechercher_par_numero)
+        return str(numero).lower()
+
+    def _numeros_de(self, gestion):
+        """Numéros des étudiants de gestion, relus seulement quand sa version change"""
+        if gestion.version != self._version_numeros:
+            self._numeros_donnees = {self._cle(e.numero) for e in gestion.etudiants if e.numero is not None}
+            self._version_numeros = gestion.version
+        return self._numeros_donnees
+
+    def _rejeter(self, numero_ligne, erreurs):
+        self.invalides += 1
+        self._rapport.append(json.dumps({"line": numero_ligne, "status": "invalid", "errors": erreurs},
+                                        ensure_ascii=False))
+
+    def valider_lot(self):
+        """Valide le lot en cours ; retourne le rapport en attente (texte NDJSON)"""
+        if self._lot:
+            numeros_lignes = [numero for numero, _ in self._lot]
+            df = pd.DataFrame([enregistrement for _, enregistrement in self._lot])
+            self._lot = []
+            erreurs, dates, classes = Validator.analyser_lot(df)
+            masque = ~erreurs.any(axis=1)
+            libelles = np.array(Validator.ERREURS, dtype=object)
+            codes = [libelles[erreurs_ligne].tolist() for erreurs_ligne in erreurs]
+
+            if masque.any():
+                valides = df[masque].reset_index(drop=True)
+                # Mêmes valeurs formatées que Service.separer_lignes
+                valides['Date de naissance'] = dates[masque].to_numpy()
+                valides['Classe'] = classes[masque].to_numpy()
+                if 'Prenom' not in valides.columns and 'Prénom' in valides.columns:
+                    valides['Prenom'] = valides['Prénom']
+                etudiants, rejetees = self._fabrique._creer_etudiants_lisibles(valides, magasin_notes=True)
+                # Notes acceptées par le Validator mais illisibles : la ligne est rejetée
+                positions_valides = np.flatnonzero(masque)
+                for position in rejetees:
+                    masque[positions_valides[position]] = False
+                    codes[positions_valides[position]] = ['Notes invalides']
+
+                numeros_donnees = self._numeros_de(self.donnees.instantane())
+                rejetees = set(rejetees)
+                gardees = (position for position in range(len(valides)) if position not in rejetees)
+                for etudiant, position in zip(etudiants, gardees):
+                    position = positions_valides[position]
+                    cle = self._cle(etudiant.numero)
+                    if cle in numeros_donnees or cle in self._numeros_flux:
+                        masque[position] = False
+                        codes[position] = ['Numero déjà présent']
+                        continue
+                    self._numeros_flux.add(cle)
+                    self._etudiants.append(etudiant)
+                    self._lignes_etudiants.append(numeros_lignes[position])
+
+            numeros = df['Numero'].tolist() if 'Numero' in df.columns else [None] * len(df)
+            for numero_ligne, numero, valide, erreurs_ligne in zip(numeros_lignes, numeros, masque, codes):
+                if valide:
+                    self.valides += 1
+                    if not self.erreurs_seules:
+                        self._rapport.append(json.dumps({"line": numero_ligne, "status": "valid", "numero": numero},
+                                                        ensure_ascii=False, default=str))
+                else:
+                    self._rejeter(numero_ligne, erreurs_ligne)
+
+        # Le rapport suit l'ordre de traitement : les lignes JSON invalides
+        # d'un lot passent avant ses lignes validées
+        rapport = "".join(ligne + "\n" for ligne in self._rapport)
+        self._rapport = []
+        return rapport
+
+    def terminer(self):
+        """Valide le dernier lot, publie les étudiants valides et retourne la fin du rapport"""
+        if self.erreur is not None:
+            resume = {"lines": self.lignes, "valid": self.valides, "invalid": self.invalides, "applied": 0,
+                      "error": self.erreur}
+            rapport = "".join(ligne + "\n" for ligne in self._rapport)
+            self._rapport = []
+            return rapport + json.dumps({"summary": resume}, ensure_ascii=False) + "\n"
+        # Dernière ligne sans fin de ligne
+        self.lire(self._reste)
+        self._reste = b""
+        rapport = self.valider_lot()
+        resume = {"lines": self.lignes, "valid": self.valides, "invalid": self.invalides, "applied": 0}
+        if self._etudiants:
+            def ajouter(gestion):
+                # Numéros ajoutés par d'autres requêtes depuis la validation des lots
+                presents = self._numeros_flux & self._numeros_de(gestion)
+                if gestion.depot is not None:
+                    presents.update(self._cle(numero) for numero in
+                                    gestion.depot.numeros_presents([e.numero for e in self._etudiants]))
+                etudiants = []
+                for numero_ligne, etudiant in zip(self._lignes_etudiants, self._etudiants):
+                    if self._cle(etudiant.numero) in presents:
+                        resume.setdefault("duplicates", []).append(numero_ligne)
+                    else:
+                        etudiants.append(etudiant)
+                if etudiants:
+                    gestion.magasins_notes.extend(self._fabrique.magasins_notes)
+                    gestion.ajouter_et_enregistrer(etudiants, valide=True)
+                return len(etudiants), len(gestion.etudiants)
+            try:
+                resume["applied"], resume["total"] = self.donnees.modifier(ajouter)
+            except Exception as e:
+                resume.pop("duplicates", None)
+                resume["error"] = f"Erreur lors de l'ajout: {str(e)}"
+        return rapport + json.dumps({"summary": resume}, ensure_ascii=False) + "\n"
+
+    def traiter(self, morceaux):
+        """Générateur du rapport, lot par lot, pour un itérable de morceaux d'octets"""
+        for morceau in morceaux:
+            if self.lire_morceau(morceau):
+                yield self.valider_lot()
+            if self.erreur is not None:
+                break
+        yield self.terminer()
@@ -0,0 +1,589 @@
+# main_async.py
+# Variante asyncio de l'API (Quart) : mêmes points d'accès et mêmes réponses
+# JSON que main.py. Les accès à Redis et MongoDB des requêtes passent par
+# leurs pilotes asyncio (redis.asyncio, motor) et n'occupent pas de fil ; les
+# calculs longs (statistiques détaillées, PDF) partent dans des fils pour ne
+# pas bloquer la boucle.
+#
+# Lancement : hypercorn main_async:app --bind 0.0.0.0:5000
+import asyncio
+import os
+from datetime import datetime
+from functools import wraps
+from urllib.parse import urlencode
+from quart import Quart, Response, g, jsonify, request, render_template_string
+from quart.asgi import ASGIHTTPConnection
+from quart.wrappers import Body, Request
+from cache_redis import CacheRedisAsync
+from connexion.db_connexion import obtenir_client_async
+from connexion.redis_connexion import client_redis_async
+from main import (BULK_OCTETS_MAX, GENERATION_BULLETINS, HTML_TEMPLATE, PARAMETRES_PAGINATION, PARAMETRES_RECHERCHE,
+                  PARAMETRES_STATISTIQUES, ReponseNonPartageable, get_app_instance, lire_pagination,
+                  lire_parametres_statistiques, page_etudiants, parametres_lus, refus_permission,
+                  serialiseur_cache)
+from rapport_pdf import CARACTERES_INTERDITS, nom_fichier_bulletin
+
+# Octets reçus d'avance au plus dans le corps d'une route lue en flux
+TAMPON_CORPS = 1024 * 1024
+# Routes dont le corps est lu en flux, avec contre-pression (CorpsEnFlux)
+ROUTES_EN_FLUX = {'/api/students/bulk'}
+
+class CorpsEnFlux(Body):
+    """Corps de requête reçu au rythme où la route le lit
+
+    Quart ajoute au corps tout ce que le client envoie, aussi vite qu'il
+    l'envoie. Ici, dès que TAMPON_CORPS octets attendent d'être lus, la
+    connexion (ConnexionHttp) cesse de recevoir jusqu'à la prochaine lecture :
+    hypercorn arrête alors de lire la socket et le client ralentit.
+    """
+
+    def __init__(self, expected_content_length, max_content_length):
+        super().__init__(expected_content_length, max_content_length)
+        self._lu = asyncio.Event()
+        self._lu.set()
+
+    async def __anext__(self):
+        donnees = await super().__anext__()
+        self._lu.set()
+        return donnees
+
+    def append(self, data):
+        super().append(data)
+        if len(self._data) >= TAMPON_CORPS:
+            self._lu.clear()
+
+    async def attendre_lecture(self):
+        """Attend que la route ait lu ce qui a été reçu, s'il dépasse TAMPON_CORPS"""
+        await self._lu.wait()
+
+class RequeteApi(Request):
+    """Requête dont le corps est un CorpsEnFlux sur les routes de ROUTES_EN_FLUX
+
+    Ces routes limitent elles-mêmes la taille totale du corps : celle de
+    Quart (MAX_CONTENT_LENGTH, 16 Mo) ne s'applique qu'aux autres.
+    """
+
+    def __init__(self, method, scheme, path, *args, **kwargs):
+        if path in ROUTES_EN_FLUX:
+            self.body_class = CorpsEnFlux
+            kwargs['max_content_length'] = None
+        super().__init__(method, scheme, path, *args, **kwargs)
+
+class ConnexionHttp(ASGIHTTPConnection):
+    """Connexion ASGI qui ne reçoit la suite d'un CorpsEnFlux qu'une fois le tampon lu"""
+
+    async def handle_messages(self, request, receive):
+        corps = request.body
+        if not isinstance(corps, CorpsEnFlux):
+            return await super().handle_messages(request, receive)
+
+        async def recevoir():
+            await corps.attendre_lecture()
+            return await receive()
+        return await super().handle_messages(request, recevoir)
+
+# Initialisation de Quart
+app = Quart(__name__)
+app.request_class = RequeteApi
+app.asgi_http_class = ConnexionHttp
+
+# Durée maximale (s) de chaque vérification de /health
+DELAI_VERIFICATION = float(os.environ.get('SANTE_DELAI', 2))
+
+class ApplicationAsync:
+    """Clients asyncio de Redis et MongoDB, à côté de l'application de main.py
+
+    Les données, les rapports et les caches en mémoire sont ceux de
+    get_app_instance() ; seuls les accès réseau des requêtes changent.
+    """
+
+    def __init__(self):
+        self.base = None
+        self.redis_client = None
+        self.cache = None
+        self.mongo_client = None
+        self.depot = None
+
+    async def initialiser(self):
+        """Initialise l'application de main.py (hors de la boucle) puis les clients asyncio"""
+        self.base = await asyncio.to_thread(get_app_instance)
+
+        # Redis optionnel, comme dans main.py
+        client = client_redis_async()
+        try:
+            await client.ping()
+            self.redis_client = client
+            self.cache = CacheRedisAsync(client, serialiseur=serialiseur_cache())
+        except Exception as e:
+            print(f"Erreur Redis: {e}")
+            await client.aclose()
+
+        # Lectures MongoDB si la persistance est active
+        if self.base.depot is not None:
+            from depot_mongo import DepotMongoAsync
+            self.mongo_client = obtenir_client_async()
+            self.depot = DepotMongoAsync(self.mongo_client[os.environ.get('MONGODB_BASE', 'gestion-etudiant')])
+
+    async def fermer(self):
+        if self.cache is not None:
+            await self.cache.fermer()
+        if self.mongo_client is not None:
+            self.mongo_client.close()
+
+application = ApplicationAsync()
+
+@app.before_serving
+async def demarrer():
+    await application.initialiser()
+
+@app.after_serving
+async def arreter():
+    await application.fermer()
+
+@app.before_request
+async def actualiser_donnees():
+    """Reprend les écritures des autres workers dans le dépôt (voir main.py), dans un fil"""
+    if application.base is not None and application.base.depot is not None:
+        await asyncio.to_thread(application.base.actualiser_donnees)
+
+def gestion_etudiants():
+    """Instantané des étudiants de la requête, le même du début à la fin (voir main.py)"""
+    instantane = g.get('gestion_etudiants')
+    if instantane is None:
+        instantane = g.gestion_etudiants = application.base.donnees.instantane()
+    return instantane
+
+async def iterer_dans_fil(iterateur):
+    """Parcourt un itérateur bloquant dans un fil, élément par élément"""
+    iterateur = iter(iterateur)
+    fin = object()
+    while True:
+        element = await asyncio.to_thread(next, iterateur, fin)
+        if element is fin:
+            return
+        yield element
+
+class FluxLiberant:
+    """Corps de réponse asynchrone qui libère un verrou à la fin
+
+    Le verrou est libéré quand le corps est épuisé, en erreur ou fermé
+    (aclose, appelé par Quart), même s'il n'a jamais été parcouru : un
+    générateur asynchrone fermé avant son premier élément n'exécuterait pas
+    son bloc finally.
+    """
+
+    def __init__(self, morceaux, verrou):
+        self.morceaux = morceaux.__aiter__()
+        self.verrou = verrou
+        self.libere = False
+
+    def liberer(self):
+        if not self.libere:
+            self.libere = True
+            self.verrou.release()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.morceaux.__anext__()
+        except BaseException:
+            self.liberer()
+            raise
+
+    async def aclose(self):
+        self.liberer()
+        await self.morceaux.aclose()
+
+async def verifier(client, verification):
+    """Vrai si verification(client) aboutit avant DELAI_VERIFICATION secondes"""
+    if client is None:
+        return False
+    try:
+        await asyncio.wait_for(verification(client), DELAI_VERIFICATION)
+        return True
+    except Exception as e:
+        print(f"Erreur de vérification: {e}")
+        return False
+
+# Routes Quart
+@app.route('/')
+async def home():
+    """Page d'accueil"""
+    if application.base.initialized:
+        status_class = "success"
+        status_message = "✅ Application initialisée avec succès"
+    else:
+        status_class = "error"
+        status_message = "❌ Erreur lors de l'initialisation"
+
+    return await render_template_string(HTML_TEMPLATE,
+                                        status_class=status_class,
+                                        status_message=status_message)
+
+@app.route('/health')
+async def health():
+    """Endpoint de santé
+
+    Redis et MongoDB sont interrogés en même temps : chaque service est
+    signalé disponible s'il répond avant DELAI_VERIFICATION secondes.
+    """
+    base = application.base
+    redis_disponible, mongo_disponible = await asyncio.gather(
+        verifier(application.redis_client, lambda client: client.ping()),
+        verifier(application.mongo_client, lambda client: client.admin.command('ping')),
+    )
+
+    health_data = {
+        "status": "healthy" if base.initialized else "unhealthy",
+        "services": {
+            "gestion_etudiants": True,
+            "redis_cache": redis_disponible,
+            "mongo_persistance": mongo_disponible,
+            "export_import": base.export_import is not None,
+            "rapport_pdf": base.rapport_pdf is not None
+        },
+        "data": {
+            "nombre_etudiants": len(gestion_etudiants().etudiants)
+        },
+        # Pas de cache de premier niveau dans la variante asyncio
+        "cache_local": None,
+        "cache_rapports": (base.rapport_pdf.cache.statistiques()
+                           if base.rapport_pdf is not None and base.rapport_pdf.cache else None)
+    }
+
+    return jsonify(health_data)
+
+def avec_cache_reponses(parametres):
+    """Sert la réponse JSON encodée depuis le cache, avec ETag et 304 (voir main.py)"""
+    def decorateur(vue):
+        @wraps(vue)
+        async def vue_en_cache(*args, **kwargs):
+            if request.args.get('stream'):
+                return await vue(*args, **kwargs)
+
+            cache_reponses = application.base.cache_reponses
+            cle = (request.path, parametres_lus(request.args, parametres), gestion_etudiants().version)
+            entree = cache_reponses.obtenir(cle)
+            if entree is None:
+                reponse = await vue(*args, **kwargs)
+                if not isinstance(reponse, Response) or reponse.status_code != 200:
+                    return reponse
+                entree = cache_reponses.enregistrer(cle, await reponse.get_data())
+
+            corps, etag = entree
+            reponse = Response(corps, mimetype='application/json')
+            reponse.set_etag(etag)
+            reponse.headers['Cache-Control'] = 'no-cache'
+            return await reponse.make_conditional(request)
+
+        return vue_en_cache
+    return decorateur
+
+def avec_cache_redis(point_acces, parametres):
+    """Lecture au travers de Redis, avec le client asyncio (voir main.py)"""
+    def decorateur(vue):
+        @wraps(vue)
+        async def vue_redis(*args, **kwargs):
+            ttl = application.base.ttl_cache.get(point_acces)
+            if application.cache is None or not ttl or request.args.get('stream'):
+                return await vue(*args, **kwargs)
+
+            valeurs = urlencode(parametres_lus(request.args, parametres))
+            # Calculée au plus une fois par version, mais longue sur de gros volumes
+            empreinte = await asyncio.to_thread(gestion_etudiants().empreinte)
+            cle = f"reponses:{point_acces}:{empreinte}:{valeurs}"
+
+            async def calculer():
+                reponse = await vue(*args, **kwargs)
+                if not isinstance(reponse, Response) or reponse.status_code != 200:
+                    raise ReponseNonPartageable(reponse)
+                return await reponse.get_data(as_text=True)
+
+            try:
+                corps = await application.cache.recuperer_ou_calculer(cle, calculer, ttl=ttl)
+            except ReponseNonPartageable as exception:
+                return exception.reponse
+            return Response(corps, mimetype='application/json')
+
+        return vue_redis
+    return decorateur
+
+def reponse_etudiants(etudiants, cle_liste, entete=None):
+    """Réponse JSON paginée, ou en flux, pour une liste d'étudiants (voir main.page_etudiants)"""
+    try:
+        pagination = lire_pagination(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    corps, mimetype = page_etudiants(etudiants, cle_liste, pagination, entete)
+    if mimetype is None:
+        return jsonify(corps)
+    return Response(corps, mimetype=mimetype)
+
+@app.route('/api/students')
+@avec_cache_reponses(PARAMETRES_PAGINATION)
+async def get_students():
+    """Récupère tous les étudiants"""
+    if not application.base.initialized:
+        return jsonify({"error": "Application non initialisée"}), 500
+
+    try:
+        return reponse_etudiants(gestion_etudiants().etudiants, "students")
+
+    except Exception as e:
+        return jsonify({"error": f"Erreur: {str(e)}"}), 500
+
+@app.route('/api/students/stats')
+@avec_cache_reponses(PARAMETRES_STATISTIQUES)
+@avec_cache_redis("stats", PARAMETRES_STATISTIQUES)
+async def get_stats():
+    """Récupère les statistiques des étudiants"""
+    if not application.base.initialized:
+        return jsonify({"error": "Application non initialisée"}), 500
+
+    try:
+        parametres = lire_parametres_statistiques(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resume = request.args.get('summary')
+    if resume is not None and resume not in ("classe", "matiere"):
+        return jsonify({"error": "Paramètre 'summary' : classe, matiere attendu"}), 400
+
+    gestion = gestion_etudiants()
+    stats = None
+    if application.depot is not None:
+        try:
+            # Génération lue par motor : depot_synchronise n'interroge pas MongoDB
+            if gestion.depot_synchronise(await application.depot.generation()):
+                stats = await application.depot.statistiques()
+        except Exception as e:
+            print(f"Erreur d'agrégation MongoDB (statistiques): {e}")
+
+    try:
+        reponse = {
+            "success": True,
+            "statistics": stats if stats is not None else gestion.obtenir_statistiques(depot=False)
+        }
+        if resume is not None:
+            # Le premier appel après un changement en bloc recalcule les agrégats
+            reponse["summary"] = (await asyncio.to_thread(gestion.agregats)).resume(resume)
+        if parametres is not None:
+            reponse["group_by"] = parametres["groupe"]
+            reponse["groups"] = await asyncio.to_thread(gestion.statistiques_detaillees, **parametres)
+        return jsonify(reponse)
+    except Exception as e:
+        return jsonify({"error": f"Erreur: {str(e)}"}), 500
+
+@app.route('/api/students/search')
+@avec_cache_reponses(PARAMETRES_RECHERCHE)
+@avec_cache_redis("search", PARAMETRES_RECHERCHE)
+async def search_students():
+    """Recherche des étudiants par nom"""
+    nom = request.args.get('nom', '')
+
+    if not nom:
+        return jsonify({"error": "Paramètre 'nom' requis"}), 400
+
+    if not application.base.initialized:
+        return jsonify({"error": "Application non initialisée"}), 500
+
+    try:
+        resultats = gestion_etudiants().rechercher_par_nom(nom)
+        return reponse_etudiants(resultats, "results", {"query": nom})
+
+    except Exception as e:
+        return jsonify({"error": f"Erreur: {str(e)}"}), 500
+
+async def reponse_pdf(contenu, nom_fichier):
+    """Réponse PDF avec ETag : un rapport inchangé donne une réponse 304"""
+    reponse = Response(contenu, mimetype='application/pdf',
+                       headers={"Content-Disposition": f'inline; filename="{nom_fichier}"'})
+    await reponse.add_etag()
+    reponse.headers['Cache-Control'] = 'no-cache'
+    return await reponse.make_conditional(request)
+
+@app.route('/api/students/report')
+async def get_student_report():
+    """Rapport PDF d'un étudiant, par numéro"""
+    base = application.base
+    numero = request.args.get('numero', '')
+
+    if not numero:
+        return jsonify({"error": "Paramètre 'numero' requis"}), 400
+
+    if not base.initialized or base.rapport_pdf is None:
+        return jsonify({"error": "Application non initialisée"}), 500
+
+    etudiants = gestion_etudiants().rechercher_par_numero(numero)
+    if not etudiants:
+        return jsonify({"error": f"Aucun étudiant avec le numéro {numero}"}), 404
+
+    try:
+        contenu = await asyncio.to_thread(base.rapport_pdf.rapport_individuel, etudiants[0])
+        return await reponse_pdf(contenu, nom_fichier_bulletin(etudiants[0]))
+    except Exception as e:
+        return jsonify({"error": f"Erreur: {str(e)}"}), 500
+
+@app.route('/api/students/class-report')
+async def get_class_report():
+    """Rapport PDF d'une classe"""
+    base = application.base
+    classe = request.args.get('classe', '')
+
+    if not classe:
+        return jsonify({"error": "Paramètre 'classe' requis"}), 400
+
+    if not base.initialized or base.rapport_pdf is None:
+        return jsonify({"error": "Application non initialisée"}), 500
+
+    try:
+        contenu = await asyncio.to_thread(base.rapport_pdf.rapport_classe, classe)
+        if contenu is None:
+            return jsonify({"error": f"Aucun étudiant trouvé dans la classe {classe}"}), 404
+        return await reponse_pdf(contenu, f"rapport_{CARACTERES_INTERDITS.sub('-', classe)}.pdf")
+    except Exception as e:
+        return jsonify({"error": f"Erreur: {str(e)}"}), 500
+
+@app.route('/api/students/reports')
+async def get_reports():
+    """Bulletins PDF des étudiants valides d'une classe, ou de toute l'école, en archive zip
+
+    Permission 'exporter' et une seule archive à la fois par processus (429
+    sinon), comme dans main.py.
+    """
+    base = application.base
+
+    if not base.initialized or base.rapport_pdf is None:
+        return jsonify({"error": "Application non initialisée"}), 500
+
+    refus = refus_permission(base.authentification, request.authorization, 'exporter')
+    if refus is not None:
+        statut, message = refus
+        return jsonify({"error": message}), statut, {"WWW-Authenticate": 'Basic realm="gestion-etudiants"'}
+
+    # Acquisition sans attente : ne bloque pas la boucle
+    if not GENERATION_BULLETINS.acquire(blocking=False):
+        return jsonify({"error": "Génération de bulletins déjà en cours, réessayez plus tard"}), 429
+    try:
+        classe = request.args.get('classe') or None
+        # L'archive part en flux ; chaque morceau est produit dans un fil
+        morceaux = base.rapport_pdf.bulletins_zip_en_flux(
+            classe, nb_processus=int(os.environ.get('BULLETINS_PROCESSUS', 1))
+        )
+        nom_archive = f"bulletins_{CARACTERES_INTERDITS.sub('-', classe or 'ecole')}.zip"
+        return Response(FluxLiberant(iterer_dans_fil(morceaux), GENERATION_BULLETINS), mimetype='application/zip',
+                        headers={"Content-Disposition": f'attachment; filename="{nom_archive}"'})
+    except Exception:
+        GENERATION_BULLETINS.release()
+        raise
+
+@app.route('/api/students/bulk', methods=['POST'])
+async def bulk_students():
+    """Ajoute des étudiants envoyés en NDJSON, une ligne par étudiant (voir main.py)
+
+    Les lots sont validés et publiés dans un fil. Le corps est un
+    CorpsEnFlux : pendant la validation d'un lot, au plus TAMPON_CORPS
+    octets sont reçus d'avance. Sa taille est limitée par BULK_OCTETS_MAX,
+    comme dans main.py.
+    """
+    if not application.base.initialized:
+        return jsonify({"error": "Application non initialisée"}), 500
+
+    refus = refus_permission(application.base.authentification, request.authorization, 'importer')
+    if refus is not None:
+        statut, message = refus
+        return jsonify({"error": message}), statut, {"WWW-Authenticate": 'Basic realm="gestion-etudiants"'}
+
+    rapport = request.args.get('report', 'all')
+    if rapport not in ('all', 'errors'):
+        return jsonify({"error": "Paramètre 'report' : all, errors attendu"}), 400
+
+    # Vérifiée avant le début de la réponse en flux : un 413 ensuite n'arriverait pas au client
+    if request.content_length is not None and request.content_length > BULK_OCTETS_MAX:
+        return jsonify({"error": f"Corps trop volumineux (plus de {BULK_OCTETS_MAX} octets)"}), 413
+
+    # pandas n'est chargé qu'au premier envoi
+    from ingestion import IngestionNdjson
+
+    ingestion = IngestionNdjson(application.base.donnees,
+                                taille_lot=int(os.environ.get('BULK_TAILLE_LOT', 5000)),
+                                erreurs_seules=rapport == 'errors', octets_max=BULK_OCTETS_MAX)
+    corps = request.body
+
+    async def morceaux():
+        async for morceau in corps:
+            if ingestion.lire_morceau(morceau):
+                yield await asyncio.to_thread(ingestion.valider_lot)
+            if ingestion.erreur is not None:
+                break
+        yield await asyncio.to_thread(ingestion.terminer)
+
+    return Response(morceaux(), mimetype='application/x-ndjson')
+
+@app.route('/api/test-db')
+async def test_db():
+    """Test de connexion MongoDB"""
+    conn_string = os.environ.get('MONGODB_URI')
+    if not conn_string:
+        return jsonify({"success": False, "message": "MONGODB_URI non défini"}), 500
+
+    client = None
+    try:
+        client = obtenir_client_async(conn_string)
+
+        # Test simple
+        test_doc = {"test": "connexion", "timestamp": str(datetime.now())}
+        await client["gestion-etudiant"]["test"].insert_one(test_doc)
+
+        return jsonify({
+            "success": True,
+            "message": "Connexion MongoDB réussie",
+            "database": "gestion-etudiant"
+        })
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Erreur MongoDB: {str(e)}"
+        }), 500
+    finally:
+        if client is not None:
+            client.close()
+
+@app.route('/api/test-redis')
+async def test_redis():
+    """Test de connexion Redis"""
+    # Client de l'application, ou à défaut un client le temps du test
+    redis_client = application.redis_client or client_redis_async()
+    try:
+        # Test simple
+        await redis_client.set("test_key", "test_value")
+        value = await redis_client.get("test_key")
+
+        return jsonify({
+            "success": True,
+            "message": "Connexion Redis réussie",
+            "test_value": value.decode('utf-8') if isinstance(value, bytes) else value
+        })
+
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "message": f"Erreur Redis: {str(e)}"
+        }), 500
+    finally:
+        if redis_client is not application.redis_client:
+            await redis_client.aclose()
+
+if __name__ == '__main__':
+    # Serveur de développement ; en production : hypercorn main_async:app
+    port = int(os.environ.get('PORT', 5000))
+    debug = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
+
+    print(f"🚀 Démarrage de l'application asyncio sur le port {port}")
+    print(f"🌐 Mode debug: {debug}")
+
+    app.run(host='0.0.0.0', port=port, debug=debug)
@@ -1,155 +1,407 @@
 # rapport_pdf.py
-from fpdf import FPDF
 import os
-import matplotlib.pyplot as plt
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+from cache_rapports import cle_contenu
+
+# Version de la mise en page des rapports, à incrémenter à chaque changement :
+# elle fait partie des clés du cache des rapports
+VERSION_MODELES = 1
+
+# Mise en page du bulletin : (libellé, attribut) des informations personnelles
+CHAMPS_PERSONNELS = (
+    ("Nom:", "nom"),
+    ("Prénom:", "prenom"),
+    ("Numéro:", "numero"),
+    ("Date de naissance:", "date_naissance"),
+    ("Classe:", "classe"),
+)
+# Polices des bulletins (famille, style)
+POLICES_BULLETIN = (('Arial', ''), ('Arial', 'B'), ('Arial', 'I'))
+# Caractères remplacés dans les noms de fichiers des bulletins
+CARACTERES_INTERDITS = re.compile(r'[^\w.-]+')
+
+
+def composer_rapport_individuel(etudiant, date_generation=None):
+    """Compose le bulletin d'un étudiant et retourne le FPDF, sans l'écrire"""
+    from fpdf import FPDF
+    
+    pdf = FPDF()
+    pdf.add_page()
+    
+    # En-tête
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(190, 10, "Rapport de l'étudiant", 0, 1, 'C')
+    pdf.ln(10)
+    
+    # Informations de l'étudiant
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(190, 10, "Informations personnelles:", 0, 1)
+    
+    pdf.set_font('Arial', '', 12)
+    for libelle, attribut in CHAMPS_PERSONNELS:
+        pdf.cell(50, 10, libelle, 0, 0)
+        pdf.cell(140, 10, getattr(etudiant, attribut), 0, 1)
+    
+    pdf.ln(10)
+    
+    # Notes par matière
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(190, 10, "Notes par matière:", 0, 1)
+    
+    pdf.set_font('Arial', '', 12)
+    for matiere, details in etudiant.notes.items():
+        moyenne_matiere = etudiant.calculer_moyenne_matiere(matiere)
+        
+        pdf.cell(50, 10, f"{matiere}:", 0, 0)
+        pdf.cell(140, 10, f"Devoirs: {', '.join(str(n) for n in details['notes_devoirs'])} - Examen: {details['note_examen']} - Moyenne: {moyenne_matiere}", 0, 1)
+    
+    pdf.ln(10)
+    
+    # Moyenne générale
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(50, 10, "Moyenne générale:", 0, 0)
+    pdf.cell(140, 10, str(etudiant.moyenne_generale), 0, 1)
+    
+    # Pied de page
+    if date_generation is None:
+        date_generation = datetime.now().strftime('%d/%m/%Y à %H:%M')
+    pdf.set_y(-30)
+    pdf.set_font('Arial', 'I', 8)
+    pdf.cell(0, 10, f"Rapport généré le {date_generation}", 0, 0, 'C')
+    
+    return pdf
+
+
+def nom_fichier_bulletin(etudiant):
+    """Nom de fichier du bulletin : bulletin_<numéro>_<nom>_<prénom>.pdf"""
+    parties = (etudiant.numero or etudiant.code, etudiant.nom, etudiant.prenom)
+    nom = "_".join(str(partie) for partie in parties if partie is not None and partie == partie)
+    return f"bulletin_{CARACTERES_INTERDITS.sub('-', nom)}.pdf"
+
+
+def octets_pdf(pdf):
+    """Contenu d'un FPDF composé, en octets"""
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def _initialiser_travailleur():
+    """Charge une fois par processus les métriques des polices du bulletin
+    
+    FPDF les garde ensuite en mémoire pour tous les documents du processus.
+    """
+    from fpdf import FPDF
+    
+    pdf = FPDF()
+    for famille, style in POLICES_BULLETIN:
+        pdf.set_font(famille, style, 12)
+
+
+def prechauffer():
+    """Charge fpdf, matplotlib et les polices des rapports dans le processus courant
+
+    Le premier rapport ne paie alors plus ces chargements : à appeler dans
+    un worker après le fork (voir main.prechauffer).
+    """
+    from graphiques import graphique_moyennes
+    
+    _initialiser_travailleur()
+    # Premier rendu : polices de matplotlib et figure réutilisée du fil
+    graphique_moyennes(["-"], [0])
+
+
+def _composer_lot(etudiants, date_generation):
+    """Bulletins d'un lot : liste de (nom de fichier, octets du PDF ou None, erreur ou None)"""
+    resultats = []
+    for etudiant in etudiants:
+        nom_fichier = nom_fichier_bulletin(etudiant)
+        try:
+            contenu = octets_pdf(composer_rapport_individuel(etudiant, date_generation))
+            resultats.append((nom_fichier, contenu, None))
+        except Exception as e:
+            resultats.append((nom_fichier, None, str(e)))
+    return resultats
+
+
+def generer_bulletins_en_lots(etudiants, nb_processus=1, taille_lot=50, progression=None):
+    """Compose les bulletins des étudiants par lots, dans un pool de processus si nb_processus > 1
+    
+    Génère des (nom de fichier, octets du PDF, None), ou (nom de fichier,
+    None, erreur) pour un bulletin en échec, dans l'ordre des étudiants.
+    Au plus deux lots par processus sont en cours à la fois, pour borner la
+    mémoire des PDF en attente d'écriture. progression(traites, total,
+    echecs) est appelée après chaque lot.
+    """
+    total = len(etudiants)
+    date_generation = datetime.now().strftime('%d/%m/%Y à %H:%M')
+    lots = (etudiants[debut:debut + taille_lot] for debut in range(0, total, taille_lot))
+    traites = 0
+    echecs = 0
+    
+    def suivre(lot):
+        nonlocal traites, echecs
+        for resultat in lot:
+            traites += 1
+            if resultat[2] is not None:
+                echecs += 1
+            yield resultat
+        if progression is not None:
+            progression(traites, total, echecs)
+    
+    if nb_processus <= 1:
+        _initialiser_travailleur()
+        for lot in lots:
+            yield from suivre(_composer_lot(lot, date_generation))
+        return
+    
+    with ProcessPoolExecutor(max_workers=nb_processus, initializer=_initialiser_travailleur) as executor:
+        en_cours = deque()
+        try:
+            for lot in lots:
+                en_cours.append(executor.submit(_composer_lot, lot, date_generation))
+                if len(en_cours) >= 2 * nb_processus:
+                    yield from suivre(en_cours.popleft().result())
+            while en_cours:
+                yield from suivre(en_cours.popleft().result())
+        finally:
+            # Génération interrompue : abandonner les lots pas encore commencés
+            for futur in en_cours:
+                futur.cancel()
+
+
+class _FluxOctets:
+    """Fichier en écriture, non positionnable, dont on récupère le contenu par morceaux"""
+    
+    def __init__(self):
+        self._morceaux = []
+    
+    def write(self, octets):
+        self._morceaux.append(bytes(octets))
+        return len(octets)
+    
+    def flush(self):
+        pass
+    
+    def vider(self):
+        morceau = b"".join(self._morceaux)
+        self._morceaux = []
+        return morceau
+
+
 class RapportPDF:
-    def __init__(self, gestion_etudiants):
+    def __init__(self, gestion_etudiants, cache=None):
         self.gestion_etudiants = gestion_etudiants
+        # Cache des PDF générés (CacheRapports) optionnel
+        self.cache = cache
+    
+    def _obtenir(self, cle, composer):
+        # Octets du PDF, lus dans le cache si possible
+        if self.cache is None:
+            return octets_pdf(composer())
+        return self.cache.obtenir_ou_generer(cle, lambda: octets_pdf(composer()))
+    
+    @staticmethod
+    def cle_rapport_individuel(etudiant):
+        """Clé du rapport d'un étudiant : ses informations, ses notes et la version des modèles"""
+        informations = [getattr(etudiant, attribut) for _, attribut in CHAMPS_PERSONNELS]
+        return cle_contenu(VERSION_MODELES, "individuel", informations, etudiant.notes, etudiant.moyenne_generale)
+    
+    def rapport_individuel(self, etudiant):
+        """Octets du rapport PDF d'un étudiant
+        
+        Avec un cache, un rapport déjà généré pour les mêmes données est rendu
+        tel quel, avec sa date de génération d'origine.
+        """
+        return self._obtenir(self.cle_rapport_individuel(etudiant), lambda: composer_rapport_individuel(etudiant))
     
     def generer_rapport_individuel(self, etudiant, chemin_sortie):
         """Génère un rapport PDF pour un étudiant individuel"""
         try:
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # En-tête
-            pdf.set_font('Arial', 'B', 16)
-            pdf.cell(190, 10, "Rapport de l'étudiant", 0, 1, 'C')
-            pdf.ln(10)
-            
-            # Informations de l'étudiant
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(190, 10, "Informations personnelles:", 0, 1)
-            
-            pdf.set_font('Arial', '', 12)
-            pdf.cell(50, 10, "Nom:", 0, 0)
-            pdf.cell(140, 10, etudiant.nom, 0, 1)
-            
-            pdf.cell(50, 10, "Prénom:", 0, 0)
-            pdf.cell(140, 10, etudiant.prenom, 0, 1)
-            
-            pdf.cell(50, 10, "Numéro:", 0, 0)
-            pdf.cell(140, 10, etudiant.numero, 0, 1)
-            
-            pdf.cell(50, 10, "Date de naissance:", 0, 0)
-            pdf.cell(140, 10, etudiant.date_naissance, 0, 1)
-            
-            pdf.cell(50, 10, "Classe:", 0, 0)
-            pdf.cell(140, 10, etudiant.classe, 0, 1)
-            
-            pdf.ln(10)
-            
-            # Notes par matière
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(190, 10, "Notes par matière:", 0, 1)
-            
-            pdf.set_font('Arial', '', 12)
-            for matiere, details in etudiant.notes.items():
-                moyenne_matiere = etudiant.calculer_moyenne_matiere(matiere)
-                
-                pdf.cell(50, 10, f"{matiere}:", 0, 0)
-                pdf.cell(140, 10, f"Devoirs: {', '.join(str(n) for n in details['notes_devoirs'])} - Examen: {details['note_examen']} - Moyenne: {moyenne_matiere}", 0, 1)
-            
-            pdf.ln(10)
-            
-            # Moyenne générale
-            pdf.set_font('Arial', 'B', 14)
-            pdf.cell(50, 10, "Moyenne générale:", 0, 0)
-            pdf.cell(140, 10, str(etudiant.moyenne_generale), 0, 1)
-            
-            # Pied de page
-            pdf.set_y(-30)
-            pdf.set_font('Arial', 'I', 8)
-            pdf.cell(0, 10, f"Rapport généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}", 0, 0, 'C')
+            contenu = self.rapport_individuel(etudiant)
             
             # Enregistrer le PDF
-            pdf.output(chemin_sortie)
+            with open(chemin_sortie, 'wb') as fichier:
+                fichier.write(contenu)
             
             return True, f"Rapport généré avec succès: {chemin_sortie}"
             
         except Exception as e:
             return False, f"Erreur lors de la génération du rapport: {str(e)}"
     
+    def _etudiants_bulletins(self, classe=None):
+        # Une classe, ou toute l'école : les étudiants valides
+        if classe:
+            return self.gestion_etudiants.instantane().rechercher_par_classe(classe)
+        return self.gestion_etudiants.instantane().etudiants_valides
+    
+    def generer_bulletins(self, dossier, classe=None, nb_processus=1, taille_lot=50, progression=None):
+        """Génère le bulletin de chaque étudiant d'une classe (ou de toute l'école) dans un dossier
+        
+        Les bulletins sont composés par lots de taille_lot dans un pool de
+        nb_processus processus. progression(traites, total, echecs) est
+        appelée après chaque lot. Un bulletin en échec n'arrête pas le lot.
+        Retourne (nombre de bulletins écrits, {fichier: erreur}).
+        """
+        os.makedirs(dossier, exist_ok=True)
+        ecrits = 0
+        echecs = {}
+        for nom_fichier, contenu, erreur in generer_bulletins_en_lots(
+            self._etudiants_bulletins(classe), nb_processus, taille_lot, progression
+        ):
+            if erreur is not None:
+                echecs[nom_fichier] = erreur
+                continue
+            with open(os.path.join(dossier, nom_fichier), 'wb') as fichier:
+                fichier.write(contenu)
+            ecrits += 1
+        return ecrits, echecs
+    
+    def generer_bulletins_zip(self, destination, classe=None, nb_processus=1, taille_lot=50, progression=None):
+        """Génère les bulletins dans une archive zip (chemin ou fichier ouvert en écriture)
+        
+        La destination n'a pas besoin d'être positionnable (tube, socket) :
+        l'archive est écrite au fil des lots. Les échecs sont listés dans
+        erreurs.txt à la fin de l'archive.
+        Retourne (nombre de bulletins écrits, {fichier: erreur}).
+        """
+        echecs = {}
+        ecrits = 0
+        for _ in self._ecrire_archive(destination, classe, nb_processus, taille_lot, progression, echecs):
+            ecrits += 1
+        return ecrits, echecs
+    
+    def bulletins_zip_en_flux(self, classe=None, nb_processus=1, taille_lot=50, progression=None):
+        """Archive zip des bulletins en morceaux d'octets, produits au fil des lots
+        
+        Pour une réponse HTTP en flux : les premiers octets partent dès le
+        premier lot, sans attendre la fin de la génération.
+        """
+        flux = _FluxOctets()
+        for _ in self._ecrire_archive(flux, classe, nb_processus, taille_lot, progression, {}):
+            morceau = flux.vider()
+            if morceau:
+                yield morceau
+        # Fin de l'archive (erreurs.txt et répertoire central)
+        morceau = flux.vider()
+        if morceau:
+            yield morceau
+    
+    def _ecrire_archive(self, destination, classe, nb_processus, taille_lot, progression, echecs):
+        # Générateur : rend la main après chaque bulletin ajouté à l'archive
+        with zipfile.ZipFile(destination, 'w', zipfile.ZIP_STORED) as archive:
+            for nom_fichier, contenu, erreur in generer_bulletins_en_lots(
+                self._etudiants_bulletins(classe), nb_processus, taille_lot, progression
+            ):
+                if erreur is not None:
+                    echecs[nom_fichier] = erreur
+                    continue
+                archive.writestr(nom_fichier, contenu)
+                yield nom_fichier
+            if echecs:
+                archive.writestr("erreurs.txt", "".join(f"{nom}: {erreur}\n" for nom, erreur in echecs.items()))
+    
+    @staticmethod
+    def cle_rapport_classe(classe, etudiants_classe):
+        """Clé du rapport d'une classe : nom, prénom et moyenne de ses étudiants, et la version des modèles"""
+        lignes = [(e.nom, e.prenom, e.moyenne_generale) for e in etudiants_classe]
+        return cle_contenu(VERSION_MODELES, "classe", classe, lignes)
+    
+    def rapport_classe(self, classe):
+        """Octets du rapport PDF d'une classe, None si la classe n'a pas d'étudiant
+        
+        Avec un cache, un rapport déjà généré pour les mêmes données est rendu
+        tel quel, sans recomposer le PDF ni redessiner le graphique.
+        """
+        # Récupérer les étudiants de la classe, déjà triés par l'index des moyennes
+        etudiants_classe = self.gestion_etudiants.instantane().trier_par_moyenne("descendant", classe=classe)
+        
+        if not etudiants_classe:
+            return None
+        
+        return self._obtenir(self.cle_rapport_classe(classe, etudiants_classe),
+                             lambda: self._composer_rapport_classe(classe, etudiants_classe))
+    
     def generer_rapport_classe(self, classe, chemin_sortie):
         """Génère un rapport PDF pour une classe entière"""
         try:
-            # Récupérer les étudiants de la classe
-            etudiants_classe = self.gestion_etudiants.rechercher_par_classe(classe)
+            contenu = self.rapport_classe(classe)
             
-            if not etudiants_classe:
+            if contenu is None:
                 return False, f"Aucun étudiant trouvé dans la classe {classe}"
             
-            # Générer un graphique des moyennes
-            self._generer_graphique_moyennes(etudiants_classe, "temp_graph.png")
-            
-            pdf = FPDF()
-            pdf.add_page()
-            
-            # En-tête
-            pdf.set_font('Arial', 'B', 16)
-            pdf.cell(190, 10, f"Rapport de la classe {classe}", 0, 1, 'C')
-            pdf.ln(10)
-            
-            # Liste des étudiants
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(190, 10, "Liste des étudiants:", 0, 1)
-            
-            pdf.set_font('Arial', '', 10)
-            
-            # En-tête du tableau
-            pdf.cell(60, 10, "Nom", 1, 0, 'C')
-            pdf.cell(60, 10, "Prénom", 1, 0, 'C')
-            pdf.cell(70, 10, "Moyenne générale", 1, 1, 'C')
-            
-            # Données du tableau
-            for etudiant in sorted(etudiants_classe, key=lambda e: e.moyenne_generale or 0, reverse=True):
-                pdf.cell(60, 10, etudiant.nom, 1, 0)
-                pdf.cell(60, 10, etudiant.prenom, 1, 0)
-                pdf.cell(70, 10, str(etudiant.moyenne_generale), 1, 1, 'C')
-            
-            pdf.ln(10)
-            
-            # Statistiques
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(190, 10, "Statistiques:", 0, 1)
-            
-            pdf.set_font('Arial', '', 12)
-            moyenne_classe = sum(e.moyenne_generale or 0 for e in etudiants_classe) / len(etudiants_classe)
-            pdf.cell(90, 10, "Moyenne de la classe:", 0, 0)
-            pdf.cell(100, 10, f"{round(moyenne_classe, 2)}", 0, 1)
-            
-            # Ajouter le graphique
-            pdf.ln(5)
-            pdf.set_font('Arial', 'B', 12)
-            pdf.cell(190, 10, "Graphique des moyennes:", 0, 1)
-            pdf.image("temp_graph.png", x=10, y=None, w=190)
-            
-            # Supprimer le fichier temporaire
-            os.remove("temp_graph.png")
-            
-            # Pied de page
-            pdf.set_y(-30)
-            pdf.set_font('Arial', 'I', 8)
-            pdf.cell(0, 10, f"Rapport généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}", 0, 0, 'C')
-            
             # Enregistrer le PDF
-            pdf.output(chemin_sortie)
+            with open(chemin_sortie, 'wb') as fichier:
+                fichier.write(contenu)
             
             return True, f"Rapport de classe généré avec succès: {chemin_sortie}"
             
         except Exception as e:
-            # Nettoyer en cas d'erreur
-            if os.path.exists("temp_graph.png"):
-                os.remove("temp_graph.png")
-                
             return False, f"Erreur lors de la génération du rapport: {str(e)}"
     
-    def _generer_graphique_moyennes(self, etudiants, chemin_sortie):
-        """Génère un graphique des moyennes des étudiants"""
-        # Trier les étudiants par moyenne
-        etudiants = sorted(etudiants, key=lambda e: e.moyenne_generale or 0, reverse=True)
+    def _composer_rapport_classe(self, classe, etudiants_classe):
+        """Compose le rapport d'une classe et retourne le FPDF, sans l'écrire"""
+        from fpdf import FPDF
+        from graphiques import inserer_image
+        
+        # Générer un graphique des moyennes, en mémoire
+        graphique = self._generer_graphique_moyennes(etudiants_classe)
+        
+        pdf = FPDF()
+        pdf.add_page()
+        
+        # En-tête
+        pdf.set_font('Arial', 'B', 16)
+        pdf.cell(190, 10, f"Rapport de la classe {classe}", 0, 1, 'C')
+        pdf.ln(10)
+        
+        # Liste des étudiants
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(190, 10, "Liste des étudiants:", 0, 1)
+        
+        pdf.set_font('Arial', '', 10)
+        
+        # En-tête du tableau
+        pdf.cell(60, 10, "Nom", 1, 0, 'C')
+        pdf.cell(60, 10, "Prénom", 1, 0, 'C')
+        pdf.cell(70, 10, "Moyenne générale", 1, 1, 'C')
+        
+        # Données du tableau
+        for etudiant in etudiants_classe:
+            pdf.cell(60, 10, etudiant.nom, 1, 0)
+            pdf.cell(60, 10, etudiant.prenom, 1, 0)
+            pdf.cell(70, 10, str(etudiant.moyenne_generale), 1, 1, 'C')
+        
+        pdf.ln(10)
+        
+        # Statistiques
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(190, 10, "Statistiques:", 0, 1)
+        
+        pdf.set_font('Arial', '', 12)
+        moyenne_classe = sum(e.moyenne_generale or 0 for e in etudiants_classe) / len(etudiants_classe)
+        pdf.cell(90, 10, "Moyenne de la classe:", 0, 0)
+        pdf.cell(100, 10, f"{round(moyenne_classe, 2)}", 0, 1)
+        
+        # Ajouter le graphique
+        pdf.ln(5)
+        pdf.set_font('Arial', 'B', 12)
+        pdf.cell(190, 10, "Graphique des moyennes:", 0, 1)
+        inserer_image(pdf, graphique, "graphique_moyennes", x=10, y=None, w=190)
+        
+        # Pied de page
+        pdf.set_y(-30)
+        pdf.set_font('Arial', 'I', 8)
+        pdf.cell(0, 10, f"Rapport généré le {datetime.now().strftime('%d/%m/%Y à %H:%M')}", 0, 0, 'C')
+        
+        return pdf
+    
+    def _generer_graphique_moyennes(self, etudiants):
+        """Génère le graphique des moyennes des étudiants (déjà triés par moyenne décroissante)"""
+        from graphiques import graphique_moyennes
         
         # Limiter à 10 étudiants pour la lisibilité
         if len(etudiants) > 10:
@@ -158,15 +410,4 @@ class RapportPDF:
         noms = [f"{e.nom} {e.prenom}" for e in etudiants]
         moyennes = [e.moyenne_generale or 0 for e in etudiants]
         
-        # Créer le graphique
-        plt.figure(figsize=(10, 6))
-        plt.bar(noms, moyennes, color='skyblue')
-        plt.xlabel('Étudiants')
-        plt.ylabel('Moyenne générale')
-        plt.title('Moyennes générales des étudiants')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        
-        # Enregistrer le graphique
-        plt.savefig(chemin_sortie)
-        plt.close()
\ No newline at end of file
+        return graphique_moyennes(noms, moyennes)
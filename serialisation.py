@@ -0,0 +1,174 @@
+# serialisation.py
+import json
+import pickle
+import zlib
+
+try:
+    import msgpack
+except ImportError:  # msgpack est optionnel : JSON le remplace
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # lz4 est optionnel : zlib le remplace
+    lz4_frame = None
+
+
+# Les valeurs sérialisées commencent par MARQUE, l'étiquette du codec puis
+# celle de la compression. Une valeur sans marque (écrite avant les codecs)
+# est rendue telle quelle, comme du texte.
+MARQUE = b"\x00"
+
+
+class Codec:
+    """Encode une valeur en octets et la décode ; etiquette l'identifie (1 octet)"""
+
+    etiquette = None
+
+    def encoder(self, valeur):
+        """Octets de la valeur ; TypeError si le codec ne sait pas la représenter"""
+        raise NotImplementedError
+
+    def decoder(self, donnees):
+        raise NotImplementedError
+
+
+class CodecTexte(Codec):
+    """Chaînes de caractères, en UTF-8"""
+
+    etiquette = b"s"
+
+    def encoder(self, valeur):
+        if not isinstance(valeur, str):
+            raise TypeError("CodecTexte n'encode que des chaînes")
+        return valeur.encode('utf-8')
+
+    def decoder(self, donnees):
+        return donnees.decode('utf-8')
+
+
+class CodecJSON(Codec):
+    """JSON compact (les tuples redeviennent des listes, les clés des chaînes)"""
+
+    etiquette = b"j"
+
+    def encoder(self, valeur):
+        return json.dumps(valeur, ensure_ascii=False, separators=(',', ':'), allow_nan=True).encode('utf-8')
+
+    def decoder(self, donnees):
+        return json.loads(donnees)
+
+
+class CodecMsgpack(Codec):
+    """Binaire compact MessagePack (nécessite le paquet msgpack)"""
+
+    etiquette = b"m"
+
+    def encoder(self, valeur):
+        return msgpack.packb(valeur, use_bin_type=True)
+
+    def decoder(self, donnees):
+        return msgpack.unpackb(donnees, raw=False, strict_map_key=False)
+
+
+class CodecPickle(Codec):
+    """Pickle, pour les objets que les autres codecs ne représentent pas
+
+    Décoder du pickle exécute du code : à réserver à un Redis de confiance.
+    """
+
+    etiquette = b"p"
+
+    def encoder(self, valeur):
+        return pickle.dumps(valeur, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decoder(self, donnees):
+        return pickle.loads(donnees)
+
+
+COMPRESSIONS = {
+    # nom: (etiquette, compresser, decompresser)
+    "zlib": (b"z", lambda donnees: zlib.compress(donnees, 6), zlib.decompress),
+}
+if lz4_frame is not None:
+    COMPRESSIONS["lz4"] = (b"l", lz4_frame.compress, lz4_frame.decompress)
+SANS_COMPRESSION = b"-"
+
+
+class Serialiseur:
+    """Transforme les valeurs du cache en octets étiquetés, et inversement
+
+    Les chaînes passent par CodecTexte ; les autres valeurs par le premier codec
+    de la liste qui sait les représenter (msgpack si installé, puis JSON, puis
+    pickle si autoriser_pickle). Au-delà de seuil_compression octets, la valeur
+    encodée est compressée (zlib, ou lz4 si installé et demandé).
+
+    Pickle n'est ni écrit ni lu sans autoriser_pickle=True : décoder une
+    valeur pickle exécute du code, et quiconque peut écrire dans Redis
+    pourrait alors en faire exécuter par l'application.
+    """
+
+    def __init__(self, codec="msgpack", compression="zlib", seuil_compression=1024, autoriser_pickle=False):
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"Compression indisponible: {compression}")
+        self.codecs = []
+        if codec not in ("msgpack", "json"):
+            raise ValueError(f"Codec inconnu: {codec}")
+        if codec == "msgpack":
+            if msgpack is not None:
+                self.codecs.append(CodecMsgpack())
+            else:
+                print("Codec msgpack demandé mais paquet msgpack absent : JSON utilisé")
+        self.codecs.append(CodecJSON())
+        if autoriser_pickle:
+            self.codecs.append(CodecPickle())
+
+        self.texte = CodecTexte()
+        self.compression = compression
+        self.seuil_compression = seuil_compression
+        self.autoriser_pickle = autoriser_pickle
+        self._decodeurs = {codec.etiquette: codec for codec in [self.texte, CodecJSON()]}
+        if autoriser_pickle:
+            self._decodeurs[CodecPickle.etiquette] = CodecPickle()
+        if msgpack is not None:
+            self._decodeurs[CodecMsgpack.etiquette] = CodecMsgpack()
+        self._decompresseurs = {etiquette: decompresser for etiquette, _, decompresser in COMPRESSIONS.values()}
+
+    def _encoder(self, valeur):
+        if isinstance(valeur, str):
+            return self.texte.etiquette, self.texte.encoder(valeur)
+        for codec in self.codecs:
+            try:
+                return codec.etiquette, codec.encoder(valeur)
+            except (TypeError, ValueError, OverflowError):
+                continue
+        raise TypeError(f"Aucun codec ne sait sérialiser {type(valeur).__name__}")
+
+    def serialiser(self, valeur):
+        etiquette, donnees = self._encoder(valeur)
+        compression = SANS_COMPRESSION
+        if self.compression is not None and len(donnees) > self.seuil_compression:
+            compression, compresser, _ = COMPRESSIONS[self.compression]
+            donnees = compresser(donnees)
+        return MARQUE + etiquette + compression + donnees
+
+    def deserialiser(self, donnees):
+        if isinstance(donnees, str):
+            # Client Redis avec decode_responses=True : seul le texte brut survit
+            return donnees
+        if not donnees.startswith(MARQUE) or len(donnees) < 3:
+            try:
+                return donnees.decode('utf-8')
+            except UnicodeDecodeError:
+                return donnees
+
+        etiquette, compression, charge = donnees[1:2], donnees[2:3], donnees[3:]
+        if etiquette == CodecPickle.etiquette and not self.autoriser_pickle:
+            raise ValueError("Valeur pickle refusée (autoriser_pickle=False)")
+        if etiquette not in self._decodeurs:
+            raise ValueError(f"Codec indisponible pour l'étiquette {etiquette!r}")
+        if compression != SANS_COMPRESSION:
+            if compression not in self._decompresseurs:
+                raise ValueError(f"Compression indisponible pour l'étiquette {compression!r}")
+            charge = self._decompresseurs[compression](charge)
+        return self._decodeurs[etiquette].decoder(charge)
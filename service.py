@@ -1,10 +1,69 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from agregats import AgregatsStatistiques
+from entite.etudiant import Etudiant
+from gestion_etudiants import GestionEtudiants
 from validation.validator import Validator
 
+
+def _valider_morceau(morceau, par_lot=True):
+    """Valide un morceau de DataFrame dans un processus de travail"""
+    service = Service()
+    service.valider_donnees(morceau, par_lot=par_lot)
+    return service.lignes_valides, service.lignes_invalides
+
+
 class Service:
     def __init__(self, lignes_valides=None, lignes_invalides=None):
         self.lignes_valides = lignes_valides or []
         self.lignes_invalides = lignes_invalides or []
         self.validator = Validator()
+        # Agrégats des lignes valides, calculés à la première lecture
+        self._agregats = None
+    
+    @staticmethod
+    def _notes(ligne):
+        """Notes d'une ligne, None si _parser_notes ne sait pas les lire"""
+        try:
+            return GestionEtudiants._parser_notes(ligne.get('Note'))
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def _contribution(ligne):
+        """(classe, moyenne, {matiere: moyenne}) d'une ligne valide
+
+        Des notes illisibles ne comptent pas : la ligne n'apporte que sa classe.
+        """
+        etudiant = Etudiant(notes=Service._notes(ligne))
+        moyenne = etudiant.calculer_moyenne_generale() if etudiant.notes else None
+        return ligne.get('Classe'), moyenne, etudiant.moyennes_matieres()
+    
+    @property
+    def agregats(self):
+        """Agrégats (AgregatsStatistiques) des lignes valides, tenus à jour"""
+        if self._agregats is None:
+            self._agregats = AgregatsStatistiques()
+            for ligne in self.lignes_valides:
+                self._agregats.ajouter(*self._contribution(ligne))
+        return self._agregats
+    
+    def _ajouter_ligne_valide(self, ligne):
+        self.lignes_valides.append(ligne)
+        if self._agregats is not None:
+            self._agregats.ajouter(*self._contribution(ligne))
+    
+    def verifier_agregats(self):
+        """Écarts entre les agrégats tenus à jour et un recalcul complet"""
+        if self._agregats is None:
+            return []
+        reference = AgregatsStatistiques()
+        for ligne in self.lignes_valides:
+            reference.ajouter(*self._contribution(ligne))
+        return self._agregats.ecarts(reference)
     
     def afficher_informations(self, type_info="valide"):
         """Affiche les informations valides ou invalides selon le choix"""
@@ -71,6 +130,8 @@ class Service:
         nouvelle_ligne['Note'] = input("Notes (format: Matiere[note|note:moyenne]#...): ")
         
         erreurs = self.validator.valider_ligne(nouvelle_ligne)
+        if not erreurs and self._notes(nouvelle_ligne) is None:
+            erreurs = ['Notes invalides']
         
         if erreurs:
             nouvelle_ligne['erreurs'] = erreurs
@@ -79,7 +140,7 @@ class Service:
         else:
             nouvelle_ligne['Date de naissance'] = self.validator.formater_date(nouvelle_ligne['Date de naissance'])
             nouvelle_ligne['Classe'] = self.validator.formater_classe(nouvelle_ligne['Classe'])
-            self.lignes_valides.append(nouvelle_ligne)
+            self._ajouter_ligne_valide(nouvelle_ligne)
             print("\nInformation ajoutée avec succès aux données valides.")
     
     def modifier_information_invalide(self):
@@ -101,6 +162,8 @@ class Service:
                 
                 # Validation des nouvelles données
                 erreurs = self.validator.valider_ligne(nouvelle_ligne)
+                if not erreurs and self._notes(nouvelle_ligne) is None:
+                    erreurs = ['Notes invalides']
                 if erreurs:
                     nouvelle_ligne['erreurs'] = erreurs
                     self.lignes_invalides[index] = nouvelle_ligne
@@ -109,20 +172,40 @@ class Service:
                     # Formatage et transfert vers les données valides
                     nouvelle_ligne['Date de naissance'] = self.validator.formater_date(nouvelle_ligne['Date de naissance'])
                     nouvelle_ligne['Classe'] = self.validator.formater_classe(nouvelle_ligne['Classe'])
-                    self.lignes_valides.append(nouvelle_ligne)
+                    self._ajouter_ligne_valide(nouvelle_ligne)
                     self.lignes_invalides.pop(index)
                     print("\nInformation corrigée et transférée vers les données valides.")
                 return
         
         print("Numéro non trouvé dans les données invalides.")
     
-    def valider_donnees(self, df):
-        """Valide les données d'un DataFrame et les sépare en valides et invalides"""
+    def valider_donnees(self, df, par_lot=True, nb_processus=1, taille_morceau=100000):
+        """Valide les données d'un DataFrame et les sépare en valides et invalides
+
+        Par défaut la validation se fait colonne par colonne (voir
+        separer_lignes) ; par_lot=False valide ligne par ligne. Avec
+        nb_processus > 1 (None : un par cœur), le DataFrame est découpé en
+        morceaux de taille_morceau lignes validés dans un pool de processus,
+        puis les résultats sont fusionnés dans l'ordre d'origine des lignes.
+        """
+        if taille_morceau < 1:
+            raise ValueError(f"taille_morceau doit être >= 1 (reçu {taille_morceau})")
         self.lignes_valides = []
         self.lignes_invalides = []
+        self._agregats = None
         # Nettoyer les noms de colonnes
         df.columns = [col.strip() for col in df.columns]
         
+        if nb_processus is None:
+            nb_processus = os.cpu_count() or 1
+        if nb_processus > 1 and len(df) > taille_morceau:
+            self._valider_en_parallele(df, par_lot, nb_processus, taille_morceau)
+            return
+        
+        if par_lot:
+            self.lignes_valides, self.lignes_invalides = self.separer_lignes(df)
+            return
+        
         for _, row in df.iterrows():
             ligne = row.to_dict()
             erreurs = self.validator.valider_ligne(ligne)
@@ -133,4 +216,60 @@ class Service:
                 # Formatter les données valides
                 ligne['Date de naissance'] = self.validator.formater_date(ligne['Date de naissance'])
                 ligne['Classe'] = self.validator.formater_classe(ligne['Classe'])
-                self.lignes_valides.append(ligne)
\ No newline at end of file
+                self.lignes_valides.append(ligne)
+    
+    def _valider_en_parallele(self, df, par_lot, nb_processus, taille_morceau):
+        """Valide les morceaux du DataFrame dans un pool de processus
+
+        Au plus deux morceaux par processus sont soumis à la fois : les autres
+        ne sont découpés et copiés vers le pool qu'à mesure que les premiers
+        reviennent, pour ne pas dupliquer tout le DataFrame dans sa file.
+        """
+        morceaux = (df.iloc[debut:debut + taille_morceau] for debut in range(0, len(df), taille_morceau))
+        with ProcessPoolExecutor(max_workers=nb_processus) as executor:
+            # Résultats fusionnés dans l'ordre des morceaux : la fusion est déterministe
+            en_cours = deque()
+            for morceau in morceaux:
+                en_cours.append(executor.submit(_valider_morceau, morceau, par_lot))
+                if len(en_cours) >= 2 * nb_processus:
+                    self._fusionner(*en_cours.popleft().result())
+            while en_cours:
+                self._fusionner(*en_cours.popleft().result())
+    
+    def _fusionner(self, valides, invalides):
+        self.lignes_valides.extend(valides)
+        self.lignes_invalides.extend(invalides)
+    
+    @staticmethod
+    def separer_lignes(df):
+        """Sépare les lignes d'un DataFrame en (lignes_valides, lignes_invalides)
+
+        Même résultat que valider_ligne appliqué ligne par ligne, mais la
+        validation et le formatage se font sur des colonnes entières.
+        """
+        erreurs, dates, classes = Validator.analyser_lot(df)
+        masque = ~erreurs.any(axis=1)
+        df = df.reset_index(drop=True)
+        
+        lignes_valides = []
+        if masque.any():
+            valides = df[masque].copy()
+            # Comme ligne['Date de naissance'] dans la validation ligne par ligne
+            if 'Date de naissance' not in valides.columns:
+                raise KeyError('Date de naissance')
+            valides['Date de naissance'] = dates[masque].to_numpy()
+            valides['Classe'] = classes[masque].to_numpy()
+            lignes_valides = Service._en_dictionnaires(valides)
+        
+        lignes_invalides = Service._en_dictionnaires(df[~masque])
+        codes = np.array(Validator.ERREURS, dtype=object)
+        for ligne, erreurs_ligne in zip(lignes_invalides, erreurs[~masque]):
+            ligne['erreurs'] = codes[erreurs_ligne].tolist()
+        
+        return lignes_valides, lignes_invalides
+    
+    @staticmethod
+    def _en_dictionnaires(df):
+        """Équivalent de df.to_dict('records') construit à partir des colonnes entières"""
+        colonnes = list(df.columns)
+        return [dict(zip(colonnes, valeurs)) for valeurs in zip(*(df[col].tolist() for col in colonnes))]
\ No newline at end of file
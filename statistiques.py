@@ -0,0 +1,196 @@
+# statistiques.py
+import numpy as np
+
+# Regroupements proposés par GestionEtudiants.statistiques_detaillees
+GROUPES = ("classe", "matiere", "classe,matiere")
+PERCENTILES_DEFAUT = (10, 25, 50, 75, 90)
+NOTE_MAX = 20
+# Au plus NB_CLASSES_MAX classes par histogramme : largeur minimale 0.1
+NB_CLASSES_MAX = 200
+LARGEUR_HISTOGRAMME_MIN = NOTE_MAX / NB_CLASSES_MAX
+
+
+class ColonnesCohorte:
+    """Les étudiants valides rangés en tableaux NumPy pour les statistiques
+
+    - classes / codes_classe : classe de chaque étudiant (codes dans classes)
+    - moyennes : moyenne générale de chaque étudiant (NaN sans moyenne)
+    - matieres / matiere_entrees / classe_entrees / valeurs_entrees : une
+      entrée par couple (étudiant, matière) avec la moyenne de la matière
+    """
+
+    def __init__(self, classes, codes_classe, moyennes, matieres, matiere_entrees, classe_entrees, valeurs_entrees):
+        self.classes = classes
+        self.codes_classe = codes_classe
+        self.moyennes = moyennes
+        self.matieres = matieres
+        self.matiere_entrees = matiere_entrees
+        self.classe_entrees = classe_entrees
+        self.valeurs_entrees = valeurs_entrees
+
+    @staticmethod
+    def depuis_etudiants(etudiants):
+        """Construit les colonnes en un seul parcours des étudiants
+
+        Les étudiants adossés à un MagasinNotes sont lus directement dans ses
+        tableaux, par magasin ; les autres un par un.
+        """
+        import pandas as pd
+
+        noms_classes = []
+        par_magasin = {}  # id(magasin) -> (magasin, rangs, positions)
+        autonomes = []
+        for rang, etudiant in enumerate(etudiants):
+            noms_classes.append(etudiant.classe if isinstance(etudiant.classe, str) else "")
+            magasin = etudiant._magasin
+            if magasin is None:
+                autonomes.append(rang)
+            else:
+                groupe = par_magasin.get(id(magasin))
+                if groupe is None:
+                    groupe = par_magasin[id(magasin)] = (magasin, [], [])
+                groupe[1].append(rang)
+                groupe[2].append(etudiant._position)
+
+        codes_classe, classes = pd.factorize(np.array(noms_classes, dtype=object))
+        codes_classe = codes_classe.astype(np.int64)
+        moyennes = np.full(len(noms_classes), np.nan)
+        ids_matieres = {}
+        matiere_entrees, classe_entrees, valeurs_entrees = [], [], []
+
+        for magasin, rangs, positions in par_magasin.values():
+            rangs = np.array(rangs, dtype=np.int64)
+            positions = np.array(positions, dtype=np.int64)
+            moyennes[rangs] = magasin.moyennes[positions]
+
+            # Entrées (étudiant, matière) des positions retenues, dans l'ordre
+            entrees = magasin.entrees(positions)
+            longueurs = magasin.etudiant_offsets[positions + 1] - magasin.etudiant_offsets[positions]
+
+            correspondance = np.array(
+                [ids_matieres.setdefault(matiere, len(ids_matieres)) for matiere in magasin.matieres] or [0],
+                dtype=np.int64
+            )
+            matiere_entrees.append(correspondance[magasin.matiere_ids[entrees]])
+            classe_entrees.append(np.repeat(codes_classe[rangs], longueurs))
+            valeurs_entrees.append(magasin.moyennes_matieres[entrees])
+
+        if autonomes:
+            matieres_autonomes, classes_autonomes, valeurs_autonomes = [], [], []
+            for rang in autonomes:
+                etudiant = etudiants[rang]
+                moyenne = etudiant.moyenne_generale
+                moyennes[rang] = np.nan if moyenne is None else moyenne
+                for matiere, valeur in etudiant.moyennes_matieres().items():
+                    matieres_autonomes.append(ids_matieres.setdefault(matiere, len(ids_matieres)))
+                    classes_autonomes.append(codes_classe[rang])
+                    valeurs_autonomes.append(valeur)
+            matiere_entrees.append(np.array(matieres_autonomes, dtype=np.int64))
+            classe_entrees.append(np.array(classes_autonomes, dtype=np.int64))
+            valeurs_entrees.append(np.array(valeurs_autonomes, dtype=np.float64))
+
+        def concatener(tableaux, dtype):
+            return np.concatenate(tableaux).astype(dtype) if tableaux else np.zeros(0, dtype=dtype)
+
+        return ColonnesCohorte(
+            classes=list(classes),
+            codes_classe=codes_classe,
+            moyennes=moyennes,
+            matieres=list(ids_matieres),
+            matiere_entrees=concatener(matiere_entrees, np.int64),
+            classe_entrees=concatener(classe_entrees, np.int64),
+            valeurs_entrees=concatener(valeurs_entrees, np.float64)
+        )
+
+    def statistiques(self, groupe="classe", percentiles=PERCENTILES_DEFAUT, seuil_reussite=10, largeur_histogramme=2):
+        """Statistiques par classe (moyennes générales), par matière ou par
+        classe et matière (moyennes des matières)
+
+        Retourne {classe: stats}, {matiere: stats} ou {classe: {matiere: stats}}.
+        """
+        options = dict(percentiles=percentiles, seuil_reussite=seuil_reussite,
+                       largeur_histogramme=largeur_histogramme)
+        if groupe == "classe":
+            resultats = statistiques_groupees(self.moyennes, self.codes_classe, len(self.classes), **options)
+            return dict(zip(self.classes, resultats))
+        if groupe == "matiere":
+            resultats = statistiques_groupees(self.valeurs_entrees, self.matiere_entrees, len(self.matieres), **options)
+            return dict(zip(self.matieres, resultats))
+        if groupe == "classe,matiere":
+            nb_matieres = len(self.matieres)
+            resultats = statistiques_groupees(
+                self.valeurs_entrees, self.classe_entrees * nb_matieres + self.matiere_entrees,
+                len(self.classes) * nb_matieres, **options
+            )
+            par_classe = {}
+            for code, stats in enumerate(resultats):
+                if stats["effectif"]:
+                    classe, matiere = self.classes[code // nb_matieres], self.matieres[code % nb_matieres]
+                    par_classe.setdefault(classe, {})[matiere] = stats
+            return par_classe
+        raise ValueError(f"Regroupement inconnu: {groupe} (attendu: {', '.join(GROUPES)})")
+
+
+def statistiques_groupees(valeurs, groupes, nb_groupes, percentiles=PERCENTILES_DEFAUT, seuil_reussite=10,
+                          largeur_histogramme=2):
+    """Statistiques de valeurs pour chacun des groupes 0..nb_groupes-1, en une passe vectorisée
+
+    Les valeurs NaN sont ignorées. L'écart-type est celui de la population et
+    les percentiles sont interpolés linéairement (comme np.percentile).
+    L'histogramme couvre [0, NOTE_MAX] par classes de largeur_histogramme,
+    la dernière incluant NOTE_MAX ; la largeur doit être comprise entre
+    LARGEUR_HISTOGRAMME_MIN et NOTE_MAX (ValueError sinon).
+    """
+    if not LARGEUR_HISTOGRAMME_MIN <= largeur_histogramme <= NOTE_MAX:
+        raise ValueError(f"Largeur d'histogramme hors de [{LARGEUR_HISTOGRAMME_MIN:g}, {NOTE_MAX}]: {largeur_histogramme}")
+    valeurs = np.asarray(valeurs, dtype=np.float64)
+    groupes = np.asarray(groupes, dtype=np.int64)
+    presentes = ~np.isnan(valeurs)
+    valeurs, groupes = valeurs[presentes], groupes[presentes]
+
+    effectifs = np.bincount(groupes, minlength=nb_groupes)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moyennes = np.bincount(groupes, weights=valeurs, minlength=nb_groupes) / effectifs
+        ecarts = valeurs - moyennes[groupes]
+        ecarts_types = np.sqrt(np.bincount(groupes, weights=ecarts * ecarts, minlength=nb_groupes) / effectifs)
+        taux_reussite = np.bincount(groupes, weights=(valeurs >= seuil_reussite), minlength=nb_groupes) / effectifs
+
+    # Valeurs triées par groupe puis par valeur : chaque groupe est une tranche
+    triees = valeurs[np.lexsort((valeurs, groupes))]
+    debuts = np.concatenate(([0], np.cumsum(effectifs)[:-1]))
+    derniers = np.maximum(debuts + effectifs - 1, 0)
+
+    def percentile(p):
+        if not len(triees):
+            return np.full(nb_groupes, np.nan)
+        rangs = debuts + (effectifs - 1).clip(min=0) * (p / 100)
+        # Les groupes vides (masqués ensuite) peuvent pointer après la fin
+        bas = np.minimum(np.floor(rangs).astype(np.int64), len(triees) - 1)
+        haut = np.minimum(bas + 1, derniers)
+        resultat = triees[bas] + (triees[haut] - triees[bas]) * (rangs - bas)
+        return np.where(effectifs > 0, resultat, np.nan)
+
+    valeurs_percentiles = {p: percentile(p) for p in percentiles}
+    mediane = valeurs_percentiles[50] if 50 in valeurs_percentiles else percentile(50)
+
+    nb_classes = min(int(np.ceil(NOTE_MAX / largeur_histogramme)), NB_CLASSES_MAX)
+    bornes = [round(min(i * largeur_histogramme, NOTE_MAX), 2) for i in range(nb_classes + 1)]
+    indices = np.clip(np.floor(valeurs / largeur_histogramme).astype(np.int64), 0, nb_classes - 1)
+    histogrammes = np.bincount(groupes * nb_classes + indices, minlength=nb_groupes * nb_classes)
+    histogrammes = histogrammes.reshape(nb_groupes, nb_classes)
+
+    def arrondie(valeur):
+        return None if np.isnan(valeur) else round(float(valeur), 2)
+
+    return [
+        {
+            "effectif": int(effectifs[g]),
+            "moyenne": arrondie(moyennes[g]),
+            "mediane": arrondie(mediane[g]),
+            "ecart_type": arrondie(ecarts_types[g]),
+            "percentiles": {f"p{p:g}": arrondie(valeurs_percentiles[p][g]) for p in percentiles},
+            "taux_reussite": arrondie(taux_reussite[g]),
+            "histogramme": {"bornes": bornes, "effectifs": histogrammes[g].tolist()},
+        }
+        for g in range(nb_groupes)
+    ]
@@ -1,31 +1,62 @@
 import re
 from datetime import datetime
 
+import numpy as np
+
+# Motifs compilés une seule fois pour toutes les lignes
+MOTIF_NUMERO = re.compile(r'^[A-Z0-9]{7}$')
+MOTIF_NOM = re.compile(r'^[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\- ]+$')
+MOTIF_DATE_COURTE = re.compile(r'^\d{2}/\d{2}/\d{2}$')
+MOTIF_CLASSE = re.compile(r'^([3-6])(em)([ab])$')
+# Une matière : Matiere[devoirs:examen], notes lisibles par float() et un
+# seul ':' comme le demande GestionEtudiants._parser_notes ; sans ':', la
+# matière est ignorée par le parseur et peut contenir n'importe quels chiffres
+_NOTE = r'(?:\d+(?:\.\d*)?|\.\d+)'
+_MATIERE = rf'[A-Za-z]+\[(?:{_NOTE}(?:\|{_NOTE})*:{_NOTE}|[\d|.]+)\]'
+MOTIF_MATIERE = re.compile(rf'^{_MATIERE}$')
+# Une colonne "Note" entière : les matières séparées par '#', espaces autour compris
+MOTIF_NOTES = re.compile(rf'\s*{_MATIERE}\s*(?:#\s*{_MATIERE}\s*)*')
+
+# Équivalents des directives de strptime (_strptime) pour les formats acceptés
+_JOUR = r'(?P<jour>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])'
+_MOIS = r'(?P<mois>1[0-2]|0[1-9]|[1-9])'
+_ANNEE = r'(?P<annee>\d\d\d\d)'
+FORMATS_DATE = [
+    ('%d-%m-%Y', rf'^{_JOUR}-{_MOIS}-{_ANNEE}\Z'),
+    ('%d/%m/%Y', rf'^{_JOUR}/{_MOIS}/{_ANNEE}\Z'),
+    ('%Y-%m-%d', rf'^{_ANNEE}-{_MOIS}-{_JOUR}\Z'),
+    ('%d.%m.%Y', rf'^{_JOUR}\.{_MOIS}\.{_ANNEE}\Z'),
+]
+FORMAT_DATE_COURTE = rf'^{_JOUR}/{_MOIS}/(?P<annee>\d\d)\Z'
+
 class Validator:
+    # Codes d'erreur, dans l'ordre des colonnes de la matrice de valider_lot
+    ERREURS = ('Numero invalide', 'Nom invalide', 'Prenom invalide', 'Date invalide', 'Classe invalide', 'Notes invalides')
+    
     @staticmethod
     def est_numero_valide(numero):
         if not isinstance(numero, str):
             return False
-        return len(numero) == 7 and bool(re.match(r'^[A-Z0-9]{7}$', str(numero)))
+        return len(numero) == 7 and bool(MOTIF_NUMERO.match(str(numero)))
     
     @staticmethod
     def est_nom_valide(nom):
         if not isinstance(nom, str):
             return False
-        return bool(re.match(r'^[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\- ]+$', nom))
+        return bool(MOTIF_NOM.match(nom))
     
     @staticmethod
     def est_prenom_valide(prenom):
         if not isinstance(prenom, str):
             return False
-        return bool(re.match(r'^[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ\- ]+$', prenom))
+        return bool(MOTIF_NOM.match(prenom))
     
     @staticmethod
     def formater_date(date):
         try:
             if isinstance(date, str):
                 # Gérer le format avec année à 2 chiffres
-                if re.match(r'^\d{2}/\d{2}/\d{2}$', date):
+                if MOTIF_DATE_COURTE.match(date):
                     date_obj = datetime.strptime(date, '%d/%m/%y')
                     return date_obj.strftime('%d/%m/%Y')
                 formats = ['%d-%m-%Y', '%d/%m/%Y', '%Y-%m-%d', '%d.%m.%Y']
@@ -50,7 +81,7 @@ class Validator:
         if not isinstance(classe, str):
             return None
         classe = classe.lower().replace(" ", "").replace("iem", "em")
-        match = re.match(r'^([3-6])(em)([ab])$', classe)
+        match = MOTIF_CLASSE.match(classe)
         if match:
             niveau, em, lettre = match.groups()
             return f"{niveau}{em}{lettre.upper()}"
@@ -66,8 +97,7 @@ class Validator:
             return False
         matieres = note.split('#')
         # Pattern modifié pour accepter les notes avec | et :
-        pattern = r'^[A-Za-z]+\[[\d\|\.:]+\]$'
-        return all(re.match(pattern, matiere.strip()) for matiere in matieres)
+        return all(MOTIF_MATIERE.match(matiere.strip()) for matiere in matieres)
     
     @staticmethod
     def valider_ligne(ligne):
@@ -89,4 +119,136 @@ class Validator:
             erreurs.append('Classe invalide')
         if not Validator.est_note_valide(ligne.get('Note', '')):
             erreurs.append('Notes invalides')
-        return erreurs
\ No newline at end of file
+        return erreurs
+    
+    @staticmethod
+    def valider_lot(df):
+        """Valide toutes les lignes d'un DataFrame colonne par colonne
+
+        Retourne (masque, erreurs) : masque[i] est vrai si la ligne i est
+        valide et erreurs[i, j] vrai si la ligne i a l'erreur Validator.ERREURS[j],
+        exactement comme valider_ligne appliqué ligne par ligne.
+        """
+        erreurs, _, _ = Validator.analyser_lot(df)
+        return ~erreurs.any(axis=1), erreurs
+    
+    @staticmethod
+    def analyser_lot(df):
+        """Valide un DataFrame et formate ses dates et classes
+
+        Retourne (erreurs, dates, classes) où dates et classes sont les
+        résultats de formater_date et formater_classe pour chaque ligne.
+        """
+        import pandas as pd
+        
+        def colonne(*noms):
+            # Même repli que ligne.get(nom, ligne.get(autre, ''))
+            for nom in noms:
+                if nom in df.columns:
+                    return df[nom]
+            return pd.Series([''] * len(df), dtype=object)
+        
+        df = df.reset_index(drop=True)
+        numeros = Validator._chaines(colonne('Numero'))
+        noms = Validator._chaines(colonne('Nom'))
+        prenoms = Validator._chaines(colonne('Prenom', 'Prénom'))
+        notes = Validator._chaines(colonne('Note'))
+        dates = Validator.formater_dates_lot(colonne('Date de naissance', 'Date'))
+        classes = Validator.formater_classes_lot(colonne('Classe'))
+        
+        erreurs = np.column_stack([
+            ~(Validator._vrai(numeros.str.len() == 7) & Validator._vrai(numeros.str.match(MOTIF_NUMERO))),
+            ~Validator._vrai(noms.str.match(MOTIF_NOM)),
+            ~Validator._vrai(prenoms.str.match(MOTIF_NOM)),
+            dates.isna().to_numpy(),
+            classes.isna().to_numpy(),
+            ~Validator._vrai(notes.str.fullmatch(MOTIF_NOTES)),
+        ])
+        return erreurs, dates, classes
+    
+    @staticmethod
+    def formater_dates_lot(dates):
+        """Version vectorisée de formater_date (None pour une date invalide)"""
+        import pandas as pd
+        
+        dates = pd.Series(dates).reset_index(drop=True)
+        resultat = pd.Series([None] * len(dates), index=dates.index, dtype=object)
+        chaines = Validator._chaines(dates)
+        est_chaine = chaines.notna()
+        
+        # Chiffres non ASCII ou valeurs datetime : cas rares traités par formater_date
+        a_part = (est_chaine & ~Validator._vrai(chaines.str.fullmatch(r'[\x00-\x7f]*'))) | (~est_chaine & dates.notna())
+        for index in np.flatnonzero(a_part.to_numpy()):
+            resultat.at[index] = Validator.formater_date(dates.at[index])
+        chaines = chaines.where(~a_part)
+        
+        courtes = Validator._vrai(chaines.str.match(MOTIF_DATE_COURTE))
+        a_traiter = Validator._vrai(chaines.notna()) & ~courtes
+        Validator._appliquer_format(chaines, courtes, FORMAT_DATE_COURTE, resultat, annee_courte=True)
+        for _, motif in FORMATS_DATE:
+            a_traiter &= ~Validator._appliquer_format(chaines, a_traiter, motif, resultat)
+        return resultat
+    
+    @staticmethod
+    def _appliquer_format(chaines, candidates, motif, resultat, annee_courte=False):
+        """Tente un format de date sur les lignes candidates et remplit resultat
+
+        Retourne le masque des lignes dont la date a été reconnue.
+        """
+        import pandas as pd
+        
+        reconnues = np.zeros(len(chaines), dtype=bool)
+        if not candidates.any():
+            return reconnues
+        parties = chaines[candidates].str.extract(motif)
+        trouvees = parties['annee'].notna().to_numpy()
+        parties = parties[trouvees]
+        jour = parties['jour'].str.strip().astype(np.int64).to_numpy()
+        mois = parties['mois'].astype(np.int64).to_numpy()
+        annee = parties['annee'].astype(np.int64).to_numpy()
+        if annee_courte:
+            annee = np.where(annee <= 68, annee + 2000, annee + 1900)
+        
+        # Même contrôle que datetime(annee, mois, jour)
+        bissextile = (annee % 4 == 0) & ((annee % 100 != 0) | (annee % 400 == 0))
+        jours_du_mois = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[mois] + (bissextile & (mois == 2))
+        correctes = (annee >= 1) & (jour <= jours_du_mois)
+        
+        index = parties.index[correctes]
+        jour, mois, annee = jour[correctes], mois[correctes], annee[correctes]
+        def texte(valeurs, largeur):
+            return pd.Series(valeurs, index=index, dtype=np.int64).astype(str).str.zfill(largeur)
+        
+        resultat.loc[index] = texte(jour, 2) + '/' + texte(mois, 2) + '/' + texte(annee, 1)
+        for i in index[annee < 1000]:
+            # strftime('%Y') ne complète pas les années à 4 chiffres : repli sur formater_date
+            resultat.at[i] = Validator.formater_date(chaines.at[i])
+        
+        reconnues[index] = True
+        return reconnues
+    
+    @staticmethod
+    def formater_classes_lot(classes):
+        """Version vectorisée de formater_classe (None pour une classe invalide)"""
+        import pandas as pd
+        
+        classes = Validator._chaines(pd.Series(classes).reset_index(drop=True))
+        normalisees = classes.str.lower().str.replace(" ", "", regex=False).str.replace("iem", "em", regex=False)
+        parties = normalisees.str.extract(MOTIF_CLASSE)
+        formatees = parties[0] + 'em' + parties[2].str.upper()
+        return formatees.astype(object).where(formatees.notna(), None)
+    
+    @staticmethod
+    def _chaines(serie):
+        """Garde les valeurs de type str, remplace les autres par None"""
+        import pandas as pd
+        
+        if pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+            return serie.astype(object).where(serie.notna(), None)
+        est_chaine = serie.map(lambda valeur: isinstance(valeur, str)).astype(bool)
+        return serie.astype(object).where(est_chaine, None)
+    
+    @staticmethod
+    def _vrai(masque):
+        """Convertit un résultat de .str (avec des valeurs manquantes) en tableau booléen"""
+        return masque.to_numpy(dtype=bool, na_value=False)